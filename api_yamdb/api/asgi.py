@@ -0,0 +1,144 @@
+"""ASGI application with asynchronous read endpoints."""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from asgiref.wsgi import WsgiToAsgi
+from django.conf import settings
+from django.core import signals
+from django.core.handlers.wsgi import WSGIRequest, get_script_name
+from django.urls import Resolver404, resolve, set_script_prefix
+
+# Самые нагруженные чтения; остальные запросы, в том числе вся запись,
+# обрабатываются синхронными view через WsgiToAsgi.
+ASYNC_READ_VIEWS = ('titles-list', 'titles-detail', 'reviews-list',
+                    'comments-list')
+ASYNC_READ_METHODS = ('GET', 'HEAD')
+
+
+def build_environ(scope, body):
+    """WSGI environ из ASGI scope, как в asgiref.wsgi."""
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'],
+        'QUERY_STRING': scope['query_string'].decode('ascii'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f'HTTP/{scope["http_version"]}',
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': BytesIO(),
+    }
+
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin1').upper().replace('-', '_')
+        if name not in ('CONTENT_LENGTH', 'CONTENT_TYPE'):
+            name = f'HTTP_{name}'
+        value = value.decode('latin1')
+        if name in environ:
+            value = f'{environ[name]},{value}'
+        environ[name] = value
+
+    return environ
+
+
+class AsyncReadApplication:
+    """ASGI-приложение поверх синхронного Django.
+
+    В Django 2.2 нет асинхронных view и ORM, поэтому асинхронное чтение
+    устроено так: соединение с клиентом обслуживает цикл событий, а в
+    отдельный пул из ASGI_READ_THREADS потоков уходит только работа view
+    с БД. Поток освобождается, как только тело ответа готово, и медленный
+    клиент не держит ни поток, ни процесс. Запросы, не попавшие в
+    ASYNC_READ_VIEWS, передаются синхронному приложению через WsgiToAsgi.
+    """
+
+    def __init__(self, wsgi_application):
+        self.wsgi_application = wsgi_application
+        self.sync_application = WsgiToAsgi(wsgi_application)
+        self.executor = ThreadPoolExecutor(
+            settings.ASGI_READ_THREADS, thread_name_prefix='asgi-read')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+
+        if scope['type'] != 'http':
+            raise ValueError(f'Unsupported ASGI scope {scope["type"]}')
+
+        if not self.is_async_read(scope):
+            return await self.sync_application(scope, receive, send)
+
+        body = await self.read_body(receive)
+        environ = build_environ(scope, body)
+        status, headers, content = await asyncio.get_running_loop(
+        ).run_in_executor(self.executor, self.get_response, environ)
+
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': headers})
+        await send({'type': 'http.response.body',
+                    'body': b'' if scope['method'] == 'HEAD' else content})
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def is_async_read(self, scope):
+        if scope['method'] not in ASYNC_READ_METHODS:
+            return False
+
+        try:
+            match = resolve(scope['path'])
+        except Resolver404:
+            return False
+
+        return match.url_name in ASYNC_READ_VIEWS
+
+    @staticmethod
+    async def read_body(receive):
+        chunks = []
+
+        while True:
+            message = await receive()
+
+            if message['type'] == 'http.disconnect':
+                break
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body'):
+                break
+
+        return b''.join(chunks)
+
+    def get_response(self, environ):
+        """Выполняется в пуле: то же, что WSGIHandler.__call__."""
+        set_script_prefix(get_script_name(environ))
+        signals.request_started.send(sender=self.__class__, environ=environ)
+        response = self.wsgi_application.get_response(WSGIRequest(environ))
+
+        try:
+            content = b''.join(response)
+        finally:
+            # request_finished: закрытие соединений с БД этого потока.
+            response.close()
+
+        headers = [*response.items(), *(
+            ('Set-Cookie', cookie.output(header=''))
+            for cookie in response.cookies.values()
+        )]
+
+        return response.status_code, [
+            (name.lower().encode('latin1'), str(value).encode('latin1'))
+            for name, value in headers
+        ], content
@@ -0,0 +1,137 @@
+"""JWT authentication backed by cached user snapshots."""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.functional import SimpleLazyObject, empty
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (AuthenticationFailed,
+                                                 InvalidToken)
+from rest_framework_simplejwt.settings import api_settings
+from users.models import User
+
+USER_KEY = 'auth-user:{}'
+SNAPSHOT_FIELDS = (
+    'id', 'username', 'role', 'is_staff', 'is_superuser', 'is_active'
+)
+
+
+def get_cache():
+    """Кэш снимков или None, если он виден только текущему процессу."""
+    cache = caches[settings.AUTH_CACHE_ALIAS]
+
+    if isinstance(cache, LocMemCache):
+        return None
+
+    return cache
+
+
+def forget_user(pk):
+    cache = get_cache()
+
+    if cache is not None:
+        cache.delete(USER_KEY.format(pk))
+
+
+def get_user_instance(user):
+    """Пользователь для внешних ключей (`author=`) без загрузки из БД.
+
+    Присваивание CachedUser внешнему ключу загрузило бы модель целиком
+    (дескриптор проверяет её тип), вместо неё отдаётся снимок.
+    """
+    return getattr(user, 'snapshot', user)
+
+
+def snapshot_property(name):
+    """Поле из снимка, пока модель не загружена; после загрузки (в том
+    числе для записи) -- из модели, чтобы изменения были видны сразу."""
+    def get(self):
+        wrapped = self.__dict__['_wrapped']
+
+        if wrapped is empty:
+            wrapped = self.__dict__['_snapshot']
+
+        return getattr(wrapped, name)
+
+    return property(get)
+
+
+class CachedUser(SimpleLazyObject):
+    """Пользователь запроса.
+
+    Поля для проверки прав берутся из снимка, модель целиком загружается
+    из БД при обращении к любому другому атрибуту или записи в него;
+    после этого и поля снимка читаются из модели. `snapshot` -- сам
+    снимок: экземпляр User, остальные поля которого отложены (.only()).
+    """
+
+    id = snapshot_property('id')
+    pk = snapshot_property('pk')
+    username = snapshot_property('username')
+    role = snapshot_property('role')
+    is_staff = snapshot_property('is_staff')
+    is_superuser = snapshot_property('is_superuser')
+    is_active = snapshot_property('is_active')
+    is_authenticated = snapshot_property('is_authenticated')
+    is_anonymous = snapshot_property('is_anonymous')
+    is_admin = snapshot_property('is_admin')
+    is_moderator = snapshot_property('is_moderator')
+    is_user = snapshot_property('is_user')
+
+    def __init__(self, snapshot):
+        fields = [field.attname for field in User._meta.concrete_fields
+                  if field.attname in snapshot]
+        self.__dict__['_snapshot'] = User.from_db(
+            None, fields, [snapshot[name] for name in fields])
+
+        def load():
+            try:
+                return User.objects.get(pk=snapshot['id'])
+            except User.DoesNotExist:
+                raise AuthenticationFailed(
+                    _('User not found'), code='user_not_found')
+
+        super().__init__(load)
+
+    @property
+    def snapshot(self):
+        return self.__dict__['_snapshot']
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication без запроса пользователя к БД на каждый запрос.
+
+    Снимок пользователя хранится в кэше AUTH_CACHE_ALIAS не дольше
+    AUTH_USER_CACHE_TIMEOUT секунд и удаляется после коммита сохранения
+    или удаления пользователя (api/signals.py). Кэш должен быть общим
+    для всех процессов, иначе удаление не дойдёт до остальных: если он в
+    памяти процесса, снимок читается из БД на каждый запрос.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _('Token contained no recognizable user identification'))
+
+        cache = get_cache()
+        key = USER_KEY.format(user_id)
+        snapshot = None if cache is None else cache.get(key)
+
+        if snapshot is None:
+            snapshot = User.objects.filter(
+                **{api_settings.USER_ID_FIELD: user_id}
+            ).values(*SNAPSHOT_FIELDS).first()
+
+            if snapshot is None:
+                raise AuthenticationFailed(
+                    _('User not found'), code='user_not_found')
+            if cache is not None:
+                cache.set(key, snapshot, settings.AUTH_USER_CACHE_TIMEOUT)
+
+        if not snapshot['is_active']:
+            raise AuthenticationFailed(
+                _('User is inactive'), code='user_inactive')
+
+        return CachedUser(snapshot)
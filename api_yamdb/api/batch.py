@@ -0,0 +1,142 @@
+"""In-process execution of batched API operations."""
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections
+from django.urls import Resolver404, resolve
+from rest_framework import status
+
+logger = logging.getLogger('api.batch')
+
+SAFE_METHODS = ('GET',)
+# Заголовки условных запросов относятся к самому пакету, а не к операциям.
+DROPPED_HEADERS = (
+    'CONTENT_LENGTH', 'CONTENT_TYPE', 'HTTP_IF_NONE_MATCH',
+    'HTTP_IF_MODIFIED_SINCE', 'HTTP_IF_MATCH', 'HTTP_IF_UNMODIFIED_SINCE',
+)
+
+
+def build_request(request, operation):
+    """WSGI-запрос операции с пользователем внешнего запроса.
+
+    Пользователь передаётся через `_force_auth_user`, как в
+    APIRequestFactory: токен повторно не проверяется. Анонимные операции
+    проходят обычную аутентификацию и получают те же 401, что и без пакета.
+    """
+    url = urlsplit(operation['path'])
+    body = b''
+
+    if 'body' in operation:
+        body = json.dumps(operation['body']).encode()
+
+    environ = {
+        key: value for key, value in request._request.META.items()
+        if key not in DROPPED_HEADERS
+    }
+    environ.update({
+        'REQUEST_METHOD': operation['method'],
+        'PATH_INFO': url.path,
+        'QUERY_STRING': url.query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': BytesIO(body),
+    })
+    sub_request = WSGIRequest(environ)
+
+    if request.user.is_authenticated:
+        sub_request._force_auth_user = request.user
+        sub_request._force_auth_token = request.auth
+
+    return sub_request
+
+
+def error(code, detail):
+    return {'status': code, 'body': {'detail': detail}}
+
+
+def run_operation(request, operation):
+    sub_request = build_request(request, operation)
+
+    try:
+        match = resolve(sub_request.path_info)
+    except Resolver404:
+        return error(status.HTTP_404_NOT_FOUND, 'Not found.')
+
+    if match.func is request.resolver_match.func:
+        return error(status.HTTP_400_BAD_REQUEST,
+                     'Batch requests cannot be nested.')
+
+    sub_request.resolver_match = match
+
+    try:
+        response = match.func(sub_request, *match.args, **match.kwargs)
+    except Exception:
+        logger.exception('Batch operation %s %s failed',
+                         operation['method'], operation['path'])
+
+        return error(status.HTTP_500_INTERNAL_SERVER_ERROR, 'Server error.')
+
+    if response.streaming:
+        return error(status.HTTP_400_BAD_REQUEST,
+                     'Streaming responses are not supported in batches.')
+
+    if hasattr(response, 'data'):
+        body = response.data
+    elif response.content:
+        body = response.content.decode(response.charset)
+    else:
+        body = None
+
+    return {'status': response.status_code, 'body': body}
+
+
+def run_in_thread(request, operation):
+    # Соединения с БД у каждого потока свои, закрываем их сразу.
+    try:
+        return run_operation(request, operation)
+    finally:
+        connections.close_all()
+
+
+def run_batch(request, operations, parallel=False):
+    """Выполняет операции по порядку.
+
+    С `parallel` подряд идущие операции чтения выполняются в пуле
+    потоков; операции записи остаются границами между такими группами,
+    так что чтение после записи видит её результат. Каждая операция в
+    потоке получает копию contextvars вызывающего (например, выбранную
+    для чтения БД, api/db_routers.py).
+    """
+    results = []
+    reads = []
+
+    def flush(pool):
+        if reads:
+            futures = [
+                pool.submit(copy_context().run, run_in_thread, request,
+                            operation)
+                for operation in reads
+            ]
+            results.extend(future.result() for future in futures)
+            reads.clear()
+
+    if not parallel:
+        return [run_operation(request, operation)
+                for operation in operations]
+
+    with ThreadPoolExecutor(settings.BATCH_MAX_WORKERS) as pool:
+        for operation in operations:
+            if operation['method'] in SAFE_METHODS:
+                reads.append(operation)
+                continue
+            flush(pool)
+            results.append(run_operation(request, operation))
+        flush(pool)
+
+    return results
@@ -0,0 +1,164 @@
+"""Versioned response cache for the read-only catalogue endpoints."""
+import time
+from hashlib import md5
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+VERSION_KEY = 'api-version:{}'
+MODIFIED_KEY = 'api-modified:{}'
+RESPONSE_KEY = 'api-response:{path}:{format}:{query}:{versions}'
+STATS_KEY = 'api-cache-stats:{}'
+STATS_EVENTS = ('hit', 'miss')
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def new_version():
+    """Начальное значение счётчика.
+
+    Счётчик может быть вытеснен из кэша; значение от времени не даёт
+    ему вернуться к номеру, под которым ещё лежат старые ответы.
+    """
+    return int(time.time() * 1000)
+
+
+def get_versions(resources):
+    cache = get_cache()
+    keys = [VERSION_KEY.format(resource) for resource in resources]
+    versions = cache.get_many(keys)
+
+    for key in keys:
+        if key not in versions:
+            cache.add(key, new_version(), timeout=None)
+            versions[key] = cache.get(key)
+
+    return [versions[key] for key in keys]
+
+
+def bump_version(resource, using=None):
+    """Повышает версию ресурса после коммита текущей транзакции.
+
+    Версия, повышенная до коммита, позволила бы параллельному запросу
+    закэшировать ещё старые строки под новым ключом до следующей записи.
+    Вне транзакции версия повышается сразу.
+    """
+    transaction.on_commit(lambda: increment_version(resource), using=using)
+
+
+def increment_version(resource):
+    cache = get_cache()
+    key = VERSION_KEY.format(resource)
+
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, new_version(), timeout=None)
+    cache.set(MODIFIED_KEY.format(resource), time.time(), timeout=None)
+
+
+def get_modified(resources):
+    """Время последней записи (в том числе удаления) в ресурсы.
+
+    Если отметка вытеснена из кэша, отсчёт начинается заново с текущего
+    момента: клиент получит полный ответ, но не устаревший.
+    """
+    cache = get_cache()
+    keys = [MODIFIED_KEY.format(resource) for resource in resources]
+    stamps = cache.get_many(keys)
+
+    for key in keys:
+        if key not in stamps:
+            cache.add(key, time.time(), timeout=None)
+            stamps[key] = cache.get(key)
+
+    return max(stamps.values(), default=None)
+
+
+def count(event):
+    cache = get_cache()
+    key = STATS_KEY.format(event)
+
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def get_stats():
+    cache = get_cache()
+    keys = {event: STATS_KEY.format(event) for event in STATS_EVENTS}
+    values = cache.get_many(keys.values())
+
+    return {event: values.get(key, 0) for event, key in keys.items()}
+
+
+def normalized_query(request):
+    return urlencode(sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        for value in values
+    ))
+
+
+def response_key(request, resources, version=None):
+    versions = get_versions(resources)
+
+    if version is not None:
+        versions.append(version)
+
+    return RESPONSE_KEY.format(
+        path=request.path,
+        format=request.accepted_renderer.format,
+        query=md5(normalized_query(request).encode()).hexdigest(),
+        versions='.'.join(map(str, versions)),
+    )
+
+
+class CachedListMixin:
+    """Кэширует ответ `list` до изменения данных из `cache_resources`.
+
+    Версии ресурсов повышаются сигналами моделей (api/signals.py), поэтому
+    после записи ключ ответа меняется, а старые записи уходят по TTL или
+    вытесняются бэкендом кэша.
+    """
+
+    cache_resources = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.cached(request, super().list, *args, **kwargs)
+
+    def cached(self, request, handler, *args, resources=None, version=None,
+               **kwargs):
+        """Ответ `handler` из кэша или с сохранением в кэш.
+
+        `version` -- дополнительная часть ключа для данных, которые
+        меняются без сигналов в этом процессе (например, из другого
+        контейнера).
+        """
+        cache = get_cache()
+        key = response_key(request, resources or self.cache_resources,
+                           version)
+        data = cache.get(key)
+
+        if data is not None:
+            count('hit')
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+
+            return response
+
+        count('miss')
+        response = handler(request, *args, **kwargs)
+
+        if response.status_code == 200:
+            cache.set(key, response.data)
+        response['X-Cache'] = 'MISS'
+
+        return response
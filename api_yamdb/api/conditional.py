@@ -0,0 +1,103 @@
+"""Conditional GET for titles, reviews and comments."""
+from hashlib import md5
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .cache import get_modified, get_versions, normalized_query
+
+
+class ConditionalGetMixin:
+    """Отвечает 304 по If-None-Match / If-Modified-Since до сериализации.
+
+    Списки, кэшируемые по версиям `cache_resources` (CachedListMixin),
+    получают валидаторы из тех же версий и отметок времени записи, без
+    запросов к БД: иначе попадание в кэш всё равно стоило бы агрегата по
+    всей выборке. Остальные выборки считают валидаторы одним агрегатным
+    запросом по индексу: максимальный `updated_at` и число строк.
+    Удаления не меняют `updated_at`, поэтому для списков Last-Modified
+    учитывает время последней записи в `resource`, а версии
+    `related_resources` (данные вложенных объектов) входят и в ETag, и в
+    Last-Modified.
+    """
+
+    resource = None
+    related_resources = ()
+
+    def list(self, request, *args, **kwargs):
+        cache_resources = getattr(self, 'cache_resources', ())
+
+        if cache_resources:
+            validators = self.get_version_validators(request, cache_resources)
+        else:
+            queryset = self.filter_queryset(self.get_queryset())
+            validators = self.get_queryset_validators(
+                request, queryset, self.related_resources + (self.resource,))
+
+        return self.conditional(validators, super().list,
+                                request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        validators = self.get_queryset_validators(
+            request, queryset, self.related_resources)
+
+        if validators is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        return self.conditional(validators, super().retrieve,
+                                request, *args, **kwargs)
+
+    def conditional(self, validators, handler, request, *args, **kwargs):
+        etag, last_modified = validators
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+
+        if response is not None:
+            return response
+
+        response = handler(request, *args, **kwargs)
+
+        if response.status_code == 200:
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+
+        return response
+
+    @staticmethod
+    def get_etag(request, *values):
+        return quote_etag(md5('|'.join(map(str, (
+            request.path,
+            normalized_query(request),
+            request.accepted_renderer.format,
+            *values,
+        ))).encode()).hexdigest())
+
+    def get_version_validators(self, request, resources):
+        """Валидаторы по версиям ресурсов: меняются с каждой записью."""
+        return (self.get_etag(request, *get_versions(resources)),
+                int(get_modified(resources)))
+
+    def get_queryset_validators(self, request, queryset, resources):
+        """Валидаторы по агрегату выборки; None для пустой выборки
+        `retrieve` (ответом будет 404)."""
+        stats = queryset.order_by().aggregate(
+            modified=Max('updated_at'), count=Count('pk')
+        )
+
+        if not stats['count'] and self.action == 'retrieve':
+            return None
+
+        stamps = [stats['modified'].timestamp()] if stats['modified'] else []
+
+        if resources:
+            stamps.append(get_modified(resources))
+        etag = self.get_etag(request, stats['count'], stats['modified'],
+                             *get_versions(self.related_resources))
+
+        return etag, int(max(stamps, default=0))
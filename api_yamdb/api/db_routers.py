@@ -0,0 +1,82 @@
+"""Read replica routing."""
+import logging
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger('api.db_routers')
+
+# Алиас реплики, с которой читает текущий запрос; None -- основная БД.
+read_alias = ContextVar('read_alias', default=None)
+
+# alias -> (доступна ли реплика, время последней проверки); у каждого
+# процесса своя копия.
+_health = {}
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES
+            if alias != DEFAULT_DB_ALIAS]
+
+
+def mark_unavailable(alias):
+    logger.warning('Replica %s is unavailable', alias)
+    _health[alias] = (False, time.monotonic())
+
+
+def is_available(alias):
+    """Проверяет реплику не чаще REPLICA_HEALTH_CHECK_INTERVAL секунд."""
+    available, checked = _health.get(alias, (None, 0))
+
+    if (available is not None and time.monotonic() - checked
+            < settings.REPLICA_HEALTH_CHECK_INTERVAL):
+        return available
+
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except DatabaseError:
+        connections[alias].close()
+        mark_unavailable(alias)
+
+        return False
+
+    _health[alias] = (True, time.monotonic())
+
+    return True
+
+
+def choose_replica():
+    """Случайная доступная реплика или None, если доступных нет."""
+    aliases = replica_aliases()
+    random.shuffle(aliases)
+
+    for alias in aliases:
+        if is_available(alias):
+            return alias
+
+    return None
+
+
+class ReplicaRouter:
+    """Чтение с реплики, выбранной ReplicaMiddleware, запись -- в основную БД.
+
+    Вне запросов (команды, фоновые задачи) и в запросах на запись
+    read_alias пуст, и всё идёт в основную БД.
+    """
+
+    def db_for_read(self, model, **hints):
+        return read_alias.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # На репликах те же данные, что и в основной БД.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,95 @@
+"""Streaming NDJSON export of the catalogue."""
+import json
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.text import compress_sequence
+from rest_framework.fields import DateTimeField
+from reviews.helpers import chunks
+from reviews.models import GenreTitle, Review, Title
+
+TITLE_FIELDS = ('id', 'name', 'year', 'rating', 'description',
+                'category__name', 'category__slug')
+REVIEW_FIELDS = ('title_id', 'id', 'text', 'author__username', 'score',
+                 'pub_date')
+
+# Даты в том же формате, что и в ответах API.
+date_field = DateTimeField()
+
+
+def review_data(review):
+    return {
+        'id': review['id'],
+        'text': review['text'],
+        'author': review['author__username'],
+        'score': review['score'],
+        'pub_date': date_field.to_representation(review['pub_date']),
+    }
+
+
+def catalogue(after=0, chunk_size=None):
+    """Произведения с id больше `after` в порядке id.
+
+    Все запросы читаются через `.iterator()` (на PostgreSQL -- курсор на
+    сервере). Произведения выбираются порциями по `chunk_size`, жанры
+    порции -- одним запросом, а отзывы идут одним курсором в том же
+    порядке и разбираются по произведениям на лету. В памяти не больше
+    порции произведений и отзывов одного произведения, сколько бы их ни
+    было. Формат произведения -- как у TitleSerializer, плюс список
+    отзывов.
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    titles = Title.objects.filter(id__gt=after).order_by('id').values(
+        *TITLE_FIELDS).iterator(chunk_size=chunk_size)
+
+    for chunk in chunks(titles, chunk_size):
+        # Порция -- все произведения подряд по id, поэтому её жанры и
+        # отзывы выбираются диапазоном по индексу, а не длинным IN.
+        between = {'title_id__gte': chunk[0]['id'],
+                   'title_id__lte': chunk[-1]['id']}
+        genres = defaultdict(list)
+        genre_rows = GenreTitle.objects.filter(**between).order_by(
+            'title_id', 'genre_id').values_list(
+                'title_id', 'genre__name', 'genre__slug')
+        review_rows = Review.objects.filter(**between).order_by(
+            'title_id', 'id').values(*REVIEW_FIELDS).iterator(
+                chunk_size=chunk_size)
+        review = next(review_rows, None)
+
+        for title_id, name, slug in genre_rows.iterator(
+                chunk_size=chunk_size):
+            genres[title_id].append({'name': name, 'slug': slug})
+
+        for title in chunk:
+            reviews = []
+
+            while review is not None and review['title_id'] <= title['id']:
+                if review['title_id'] == title['id']:
+                    reviews.append(review_data(review))
+                review = next(review_rows, None)
+
+            yield {
+                'id': title['id'],
+                'name': title['name'],
+                'year': title['year'],
+                'rating': (None if title['rating'] is None
+                           else int(title['rating'])),
+                'description': title['description'],
+                'genre': genres[title['id']],
+                'category': None if title['category__slug'] is None else {
+                    'name': title['category__name'],
+                    'slug': title['category__slug'],
+                },
+                'reviews': reviews,
+            }
+
+
+def ndjson(titles, compress=False):
+    """Байты NDJSON, по строке на произведение; с `compress` -- gzip."""
+    content = (
+        (json.dumps(title, ensure_ascii=False, separators=(',', ':'))
+         + '\n').encode()
+        for title in titles
+    )
+
+    return compress_sequence(content) if compress else content
@@ -0,0 +1,120 @@
+"""Sparse fieldsets: `?fields=` and `?omit=`."""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.relations import ManyRelatedField, RelatedField
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+SPARSE_ACTIONS = ('list', 'retrieve')
+
+
+def query_names(request, param):
+    return {name for name in request.query_params.get(param, '').split(',')
+            if name}
+
+
+def selected_fields(request, names):
+    """Поля из `names`, оставленные параметрами запроса.
+
+    `?fields=id,name` оставляет только перечисленные поля,
+    `?omit=description` убирает перечисленные; неизвестные имена
+    пропускаются.
+    """
+    fields = query_names(request, 'fields')
+    omit = query_names(request, 'omit')
+
+    return [name for name in names
+            if (not fields or name in fields) and name not in omit]
+
+
+def model_columns(model, name, field, serializer):
+    """Столбцы модели для поля или None, если их не узнать."""
+    columns = getattr(serializer.Meta, 'field_columns', {})
+
+    if name in columns:
+        return tuple(columns[name])
+
+    try:
+        model._meta.get_field(field.source)
+    except FieldDoesNotExist:
+        return None
+
+    return (field.source,)
+
+
+def load_only(queryset, serializer, extra=()):
+    """queryset, из которого загружается только нужное полям `serializer`.
+
+    Вложенные объекты и связи по внешнему ключу выбираются JOIN, только
+    если их поля остались в ответе, списки (многие-ко-многим) --
+    отдельным запросом в порядке id, а столбцы ограничиваются через
+    `.only()`. Если для какого-то поля столбцы не известны, загружаются
+    все.
+    """
+    model = queryset.model
+    # Выборка из связанного менеджера (title.reviews) проставляет
+    # объектам родителя по внешнему ключу: без столбца это запрос на
+    # каждый объект.
+    columns = {model._meta.pk.name, *extra, *(
+        field.name for field in queryset._known_related_objects)}
+    all_columns = False
+    select = []
+    prefetch = []
+
+    for name, field in serializer.fields.items():
+        source = field.source
+
+        if isinstance(field, ListSerializer):
+            # Порядок вложенного списка задан явно, по id.
+            prefetch.append(Prefetch(
+                source,
+                queryset=field.child.Meta.model.objects.order_by('pk')))
+        elif isinstance(field, ManyRelatedField):
+            prefetch.append(source)
+        elif isinstance(field, BaseSerializer):
+            select.append(source)
+            columns.add(source)
+            columns.update(f'{source}__{child.source}'
+                           for child in field.fields.values())
+        elif isinstance(field, RelatedField):
+            select.append(source)
+            columns.update((
+                source,
+                f'{source}__{getattr(field, "slug_field", "pk")}'
+            ))
+        else:
+            field_columns = model_columns(model, name, field, serializer)
+            all_columns = all_columns or field_columns is None
+            columns.update(field_columns or ())
+
+    queryset = queryset.select_related(None).prefetch_related(None)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    if not all_columns:
+        queryset = queryset.only(*columns)
+
+    return queryset
+
+
+class SparseFieldsMixin:
+    """Чтения загружают из БД только поля, которые попадут в ответ.
+
+    Сериализатор убирает поля по `?fields=` и `?omit=`
+    (OptionalFieldsMixin), а queryset строится по оставшимся: без
+    лишних JOIN, предзагрузок и столбцов. Столбцы `keyset_ordering`
+    нужны курсорной пагинации и загружаются всегда.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+
+        if (self.request.method not in SAFE_METHODS
+                or self.action not in SPARSE_ACTIONS):
+            return queryset
+
+        ordering = [field.lstrip('-')
+                    for field in getattr(self, 'keyset_ordering', ())]
+
+        return load_only(queryset, self.get_serializer(), extra=ordering)
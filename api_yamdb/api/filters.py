@@ -1,5 +1,9 @@
 import django_filters
+from rest_framework.exceptions import ValidationError
 from reviews.models import Title
+from reviews.search import search_titles
+
+from .pagination import YamdbPagination
 
 
 class TitleFilter(django_filters.FilterSet):
@@ -12,7 +16,23 @@ class TitleFilter(django_filters.FilterSet):
         lookup_expr='icontains'
     )
     year = django_filters.NumberFilter()
+    search = django_filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Title
-        fields = ['category', 'genre', 'name', 'year']
+        fields = ['category', 'genre', 'name', 'year', 'search']
+
+    def filter_search(self, queryset, name, value):
+        """Полнотекстовый поиск по названию и описанию с ранжированием.
+
+        Курсор листает по `id` и потерял бы сортировку по релевантности,
+        поэтому вместе с поиском он не принимается.
+        """
+        if (self.request is not None
+                and YamdbPagination().use_keyset(self.request)):
+            raise ValidationError({name: (
+                'Поиск не работает с курсорной пагинацией, '
+                'используйте limit и offset.'
+            )})
+
+        return search_titles(queryset, value)
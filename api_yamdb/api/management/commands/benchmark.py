@@ -0,0 +1,356 @@
+"""Benchmark the API in-process."""
+import json
+import random
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.test import Client
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.models import User
+
+SAMPLE_SIZE = 1000
+# Выгрузка идёт по последним произведениям каталога, а не по всему.
+EXPORT_TITLES = 20
+PERCENTILES = (50, 95, 99)
+
+# (identity, weight, scenario name, method); weights are relative shares
+# of all requests and roughly follow production traffic: mostly anonymous
+# catalogue reads, some user writes, a little moderation and admin work.
+TRAFFIC = (
+    ('anonymous', 20, 'titles-list', 'get'),
+    ('anonymous', 10, 'titles-detail', 'get'),
+    ('anonymous', 5, 'titles-search', 'get'),
+    ('anonymous', 2, 'titles-facets', 'get'),
+    ('anonymous', 2, 'leaderboards', 'get'),
+    ('anonymous', 4, 'genres-list', 'get'),
+    ('anonymous', 4, 'categories-list', 'get'),
+    ('anonymous', 12, 'reviews-list', 'get'),
+    ('anonymous', 4, 'reviews-detail', 'get'),
+    ('anonymous', 6, 'comments-list', 'get'),
+    ('anonymous', 2, 'comments-detail', 'get'),
+    ('anonymous', 1, 'signup', 'post'),
+    ('anonymous', 1, 'token', 'post'),
+    ('user', 8, 'titles-list', 'get'),
+    ('user', 4, 'reviews-list', 'get'),
+    ('user', 3, 'reviews-create', 'post'),
+    ('user', 3, 'comments-create', 'post'),
+    ('user', 2, 'users-me', 'get'),
+    ('user', 1, 'users-me-update', 'patch'),
+    ('user', 1, 'batch', 'post'),
+    ('moderator', 2, 'reviews-update', 'patch'),
+    ('moderator', 1, 'comments-delete', 'delete'),
+    ('moderator', 1, 'reviews-delete', 'delete'),
+    ('admin', 1, 'titles-create', 'post'),
+    ('admin', 1, 'titles-update', 'patch'),
+    ('admin', 1, 'titles-delete', 'delete'),
+    ('admin', 1, 'genres-create', 'post'),
+    ('admin', 1, 'genres-delete', 'delete'),
+    ('admin', 1, 'categories-create', 'post'),
+    ('admin', 1, 'categories-delete', 'delete'),
+    ('admin', 1, 'users-list', 'get'),
+    ('admin', 1, 'users-detail', 'get'),
+    ('admin', 1, 'users-create', 'post'),
+    ('admin', 1, 'export', 'get'),
+)
+
+
+def percentile(values, rank):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(rank / 100 * (len(ordered) - 1)))
+
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    """Run a seeded traffic mix against every API endpoint."""
+
+    help = (
+        'Send a seeded mix of anonymous, user, moderator and admin requests '
+        'to every endpoint of api/urls.py in-process. Reports p50/p95/p99 '
+        'latency, throughput and queries per request, saves JSON results '
+        'and flags regressions against a previous run. Writes are rolled '
+        'back. Run generatedata first.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--warmup', type=int, default=100)
+        parser.add_argument('--output', help='Save results to a JSON file.')
+        parser.add_argument(
+            '--compare', help='JSON results of a previous run to compare.')
+        parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help='Allowed relative p95 slowdown before flagging, 0.2 = 20%%.')
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.load_samples()
+        self.clients = self.make_clients()
+        self.queries = 0
+        self.addresses = 0
+        weights = [weight for _, weight, _, _ in TRAFFIC]
+
+        with connection.execute_wrapper(self.count_query):
+            for _ in range(options['warmup']):
+                self.run(*self.random.choices(TRAFFIC, weights)[0])
+
+            self.samples = defaultdict(list)
+            started = time.perf_counter()
+            for _ in range(options['requests']):
+                self.run(*self.random.choices(TRAFFIC, weights)[0],
+                         record=True)
+            elapsed = time.perf_counter() - started
+
+        results = self.summarize(elapsed, options)
+        self.print_results(results)
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(results, file, ensure_ascii=False, indent=2)
+            self.stdout.write(f'Results saved to {options["output"]}')
+
+        if options['compare']:
+            self.compare(results, options['compare'], options['threshold'])
+
+    def count_query(self, execute, sql, params, many, context):
+        self.queries += 1
+
+        return execute(sql, params, many, context)
+
+    def load_samples(self):
+        def sample(queryset, *fields):
+            rows = list(queryset.order_by('pk').values_list(
+                *fields, flat=len(fields) == 1))
+
+            return self.random.sample(rows, min(len(rows), SAMPLE_SIZE))
+
+        self.titles = sample(Title.objects.all(), 'pk')
+        self.reviews = sample(Review.objects.all(), 'title_id', 'pk')
+        self.comments = sample(
+            Comment.objects.exclude(review=None),
+            'review__title_id', 'review_id', 'pk')
+        self.genres = sample(Genre.objects.all(), 'slug')
+        self.categories = sample(Category.objects.all(), 'slug')
+        self.usernames = sample(User.objects.all(), 'username')
+        self.export_after = max(0, (Title.objects.aggregate(
+            last=Max('pk'))['last'] or 0) - EXPORT_TITLES)
+
+        if not (self.titles and self.reviews and self.comments
+                and self.genres and self.categories):
+            raise CommandError('Not enough data: run generatedata first.')
+
+    def make_clients(self):
+        clients = {'anonymous': Client(HTTP_HOST='localhost')}
+
+        for identity, role in (('user', User.USER), ('moderator', User.MODER),
+                               ('admin', User.ADMIN)):
+            users = list(
+                User.objects.filter(role=role).order_by('pk')[:SAMPLE_SIZE])
+
+            if not users:
+                raise CommandError(f'No users with role {role}.')
+            clients[identity] = [
+                Client(HTTP_HOST='localhost',
+                       HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(u)}')
+                for u in users
+            ]
+
+        return clients
+
+    def address(self):
+        self.addresses += 1
+
+        return '.'.join(map(str, (
+            10, self.addresses >> 16 & 255, self.addresses >> 8 & 255,
+            self.addresses & 255,
+        )))
+
+    def client(self, identity):
+        client = self.clients[identity]
+
+        if isinstance(client, list):
+            return self.random.choice(client)
+
+        return client
+
+    def request(self, name):
+        """URL и тело запроса для сценария."""
+        choice = self.random.choice
+        unique = f'{self.random.getrandbits(48):x}'
+        title_id = choice(self.titles)
+        review_title_id, review_id = choice(self.reviews)
+        comment_title_id, comment_review_id, comment_id = choice(
+            self.comments)
+        reviews = f'/api/v1/titles/{review_title_id}/reviews/'
+        comments = (f'/api/v1/titles/{comment_title_id}/reviews/'
+                    f'{comment_review_id}/comments/')
+
+        return {
+            'titles-list': ('/api/v1/titles/', {
+                'genre': choice(self.genres), 'limit': 20}),
+            'titles-detail': (f'/api/v1/titles/{title_id}/', None),
+            'titles-search': ('/api/v1/titles/', {'search': 'произведение'}),
+            'titles-facets': ('/api/v1/titles/facets/', {
+                'genre': choice(self.genres)}),
+            'leaderboards': (
+                f'/api/v1/leaderboards/{choice(("top", "trending"))}/', None),
+            'genres-list': ('/api/v1/genres/', None),
+            'categories-list': ('/api/v1/categories/', None),
+            'reviews-list': (reviews, None),
+            'reviews-detail': (f'{reviews}{review_id}/', None),
+            'comments-list': (comments, None),
+            'comments-detail': (f'{comments}{comment_id}/', None),
+            'signup': ('/api/v1/auth/signup/', {
+                'username': f'bench{unique}',
+                'email': f'bench{unique}@yamdb.fake'}),
+            'token': ('/api/v1/auth/token/', {
+                'username': choice(self.usernames),
+                'confirmation_code': 'wrong'}),
+            'reviews-create': (f'/api/v1/titles/{title_id}/reviews/', {
+                'text': 'Benchmark', 'score': self.random.randint(1, 10)}),
+            'comments-create': (f'{reviews}{review_id}/comments/', {
+                'text': 'Benchmark'}),
+            'users-me': ('/api/v1/users/me/', None),
+            'users-me-update': ('/api/v1/users/me/', {'bio': unique}),
+            'batch': ('/api/v1/batch/', {'operations': [
+                {'method': 'GET', 'path': f'/api/v1/titles/{title_id}/'},
+                {'method': 'GET', 'path': reviews},
+                {'method': 'GET', 'path': comments},
+            ]}),
+            'reviews-update': (f'{reviews}{review_id}/', {
+                'score': self.random.randint(1, 10)}),
+            'reviews-delete': (f'{reviews}{review_id}/', None),
+            'comments-delete': (f'{comments}{comment_id}/', None),
+            'titles-create': ('/api/v1/titles/', {
+                'name': f'Benchmark {unique}', 'year': 2000,
+                'genre': [choice(self.genres)],
+                'category': choice(self.categories)}),
+            'titles-update': (f'/api/v1/titles/{title_id}/', {
+                'name': f'Benchmark {unique}'}),
+            'titles-delete': (f'/api/v1/titles/{title_id}/', None),
+            'genres-create': ('/api/v1/genres/', {
+                'name': f'Benchmark {unique}', 'slug': f'bench-{unique}'}),
+            'genres-delete': (f'/api/v1/genres/{choice(self.genres)}/', None),
+            'categories-create': ('/api/v1/categories/', {
+                'name': f'Benchmark {unique}', 'slug': f'bench-{unique}'}),
+            'categories-delete': (
+                f'/api/v1/categories/{choice(self.categories)}/', None),
+            'users-list': ('/api/v1/users/', None),
+            'users-detail': (
+                f'/api/v1/users/{choice(self.usernames)}/', None),
+            'users-create': ('/api/v1/users/', {
+                'username': f'bench{unique}',
+                'email': f'bench{unique}@yamdb.fake'}),
+            'export': ('/api/v1/export/', {'after': self.export_after}),
+        }[name]
+
+    def run(self, identity, weight, name, method, record=False):
+        client = self.client(identity)
+        url, data = self.request(name)
+        kwargs = {} if method == 'get' else {'content_type':
+                                             'application/json'}
+        if method != 'get':
+            data = json.dumps(data) if data is not None else ''
+        if identity == 'anonymous':
+            # Анонимы приходят с разных адресов, иначе их запросы
+            # упираются в ограничения частоты для одного IP.
+            kwargs['REMOTE_ADDR'] = self.address()
+
+        # Каждый запрос -- в своей точке сохранения, которая
+        # откатывается: данные не меняются между прогонами.
+        with transaction.atomic():
+            queries = self.queries
+            started = time.perf_counter()
+            response = getattr(client, method)(url, data, **kwargs)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            latency = time.perf_counter() - started
+            queries = self.queries - queries
+            transaction.set_rollback(True)
+
+        if record:
+            self.samples[f'{identity}:{name}'].append(
+                (latency, queries, response.status_code))
+
+    def summarize(self, elapsed, options):
+        endpoints = {}
+        total = 0
+
+        for name, samples in sorted(self.samples.items()):
+            latencies = [latency for latency, _, _ in samples]
+            statuses = defaultdict(int)
+
+            for _, _, status in samples:
+                statuses[str(status)] += 1
+            total += len(samples)
+            endpoints[name] = {
+                'requests': len(samples),
+                **{f'p{rank}_ms': round(
+                    percentile(latencies, rank) * 1000, 3)
+                   for rank in PERCENTILES},
+                'mean_ms': round(sum(latencies) / len(samples) * 1000, 3),
+                'throughput_rps': round(len(samples) / sum(latencies), 1),
+                'queries_per_request': round(
+                    sum(queries for _, queries, _ in samples)
+                    / len(samples), 2),
+                'status_codes': dict(statuses),
+            }
+
+        return {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'database': connection.vendor,
+            'seed': options['seed'],
+            'requests': total,
+            'elapsed_s': round(elapsed, 3),
+            'throughput_rps': round(total / elapsed, 1),
+            'endpoints': endpoints,
+        }
+
+    def print_results(self, results):
+        self.stdout.write(
+            f'{"endpoint":36} {"n":>5} {"p50":>8} {"p95":>8} {"p99":>8} '
+            f'{"rps":>8} {"q/req":>6}'
+        )
+        for name, stats in results['endpoints'].items():
+            self.stdout.write(
+                f'{name:36} {stats["requests"]:>5} {stats["p50_ms"]:>8} '
+                f'{stats["p95_ms"]:>8} {stats["p99_ms"]:>8} '
+                f'{stats["throughput_rps"]:>8} '
+                f'{stats["queries_per_request"]:>6}'
+            )
+        self.stdout.write(
+            f'Total: {results["requests"]} requests in '
+            f'{results["elapsed_s"]} s, {results["throughput_rps"]} rps'
+        )
+
+    def compare(self, results, path, threshold):
+        with open(path, encoding='utf-8') as file:
+            baseline = json.load(file)
+
+        regressions = []
+        for name, stats in results['endpoints'].items():
+            before = baseline['endpoints'].get(name)
+
+            if before is None:
+                continue
+            if stats['p95_ms'] > before['p95_ms'] * (1 + threshold):
+                regressions.append(
+                    f'{name}: p95 {before["p95_ms"]} -> {stats["p95_ms"]} ms')
+            if stats['queries_per_request'] > before['queries_per_request']:
+                regressions.append(
+                    f'{name}: queries/request '
+                    f'{before["queries_per_request"]} -> '
+                    f'{stats["queries_per_request"]}')
+
+        if regressions:
+            for line in regressions:
+                self.stdout.write(self.style.ERROR(line))
+            raise CommandError(f'{len(regressions)} regressions found.')
+
+        self.stdout.write(self.style.SUCCESS(f'No regressions against {path}'))
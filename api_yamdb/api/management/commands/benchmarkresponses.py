@@ -0,0 +1,119 @@
+"""Measure JSON rendering and compression of API responses."""
+import json
+import time
+
+from api.middleware import ENCODINGS
+from api.renderers import FastJSONRenderer, orjson
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import Comment
+from users.models import User
+
+from .benchmark import percentile
+
+
+def cpu_time(function, repeat):
+    """Медиана процессорного времени вызова, мс."""
+    samples = []
+
+    for _ in range(repeat):
+        started = time.process_time()
+        function()
+        samples.append(time.process_time() - started)
+
+    return percentile(samples, 50) * 1000
+
+
+class Command(BaseCommand):
+    """Bytes and CPU time of rendering and compression per endpoint."""
+
+    help = (
+        'Fetch a response of every catalogue list endpoint in-process and '
+        'report, per endpoint, the response size without compression and '
+        'with every available encoding (gzip, brotli), the CPU time of '
+        'rendering with the stdlib JSONRenderer and with FastJSONRenderer '
+        '(orjson), and the CPU time of compression. Run generatedata first.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--limit', type=int, default=100,
+                            help='Page size of list endpoints.')
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stderr.write('orjson is not installed: FastJSONRenderer '
+                              'falls back to the stdlib json.')
+        repeat = options['repeat']
+        client = self.make_client()
+        stdlib = JSONRenderer()
+        fast = FastJSONRenderer()
+        encodings = list(ENCODINGS)
+
+        self.stdout.write(
+            f'{"endpoint":45} {"bytes":>8} '
+            + ''.join(f'{encoding:>8}' for encoding in encodings)
+            + f' {"json ms":>8} {"orjson ms":>9} {"saved ms":>8} '
+            + ''.join(f'{encoding + " ms":>9}' for encoding in encodings)
+        )
+        for path in self.paths(options['limit']):
+            response = client.get(path)
+
+            if response.status_code != 200:
+                raise CommandError(f'{path}: status {response.status_code}')
+            data = getattr(response, 'data', None)
+            if data is None:
+                data = json.loads(response.content)
+            content = fast.render(data)
+            json_ms = cpu_time(lambda: stdlib.render(data), repeat)
+            orjson_ms = cpu_time(lambda: fast.render(data), repeat)
+            sizes = [len(ENCODINGS[encoding](content))
+                     for encoding in encodings]
+            compress_ms = [
+                cpu_time(lambda: ENCODINGS[encoding](content), repeat)
+                for encoding in encodings
+            ]
+
+            self.stdout.write(
+                f'{path[:45]:45} {len(content):>8} '
+                + ''.join(f'{size:>8}' for size in sizes)
+                + f' {json_ms:>8.2f} {orjson_ms:>9.2f} '
+                f'{json_ms - orjson_ms:>8.2f} '
+                + ''.join(f'{value:>9.2f}' for value in compress_ms)
+            )
+
+    @staticmethod
+    def make_client():
+        admin = User.objects.filter(role=User.ADMIN).first()
+
+        if admin is None:
+            raise CommandError('Not enough data: run generatedata first.')
+
+        token = AccessToken.for_user(admin)
+
+        return Client(HTTP_HOST='localhost',
+                      HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    @staticmethod
+    def paths(limit):
+        comment = Comment.objects.exclude(review=None).values(
+            'review__title_id', 'review_id').order_by('pk').first()
+
+        if comment is None:
+            raise CommandError('Not enough data: run generatedata first.')
+        title = comment['review__title_id']
+        reviews = f'/api/v1/titles/{title}/reviews/'
+
+        return (
+            f'/api/v1/titles/?limit={limit}',
+            f'/api/v1/titles/?limit={limit}&include=histogram',
+            f'/api/v1/titles/{title}/',
+            '/api/v1/titles/facets/',
+            f'{reviews}?limit={limit}',
+            f'{reviews}{comment["review_id"]}/comments/?limit={limit}',
+            f'/api/v1/users/?limit={limit}',
+            f'/api/v1/leaderboards/top/?limit={limit}',
+            f'/api/v1/genres/?limit={limit}',
+        )
@@ -0,0 +1,108 @@
+"""Compare ModelSerializer and .values() rendering of list pages."""
+import json
+import time
+
+from api.fastread import (AuthorValuesSerializer, TitleValuesSerializer,
+                          prefetch_genres)
+from api.serializers import (CommentSerializer, ReviewSerializer,
+                             TitleSerializer)
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from reviews.models import Comment, Review, Title
+
+from .benchmark import percentile
+
+# Список -> (queryset страницы, сериализатор DRF, быстрый сериализатор).
+LISTS = {
+    'titles': (
+        lambda: Title.objects.select_related('category').prefetch_related(
+            prefetch_genres()),
+        TitleSerializer, TitleValuesSerializer,
+    ),
+    'reviews': (lambda: Review.objects.select_related('author'),
+                ReviewSerializer, AuthorValuesSerializer),
+    'comments': (lambda: Comment.objects.select_related('author'),
+                 CommentSerializer, AuthorValuesSerializer),
+}
+
+
+class Command(BaseCommand):
+    """Per-row cost of both rendering paths of list endpoints."""
+
+    help = (
+        'Render pages of titles, reviews and comments with the DRF '
+        'serializers and with the .values() serializers of api/fastread.py '
+        '(FAST_READ_SERIALIZERS) and print the median cost per row: with '
+        'the page queries and rendering only. Checks that both paths give '
+        'the same JSON. Run generatedata first.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lists', nargs='+', choices=LISTS,
+                            default=list(LISTS))
+        parser.add_argument('--rows', type=int, default=100,
+                            help='Rows per page.')
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        self.rows = options['rows']
+        self.repeat = options['repeat']
+        context = {'request': Request(APIRequestFactory().get('/'))}
+
+        self.stdout.write(
+            f'{"list":9} {"rows":>5} {"path":>5} {"total us/row":>13} '
+            f'{"render us/row":>14}'
+        )
+        for name in options['lists']:
+            get_queryset, serializer_class, fast_class = LISTS[name]
+            queryset = get_queryset().order_by('pk')[:self.rows]
+            serializer = serializer_class(context=context)
+            columns = fast_class(serializer).get_columns()
+
+            def drf(page):
+                return serializer_class(page, many=True, context=context).data
+
+            def fast(page):
+                return fast_class(serializer).to_representation(page)
+
+            def model_page():
+                return list(queryset.all())
+
+            def values_page():
+                return list(get_queryset().order_by('pk').prefetch_related(
+                    None).values(*columns)[:self.rows])
+
+            if not queryset:
+                raise CommandError('Not enough data: run generatedata first.')
+            if self.dump(drf(model_page())) != self.dump(fast(values_page())):
+                raise CommandError(f'{name}: the paths render differently.')
+
+            for path, render, fetch in (('drf', drf, model_page),
+                                        ('fast', fast, values_page)):
+                total, rendering = self.measure(render, fetch)
+                self.stdout.write(
+                    f'{name:9} {self.rows:>5} {path:>5} {total:>13.1f} '
+                    f'{rendering:>14.1f}'
+                )
+
+    def measure(self, render, fetch):
+        """Медианы на строку, мкс: запросы и отрисовка, только отрисовка."""
+        totals = []
+        renders = []
+
+        for _ in range(self.repeat):
+            started = time.perf_counter()
+            page = fetch()
+            loaded = time.perf_counter()
+            render(page)
+            finished = time.perf_counter()
+            totals.append(finished - started)
+            renders.append(finished - loaded)
+
+        return (percentile(totals, 50) / self.rows * 10 ** 6,
+                percentile(renders, 50) / self.rows * 10 ** 6)
+
+    @staticmethod
+    def dump(data):
+        return json.dumps(data, ensure_ascii=False)
@@ -0,0 +1,260 @@
+"""Compare WSGI and ASGI deployments under concurrent load."""
+import os
+import random
+import shutil
+import socket
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from reviews.models import Comment
+
+from .benchmark import percentile
+
+SAMPLE_SIZE = 1000
+STARTUP_TIMEOUT = 30
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+# Режим -> (приложение, класс рабочих процессов gunicorn).
+MODES = {
+    'wsgi': ('api_yamdb.wsgi:application', 'sync'),
+    'asgi': ('api_yamdb.asgi:application', 'uvicorn.workers.UvicornWorker'),
+}
+
+
+def rss(pid):
+    """Resident memory of a process in bytes."""
+    with open(f'/proc/{pid}/statm') as file:
+        return int(file.read().split()[1]) * PAGE_SIZE
+
+
+def children(pid):
+    pids = []
+
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as file:
+                ppid = int(file.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            pids.append(int(entry))
+
+    return pids
+
+
+class Server:
+    """gunicorn в отдельном процессе."""
+
+    def __init__(self, application, worker_class, workers, port):
+        gunicorn = shutil.which('gunicorn')
+
+        if gunicorn is None:
+            raise CommandError('gunicorn is not installed.')
+        self.port = port
+        self.process = subprocess.Popen(
+            [gunicorn, application, '--worker-class', worker_class,
+             '--workers', str(workers), '--bind', f'127.0.0.1:{port}',
+             '--backlog', '2048', '--log-level', 'warning'],
+            cwd=settings.BASE_DIR,
+        )
+
+    def wait(self):
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise CommandError('Server exited on startup.')
+            try:
+                socket.create_connection(('127.0.0.1', self.port), 1).close()
+            except OSError:
+                time.sleep(0.2)
+                continue
+            return
+
+        raise CommandError('Server did not start in time.')
+
+    def memory(self):
+        """RSS мастера и рабочих процессов: (всего, на рабочий процесс)."""
+        workers = [rss(pid) for pid in children(self.process.pid)]
+
+        return (rss(self.process.pid) + sum(workers),
+                max(workers, default=0))
+
+    def stop(self):
+        self.process.terminate()
+        self.process.wait()
+
+
+class Command(BaseCommand):
+    """Measure latency and throughput of both modes at equal memory."""
+
+    help = (
+        'Start the API under gunicorn with sync workers (WSGI) and with '
+        'uvicorn workers (ASGI, api_yamdb/asgi.py), each with as many '
+        'workers as fit into --memory-mb, and send concurrent GET requests '
+        'to the title, review and comment endpoints. A share of clients '
+        'can be slow: they pause in the middle of sending the request. '
+        'Requires gunicorn and uvicorn; run generatedata first.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', nargs='+', choices=MODES,
+                            default=list(MODES))
+        parser.add_argument('--memory-mb', type=int, default=512,
+                            help='Memory budget of every mode.')
+        parser.add_argument('--concurrency', type=int, nargs='+',
+                            default=[16, 64, 256])
+        parser.add_argument('--duration', type=float, default=10,
+                            help='Seconds of load per concurrency level.')
+        parser.add_argument('--slow-clients', type=float, default=0.0,
+                            help='Share of slow clients, 0.1 = 10%%.')
+        parser.add_argument('--slow-client-ms', type=int, default=200)
+        parser.add_argument(
+            '--asgi-worker-class', default=MODES['asgi'][1],
+            help='uvicorn.workers.UvicornH11Worker without uvloop.')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.random = random.Random(options['seed'])
+        self.paths = self.load_paths()
+        budget = options['memory_mb'] * 2 ** 20
+
+        self.stdout.write(
+            f'{"mode":5} {"workers":>7} {"rss MB":>7} {"conc":>5} '
+            f'{"rps":>8} {"p50":>8} {"p95":>8} {"errors":>6}'
+        )
+        for mode in options['modes']:
+            workers = self.fit_workers(mode, budget)
+            server = self.start(mode, workers)
+
+            try:
+                memory, _ = server.memory()
+                for concurrency in options['concurrency']:
+                    self.report(mode, workers, memory, concurrency,
+                                self.load(concurrency))
+            finally:
+                server.stop()
+
+    def load_paths(self):
+        comments = list(Comment.objects.exclude(review=None).order_by(
+            'pk').values_list('review__title_id', 'review_id')[:SAMPLE_SIZE])
+
+        if not comments:
+            raise CommandError('Not enough data: run generatedata first.')
+
+        paths = []
+        for title_id, review_id in comments:
+            reviews = f'/api/v1/titles/{title_id}/reviews/'
+            paths += [
+                '/api/v1/titles/?limit=20',
+                f'/api/v1/titles/{title_id}/',
+                reviews,
+                f'{reviews}{review_id}/comments/',
+            ]
+
+        return paths
+
+    def start(self, mode, workers):
+        application, worker_class = MODES[mode]
+
+        if mode == 'asgi':
+            worker_class = self.options['asgi_worker_class']
+        server = Server(application, worker_class, workers,
+                        self.options['port'])
+
+        try:
+            server.wait()
+            # Прогрев: кэши, соединения с БД, ленивые импорты.
+            warmup = min(len(self.paths), 200)
+            for path in self.random.sample(self.paths, warmup):
+                self.request(path, slow=False)
+        except BaseException:
+            server.stop()
+            raise
+
+        return server
+
+    def fit_workers(self, mode, budget):
+        """Сколько рабочих процессов помещается в бюджет памяти."""
+        server = self.start(mode, 1)
+
+        try:
+            total, worker = server.memory()
+        finally:
+            server.stop()
+
+        return max(1, (budget - (total - worker)) // worker)
+
+    def request(self, path, slow):
+        """Запрос по сырому сокету; медленный клиент делает паузу."""
+        data = (f'GET {path} HTTP/1.1\r\nHost: localhost\r\n'
+                f'Connection: close\r\n\r\n').encode()
+        started = time.perf_counter()
+
+        with socket.create_connection(('127.0.0.1', self.options['port']),
+                                      STARTUP_TIMEOUT) as sock:
+            if slow:
+                sock.sendall(data[:len(data) // 2])
+                time.sleep(self.options['slow_client_ms'] / 1000)
+                data = data[len(data) // 2:]
+            sock.sendall(data)
+            response = b''
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                response += chunk
+
+        status = int(response.split(b' ', 2)[1]) if response else 0
+        return status, time.perf_counter() - started
+
+    def load(self, concurrency):
+        deadline = time.monotonic() + self.options['duration']
+        slow_share = self.options['slow_clients']
+
+        def client(number):
+            rand = random.Random(self.options['seed'] + number)
+            samples = []
+
+            while time.monotonic() < deadline:
+                slow = rand.random() < slow_share
+                try:
+                    status, latency = self.request(
+                        rand.choice(self.paths), slow)
+                except OSError:
+                    status, latency = 0, None
+                samples.append((status, latency, slow))
+
+            return samples
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            results = [sample for samples in pool.map(
+                client, range(concurrency)) for sample in samples]
+
+        return results, time.perf_counter() - started
+
+    def report(self, mode, workers, memory, concurrency, load):
+        results, elapsed = load
+        # Задержки считаются по быстрым клиентам: медленные платят за
+        # свою паузу сами, важно, сколько из-за них ждут остальные.
+        latencies = [latency for status, latency, slow in results
+                     if status == 200 and not slow]
+        errors = sum(status != 200 for status, _, _ in results)
+        p50 = p95 = '-'
+
+        if latencies:
+            p50 = f'{percentile(latencies, 50) * 1000:.1f}'
+            p95 = f'{percentile(latencies, 95) * 1000:.1f}'
+        self.stdout.write(
+            f'{mode:5} {workers:>7} {memory / 2 ** 20:>7.0f} '
+            f'{concurrency:>5} {len(results) / elapsed:>8.1f} {p50:>8} '
+            f'{p95:>8} {errors:>6}'
+        )
@@ -0,0 +1,18 @@
+"""Show response cache counters."""
+from api.cache import get_stats
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    """Print hit/miss counters of the catalogue response cache."""
+
+    help = 'Print hit and miss counters of the catalogue response cache.'
+
+    def handle(self, *args, **options):
+        stats = get_stats()
+        requests = sum(stats.values())
+        ratio = stats['hit'] / requests if requests else 0
+
+        for event, value in stats.items():
+            self.stdout.write(f'{event}: {value}')
+        self.stdout.write(f'hit ratio: {ratio:.2%}')
@@ -0,0 +1,60 @@
+"""Export the catalogue with reviews as NDJSON."""
+import sys
+
+from api.export import catalogue, ndjson
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    """Stream titles with genres, category, rating and reviews."""
+
+    help = (
+        'Write every title with its genres, category, rating and reviews '
+        'as one JSON line, in id order, to a file or stdout. Memory use '
+        'does not depend on the catalogue size. An interrupted export is '
+        'resumed with --after <id of the last exported title> and '
+        '--append.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='-',
+                            help='File to write, stdout by default.')
+        parser.add_argument('--after', type=int, default=0,
+                            help='Export only titles with a greater id.')
+        parser.add_argument('--chunk-size', type=int)
+        parser.add_argument('--gzip', action='store_true',
+                            help='Compress the output with gzip.')
+        parser.add_argument('--append', action='store_true',
+                            help='Append to the output file.')
+
+    def handle(self, *args, **options):
+        self.exported = 0
+        self.last_id = options['after']
+        content = ndjson(
+            self.track(catalogue(options['after'], options['chunk_size'])),
+            compress=options['gzip'],
+        )
+
+        if options['output'] == '-':
+            self.write(sys.stdout.buffer, content)
+            return
+
+        mode = 'ab' if options['append'] else 'wb'
+        with open(options['output'], mode) as file:
+            self.write(file, content)
+        self.stderr.write(
+            f'Exported {self.exported} titles to {options["output"]}, '
+            f'last id {self.last_id}.'
+        )
+
+    def track(self, titles):
+        for title in titles:
+            self.exported += 1
+            self.last_id = title['id']
+            yield title
+
+    @staticmethod
+    def write(file, content):
+        for block in content:
+            file.write(block)
+        file.flush()
@@ -0,0 +1,47 @@
+"""Refresh materialized leaderboards."""
+import time
+
+from django.core.management.base import BaseCommand
+from reviews.leaderboards import refresh
+
+
+class Command(BaseCommand):
+    """Recompute top rated and trending titles."""
+
+    help = (
+        'Refresh the top rated and trending leaderboards of the catalogue, '
+        'categories and genres. Only leaderboards touched by changes since '
+        'the previous run are re-ranked unless --full is given. With --loop '
+        'keep refreshing every --interval seconds, fully every '
+        '--full-interval seconds.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='Re-rank every leaderboard.')
+        parser.add_argument('--loop', action='store_true')
+        parser.add_argument('--interval', type=float, default=300)
+        parser.add_argument('--full-interval', type=float, default=86400)
+
+    def handle(self, *args, **options):
+        full = options['full']
+        last_full = time.monotonic()
+
+        while True:
+            started = time.monotonic()
+            # Кэш ответов сбрасывается по времени пересчёта в БД
+            # (LeaderboardView): сигналы отсюда не доходят до сервера.
+            stats = refresh(full=full)
+            self.stdout.write(
+                f'{"Full" if stats["full"] else "Incremental"} refresh: '
+                f'{stats["scopes"]} leaderboards re-ranked, '
+                f'{stats["active_titles"]} titles with new reviews, '
+                f'{time.monotonic() - started:.1f} s'
+            )
+
+            if stats['full']:
+                last_full = time.monotonic()
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+            full = time.monotonic() - last_full >= options['full_interval']
@@ -0,0 +1,14 @@
+"""Show rejected request counters of the throttles."""
+from api.throttling import get_rejected
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    """Print how many requests every throttle scope rejected."""
+
+    help = ('Print the number of requests rejected by every throttle scope '
+            'of DEFAULT_THROTTLE_RATES (signup, token, review, comment).')
+
+    def handle(self, *args, **options):
+        for scope, value in get_rejected().items():
+            self.stdout.write(f'{scope}: {value}')
@@ -0,0 +1,358 @@
+"""Request middleware: performance instrumentation, replica routing and
+response compression."""
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import OperationalError, connections
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+from .db_routers import (choose_replica, mark_unavailable, read_alias,
+                         replica_aliases)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger('api.performance')
+
+SQL_LOG_LENGTH = 500
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PIN_COOKIE = 'db_pin'
+PIN_HEADER = 'X-DB-Pin'
+COMPRESSIBLE_TYPES = ('application/json', 'application/javascript', 'text/')
+
+
+def brotli_compress(content):
+    return brotli.compress(content,
+                           quality=settings.COMPRESSION_BROTLI_QUALITY)
+
+
+# Кодировки в порядке предпочтения сервера: brotli, если установлен.
+ENCODINGS = {
+    **({'br': brotli_compress} if brotli is not None else {}),
+    'gzip': compress_string,
+}
+
+
+def choose_encoding(accept_encoding):
+    """Кодировка с наибольшим q из Accept-Encoding или None.
+
+    При равных q выбирается первая из ENCODINGS; `*` относится ко всем
+    кодировкам, не названным явно, q=0 запрещает кодировку.
+    """
+    accepted = {}
+
+    for item in accept_encoding.split(','):
+        coding, _, params = item.partition(';')
+        quality = 1.0
+        params = params.strip().lower()
+
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding.strip():
+            accepted[coding.strip().lower()] = quality
+
+    quality, _, coding = max(
+        (accepted.get(coding, accepted.get('*', 0.0)), -index, coding)
+        for index, coding in enumerate(ENCODINGS)
+    )
+
+    return coding if quality > 0 else None
+
+
+def view_name(request):
+    """Имя обработчика вида `TitleViewSet.list`."""
+    match = getattr(request, 'resolver_match', None)
+
+    if match is None:
+        return None
+
+    view = getattr(match.func, 'cls', None)
+
+    if view is None:
+        return match.view_name or match.func.__name__
+
+    method = request.method.lower()
+    actions = getattr(match.func, 'actions', None) or {}
+
+    return f'{view.__name__}.{actions.get(method, method)}'
+
+
+class RequestTiming:
+    """Замеры одного запроса."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view_started = None
+        self.view_finished = None
+        self.rendered = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_sql = None
+
+    def execute(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.db_time += elapsed
+
+            if elapsed > self.slowest_time:
+                self.slowest_time = elapsed
+                self.slowest_sql = sql
+
+    def finish_view(self):
+        if self.view_finished is None:
+            self.view_finished = time.perf_counter()
+
+    def finish_render(self, response):
+        self.rendered = time.perf_counter()
+
+        return response
+
+    def metrics(self, finished):
+        view = render = None
+
+        if self.view_started is not None:
+            view = (self.view_finished or finished) - self.view_started
+        if self.rendered is not None:
+            render = self.rendered - self.view_finished
+
+        return {
+            'total': finished - self.started,
+            'db': self.db_time,
+            'view': view,
+            'render': render,
+        }
+
+
+class PerformanceMiddleware:
+    """Число запросов к БД, время БД, view и рендеринга.
+
+    Включается настройкой PERFORMANCE_INSTRUMENTATION. Полные замеры
+    снимаются с доли запросов PERFORMANCE_SAMPLE_RATE: такие ответы
+    получают заголовок Server-Timing, а в лог `api.performance` пишется
+    строка JSON. Запросы дольше PERFORMANCE_SLOW_REQUEST_MS логируются
+    с уровнем WARNING всегда, даже не попавшие в выборку.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PERFORMANCE_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.PERFORMANCE_SAMPLE_RATE
+        self.slow = settings.PERFORMANCE_SLOW_REQUEST_MS / 1000
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            started = time.perf_counter()
+            response = self.get_response(request)
+            total = time.perf_counter() - started
+
+            if total >= self.slow:
+                self.log(request, response, {'total': total})
+
+            return response
+
+        timing = request._timing = RequestTiming()
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timing.execute))
+            response = self.get_response(request)
+        timing.finish_view()
+        finished = time.perf_counter()
+        metrics = timing.metrics(finished)
+
+        response['Server-Timing'] = self.server_timing(timing, metrics)
+        self.log(request, response, metrics, timing)
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timing = getattr(request, '_timing', None)
+
+        if timing is not None:
+            timing.view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # DRF Response рендерится после возврата из view: время до этого
+        # момента -- view, после -- рендеринг.
+        timing = getattr(request, '_timing', None)
+
+        if timing is not None:
+            timing.finish_view()
+            response.add_post_render_callback(timing.finish_render)
+
+        return response
+
+    @staticmethod
+    def server_timing(timing, metrics):
+        entries = [f'db;dur={metrics["db"] * 1000:.1f};'
+                   f'desc="{timing.queries} queries"']
+
+        for name in ('view', 'render', 'total'):
+            if metrics[name] is not None:
+                entries.append(f'{name};dur={metrics[name] * 1000:.1f}')
+
+        return ', '.join(entries)
+
+    def log(self, request, response, metrics, timing=None):
+        record = {
+            'view': view_name(request),
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            **{f'{name}_ms': round(value * 1000, 1)
+               for name, value in metrics.items() if value is not None},
+        }
+
+        if timing is not None:
+            record['queries'] = timing.queries
+            record['slowest_sql_ms'] = round(timing.slowest_time * 1000, 1)
+            record['slowest_sql'] = (timing.slowest_sql or '')[
+                :SQL_LOG_LENGTH]
+
+        slow = metrics['total'] >= self.slow
+        logger.log(logging.WARNING if slow else logging.INFO,
+                   json.dumps(record, ensure_ascii=False),
+                   extra={'performance': record})
+
+
+class ReplicaMiddleware:
+    """Направляет чтение на реплики (api/db_routers.py).
+
+    Запросы GET, HEAD и OPTIONS читают с доступной реплики. После
+    успешной записи клиент на REPLICA_PIN_SECONDS секунд закрепляется за
+    основной БД и видит свои изменения: в ответе выставляются cookie
+    `db_pin` и заголовок `X-DB-Pin` со временем окончания; клиенты без
+    cookie возвращают этот заголовок в следующих запросах.
+
+    Если реплика падает с OperationalError, она исключается из выбора, а
+    запрос на чтение один раз повторяется на основной БД.
+    """
+
+    def __init__(self, get_response):
+        if not replica_aliases():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        alias = None
+
+        if request.method in SAFE_METHODS and not self.is_pinned(request):
+            alias = choose_replica()
+        response = self.respond(request, alias)
+
+        if alias is not None and request._replica_failed:
+            response = self.respond(request, None)
+            alias = None
+
+        if alias is not None and response.streaming:
+            response.streaming_content = self.read_from(
+                alias, response.streaming_content)
+
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            pinned_until = int(time.time()) + settings.REPLICA_PIN_SECONDS
+            response.set_cookie(PIN_COOKIE, pinned_until,
+                                max_age=settings.REPLICA_PIN_SECONDS)
+            response[PIN_HEADER] = pinned_until
+
+        return response
+
+    def respond(self, request, alias):
+        request._read_alias = alias
+        request._replica_failed = False
+        token = read_alias.set(alias)
+
+        try:
+            return self.get_response(request)
+        finally:
+            read_alias.reset(token)
+
+    @staticmethod
+    def read_from(alias, content):
+        # Тело потокового ответа читается из БД уже после выхода из view.
+        token = read_alias.set(alias)
+
+        try:
+            yield from content
+        finally:
+            read_alias.reset(token)
+
+    def process_exception(self, request, exception):
+        alias = getattr(request, '_read_alias', None)
+
+        if alias is not None and isinstance(exception, OperationalError):
+            mark_unavailable(alias)
+            request._replica_failed = True
+            # Ответ-заглушка: __call__ повторит запрос на основной БД, а
+            # Django не запишет в лог ошибку сервера.
+            return HttpResponse(status=503)
+
+    @staticmethod
+    def is_pinned(request):
+        value = (request.COOKIES.get(PIN_COOKIE)
+                 or request.META.get('HTTP_X_DB_PIN'))
+
+        try:
+            return float(value) > time.time()
+        except (TypeError, ValueError):
+            return False
+
+
+class CompressionMiddleware:
+    """Сжимает ответы JSON и текст по Accept-Encoding: brotli (если
+    установлен) или gzip.
+
+    Ответы меньше COMPRESSION_MIN_SIZE байт, потоковые и уже сжатые
+    (выгрузка каталога) отдаются как есть. Сжатое тело меняет ETag на
+    слабый: If-None-Match сравнивает теги без учёта W/.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if (response.streaming or response.has_header('Content-Encoding')
+                or len(response.content) < settings.COMPRESSION_MIN_SIZE
+                or not response.get('Content-Type', '').startswith(
+                    COMPRESSIBLE_TYPES)):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''))
+
+        if encoding is None:
+            return response
+
+        content = ENCODINGS[encoding](response.content)
+        if len(content) >= len(response.content):
+            return response
+
+        response.content = content
+        response['Content-Length'] = str(len(content))
+        response['Content-Encoding'] = encoding
+        etag = response.get('ETag', '')
+        if etag.startswith('"'):
+            response['ETag'] = f'W/{etag}'
+
+        return response
@@ -0,0 +1,227 @@
+"""Pagination."""
+import json
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Постраничный вывод по курсору.
+
+    Курсор хранит значения полей сортировки последней строки страницы,
+    поэтому следующая страница выбирается условием по индексу, а не
+    пропуском всех предыдущих строк. Сортировка берётся из атрибута
+    `keyset_ordering` вьюсета и должна заканчиваться уникальным полем.
+    """
+
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+    default_limit = settings.REST_FRAMEWORK['PAGE_SIZE']
+    max_limit = settings.PAGINATION_MAX_LIMIT
+    ordering = ('id',)
+    invalid_cursor_message = 'Некорректный курсор.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.limit = self.get_limit(request)
+        self.ordering = getattr(view, 'keyset_ordering', self.ordering)
+        position, self.reverse = self.decode_cursor(request, queryset.model)
+
+        ordering = self.ordering
+        if self.reverse:
+            ordering = tuple(map(self.invert, ordering))
+        queryset = queryset.order_by(*ordering)
+
+        if position is not None:
+            queryset = queryset.filter(self.after(ordering, position))
+
+        results = list(queryset[:self.limit + 1])
+        has_more = len(results) > self.limit
+        results = results[:self.limit]
+
+        if self.reverse:
+            results.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.page = results
+
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.default_limit
+
+        if limit <= 0:
+            return self.default_limit
+
+        return min(limit, self.max_limit)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def decode_cursor(self, request, model):
+        """Позиция и направление из курсора.
+
+        Значения позиции приводятся полями сортировки модели: курсор
+        приходит от клиента, и подделанное значение должно дать 404, а не
+        ошибку в запросе к БД.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+
+        if not encoded:
+            return None, False
+
+        try:
+            cursor = json.loads(b64decode(encoded.encode('ascii')))
+            position, reverse = cursor['p'], bool(cursor['r'])
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(position, list) or (
+                len(position) != len(self.ordering)):
+            raise NotFound(self.invalid_cursor_message)
+
+        try:
+            position = [self.clean_value(model, field.lstrip('-'), value)
+                        for field, value in zip(self.ordering, position)]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return position, reverse
+
+    @staticmethod
+    def clean_value(model, name, value):
+        field = model._meta.get_field(name)
+        value = field.to_python(value)
+
+        if value is None:
+            raise ValidationError('Empty cursor value.')
+        # Диапазон целых проверяют валидаторы поля, но у SQLite он не
+        # задан: число вне 64 бит драйвер не передаст в запрос.
+        if isinstance(value, int) and not -2 ** 63 <= value < 2 ** 63:
+            raise ValidationError('Cursor value out of range.')
+        field.run_validators(value)
+
+        return value
+
+    def encode_cursor(self, obj, reverse):
+        position = [self.position_value(obj, field.lstrip('-'))
+                    for field in self.ordering]
+        encoded = b64encode(
+            json.dumps({'p': position, 'r': int(reverse)}).encode('ascii')
+        ).decode('ascii')
+
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded)
+
+    @staticmethod
+    def position_value(obj, field):
+        value = obj[field] if isinstance(obj, dict) else getattr(obj, field)
+
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+
+        return value
+
+    @staticmethod
+    def invert(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def after(ordering, position):
+        """Условие `(f1, f2, ...) > (v1, v2, ...)` с учётом направлений."""
+        conditions = []
+
+        for index, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            equal = {
+                previous.lstrip('-'): value
+                for previous, value in zip(ordering[:index], position)
+            }
+            conditions.append(
+                Q(**equal, **{f'{name}__{lookup}': position[index]})
+            )
+
+        return reduce(or_, conditions)
+
+
+class YamdbPagination(LimitOffsetPagination):
+    """limit/offset по умолчанию, курсор по `?pagination=cursor`.
+
+    Клиенты, которые листают глубоко, переходят на курсор, остальные
+    продолжают работать с offset.
+    """
+
+    max_limit = settings.PAGINATION_MAX_LIMIT
+    mode_query_param = 'pagination'
+    keyset_mode = 'cursor'
+    keyset_class = KeysetPagination
+
+    def use_keyset(self, request):
+        return (
+            request.query_params.get(self.mode_query_param)
+            == self.keyset_mode
+            or self.keyset_class.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+
+        if self.use_keyset(request):
+            self.keyset = self.keyset_class()
+
+            return self.keyset.paginate_queryset(queryset, request, view)
+
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+
+        return super().get_paginated_response(data)
@@ -35,7 +35,7 @@ class IsAuthorOrAdministratorOrReadOnly(permissions.BasePermission):
 
         return (
             request.method in permissions.SAFE_METHODS
-            or obj.author == request.user
+            or obj.author_id == request.user.id
             or request.user.is_admin
             or request.user.is_moderator
         )
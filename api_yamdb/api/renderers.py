@@ -0,0 +1,32 @@
+"""JSON renderer backed by orjson when it is installed."""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Поддерживаемые типы orjson кодирует сам, остальное (Decimal, ленивые
+# строки переводов, QuerySet) -- как JSONEncoder из DRF.
+ORJSON_OPTIONS = orjson and orjson.OPT_NON_STR_KEYS
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer, который кодирует через orjson.
+
+    Без orjson и для ответов с отступами (`; indent=` в Accept,
+    браузерный API) работает обычный JSONRenderer на stdlib json.
+    Вывод тот же: компактный UTF-8 с экранированными U+2028 и U+2029.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or self.ensure_ascii
+                or not self.compact or self.get_indent(
+                    accepted_media_type or '', renderer_context or {})):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        return orjson.dumps(
+            data, default=JSONEncoder().default, option=ORJSON_OPTIONS
+        ).replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+            b'\xe2\x80\xa9', b'\\u2029')
@@ -1,15 +1,61 @@
 """Serializers."""
+from collections import OrderedDict, defaultdict
+
+from django.db import transaction
+from django.utils.encoding import smart_str
 from rest_framework import exceptions, serializers
+from rest_framework.permissions import SAFE_METHODS
 from rest_framework.relations import SlugRelatedField
+from rest_framework.settings import api_settings
 from rest_framework.validators import UniqueValidator
-from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.helpers import bulk_insert
+from reviews.models import (HISTOGRAM_FIELDS, Category, Comment, Genre,
+                            GenreTitle, Ranking, Review, Title)
+from reviews.search import index_titles
 from users.models import User
 
-from api_yamdb.settings import (MESSAGE_FOR_RESERVED_NAME,
+from api_yamdb.settings import (BATCH_MAX_OPERATIONS, BULK_MAX_ITEMS,
+                                LEADERBOARD_SIZE, MESSAGE_FOR_DUPLICATE_REVIEW,
+                                MESSAGE_FOR_RESERVED_NAME,
                                 MESSAGE_FOR_USER_NOT_FOUND, RESERVED_NAME)
 
+from .cache import bump_version
+from .fastread import prefetch_genres
+from .fieldsets import query_names, selected_fields
+
+
+class OptionalFieldsMixin:
+    """Поля из Meta.optional_fields отдаются, только если запрошены
+    параметром `?include=<поле>[,<поле>...]`.
+
+    При чтении ответ верхнего уровня можно сократить: `?fields=` оставляет
+    только перечисленные поля, `?omit=` убирает перечисленные.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+
+        if request is None:
+            return fields
+
+        include = query_names(request, 'include')
+        for name in getattr(self.Meta, 'optional_fields', ()):
+            if name not in include:
+                fields.pop(name)
+
+        # Вложенные сериализаторы (произведение в таблице лидеров)
+        # отдаются целиком.
+        if (request.method in SAFE_METHODS
+                and self.root in (self, self.parent)):
+            selected = selected_fields(request, fields)
+            fields = OrderedDict(
+                (name, fields[name]) for name in selected)
+
+        return fields
 
-class ForUserSerializer(serializers.ModelSerializer):
+
+class ForUserSerializer(OptionalFieldsMixin, serializers.ModelSerializer):
     """Сериализатор для пользователей со статусом user.
     Зарезервированное имя использовать нельзя"""
 
@@ -33,7 +79,8 @@ class ForUserSerializer(serializers.ModelSerializer):
         return value
 
 
-class ForAdminSerializer(serializers.ModelSerializer):
+class ForAdminSerializer(OptionalFieldsMixin,
+                         serializers.ModelSerializer):
     """Сериализатор для пользователей со статусом admin.
     Зарезервированное имя использовать нельзя"""
 
@@ -92,28 +139,103 @@ class GenreSerializer(serializers.ModelSerializer):
         fields = ('name', 'slug')
 
 
-class TitleSerializer(serializers.ModelSerializer):
+class TitleSerializer(OptionalFieldsMixin, serializers.ModelSerializer):
     """ Serializer for Title model."""
 
     category = CategorySerializer(read_only=True)
     genre = GenreSerializer(many=True, read_only=True)
     rating = serializers.IntegerField(read_only=True)
+    histogram = serializers.DictField(
+        child=serializers.IntegerField(), read_only=True)
 
     class Meta:
 
         model = Title
         fields = ('id', 'name', 'year', 'rating', 'description',
-                  'genre', 'category',)
+                  'genre', 'category', 'histogram')
+        optional_fields = ('histogram',)
+        field_columns = {'histogram': HISTOGRAM_FIELDS}
+
+
+class PreloadedSlugRelatedField(SlugRelatedField):
+    """SlugRelatedField, который берёт объекты из словаря в контексте.
+
+    При пакетном создании view заранее загружает все объекты по slug
+    одним запросом и кладёт словарь в context[context_key]; без словаря
+    поле работает как обычное.
+    """
+
+    def __init__(self, context_key, **kwargs):
+        self.context_key = context_key
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        objects = self.context.get(self.context_key)
+
+        if objects is None:
+            return super().to_internal_value(data)
+
+        try:
+            return objects[str(data)]
+        except KeyError:
+            self.fail('does_not_exist', slug_name=self.slug_field,
+                      value=smart_str(data))
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """Список объектов для пакетного создания не длиннее BULK_MAX_ITEMS."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, list) and len(data) > BULK_MAX_ITEMS:
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    f'Ensure this list has no more than {BULK_MAX_ITEMS} '
+                    f'elements.'
+                ]
+            })
+
+        return super().to_internal_value(data)
+
+
+class TitleListSerializer(BulkListSerializer):
+    """Создаёт произведения и их связи с жанрами пакетной вставкой."""
+
+    def create(self, validated_data):
+        titles = [
+            Title(**{key: value for key, value in item.items()
+                     if key != 'genre'})
+            for item in validated_data
+        ]
+
+        with transaction.atomic():
+            bulk_insert(Title, titles)
+            GenreTitle.objects.bulk_create([
+                GenreTitle(title=title, genre=genre)
+                for title, item in zip(titles, validated_data)
+                for genre in item['genre']
+            ])
+            created = Title.objects.filter(
+                pk__in=[title.pk for title in titles])
+            index_titles(created)
+
+        # bulk_create не отправляет сигналы, которые сбрасывают кэш.
+        bump_version('title')
+        bump_version('genretitle')
+
+        return list(created.select_related('category')
+                    .prefetch_related(prefetch_genres()).order_by('pk'))
 
 
 class TitleCreateSerializer(serializers.ModelSerializer):
     """Serializer for POST and PATCH methods for Title model."""
 
-    category = serializers.SlugRelatedField(
+    category = PreloadedSlugRelatedField(
+        context_key='categories',
         slug_field='slug',
         queryset=Category.objects.all()
     )
-    genre = serializers.SlugRelatedField(
+    genre = PreloadedSlugRelatedField(
+        context_key='genres',
         slug_field='slug',
         queryset=Genre.objects.all(),
         many=True
@@ -124,9 +246,14 @@ class TitleCreateSerializer(serializers.ModelSerializer):
         model = Title
         fields = ('id', 'name', 'year', 'description',
                   'genre', 'category')
+        list_serializer_class = TitleListSerializer
 
+    def validate_genre(self, value):
+        # Повтор жанра нарушил бы unique_genre_title при пакетной вставке.
+        return list(dict.fromkeys(value))
 
-class CommentSerializer(serializers.ModelSerializer):
+
+class CommentSerializer(OptionalFieldsMixin, serializers.ModelSerializer):
     """Serializer for Comment model."""
 
     author = SlugRelatedField(slug_field='username', read_only=True)
@@ -137,7 +264,7 @@ class CommentSerializer(serializers.ModelSerializer):
         fields = ('id', 'text', 'author', 'pub_date')
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(OptionalFieldsMixin, serializers.ModelSerializer):
     """Serializer for Review model."""
 
     author = SlugRelatedField(slug_field='username', read_only=True)
@@ -146,3 +273,108 @@ class ReviewSerializer(serializers.ModelSerializer):
 
         model = Review
         fields = ('id', 'text', 'author', 'score', 'pub_date')
+
+
+class BatchOperationSerializer(serializers.Serializer):
+    """Одна операция пакетного запроса."""
+
+    method = serializers.ChoiceField(
+        choices=('GET', 'POST', 'PUT', 'PATCH', 'DELETE'))
+    path = serializers.RegexField(r'^/api/')
+    body = serializers.JSONField(required=False)
+
+
+class BatchSerializer(serializers.Serializer):
+    """Serializer for batch requests."""
+
+    operations = serializers.ListField(
+        child=BatchOperationSerializer(),
+        min_length=1,
+        max_length=BATCH_MAX_OPERATIONS,
+    )
+    parallel = serializers.BooleanField(default=False)
+
+
+class RankingSerializer(serializers.ModelSerializer):
+    """Место произведения в таблице лидеров."""
+
+    title = TitleSerializer(read_only=True)
+
+    class Meta:
+
+        model = Ranking
+        fields = ('position', 'score', 'title')
+
+
+class LeaderboardSerializer(serializers.Serializer):
+    """Параметры таблицы лидеров: раздел каталога и число мест."""
+
+    category = serializers.SlugField(required=False)
+    genre = serializers.SlugField(required=False)
+    limit = serializers.IntegerField(
+        min_value=1, max_value=LEADERBOARD_SIZE, default=20)
+
+    def validate(self, data):
+        if 'category' in data and 'genre' in data:
+            raise serializers.ValidationError(
+                'Specify either category or genre, not both.')
+
+        return data
+
+
+class ExportSerializer(serializers.Serializer):
+    """Параметры выгрузки каталога."""
+
+    after = serializers.IntegerField(min_value=0, default=0)
+
+
+class ReviewListSerializer(BulkListSerializer):
+    """Создаёт отзывы пакетной вставкой и сдвигает рейтинги и гистограммы
+    произведений одним UPDATE на произведение."""
+
+    def create(self, validated_data):
+        reviews = [Review(**item) for item in validated_data]
+        scores = defaultdict(list)
+
+        for review in reviews:
+            scores[review.title_id].append(review.score)
+
+        with transaction.atomic():
+            for title_id, added in scores.items():
+                if not Title.objects.filter(pk=title_id).add_review_scores(
+                        added):
+                    raise Title.DoesNotExist(
+                        f'Title with pk={title_id} does not exist.')
+            bulk_insert(Review, reviews)
+
+        bump_version('review')
+
+        return reviews
+
+
+class ReviewBulkSerializer(ReviewSerializer):
+    """Отзыв от имени указанного автора для пакетной загрузки.
+
+    Авторы загружаются заранее (context['authors']), в context['reviewed']
+    -- id авторов, у которых уже есть отзыв на произведение; туда же
+    добавляются авторы из пакета, чтобы найти повторы внутри него.
+    """
+
+    author = PreloadedSlugRelatedField(
+        context_key='authors',
+        slug_field='username',
+        queryset=User.objects.all()
+    )
+
+    class Meta(ReviewSerializer.Meta):
+
+        list_serializer_class = ReviewListSerializer
+
+    def validate(self, attrs):
+        reviewed = self.context['reviewed']
+
+        if attrs['author'].pk in reviewed:
+            raise serializers.ValidationError(MESSAGE_FOR_DUPLICATE_REVIEW)
+        reviewed.add(attrs['author'].pk)
+
+        return attrs
@@ -0,0 +1,48 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from reviews.models import (Category, Comment, Genre, GenreTitle, Ranking,
+                            Review, Title)
+from users.models import User
+
+from .authentication import forget_user
+from .cache import bump_version
+
+CACHED_MODELS = {
+    Category: 'category',
+    Genre: 'genre',
+    Title: 'title',
+    GenreTitle: 'genretitle',
+    Review: 'review',
+    Comment: 'comment',
+    Ranking: 'ranking',
+}
+
+
+def bump_model_version(sender, using, **kwargs):
+    """Сбрасывает кэш ответов, зависящих от изменённой модели."""
+    bump_version(CACHED_MODELS[sender], using)
+
+
+def bump_genretitle_version(sender, action, using, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_version(CACHED_MODELS[GenreTitle], using)
+
+
+def forget_changed_user(sender, instance, using, **kwargs):
+    """Роль или статус могли измениться: снимок перечитается из БД.
+
+    Удаляется после коммита, чтобы параллельный запрос не успел
+    закэшировать старые данные.
+    """
+    pk = instance.pk
+    transaction.on_commit(lambda: forget_user(pk), using=using)
+
+
+for model in CACHED_MODELS:
+    post_save.connect(bump_model_version, sender=model)
+    post_delete.connect(bump_model_version, sender=model)
+
+m2m_changed.connect(bump_genretitle_version, sender=Title.genre.through)
+
+post_save.connect(forget_changed_user, sender=User)
+post_delete.connect(forget_changed_user, sender=User)
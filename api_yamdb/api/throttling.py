@@ -0,0 +1,173 @@
+"""Token bucket throttles kept in a shared cache."""
+import logging
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import SimpleRateThrottle
+
+BUCKET_KEY = 'throttle:{scope}:{ident}'
+LOCK_KEY = '{}:lock'
+REJECTED_KEY = 'throttle-rejected:{}'
+# Блокировка ведра держится на время двух операций с кэшем; если она не
+# снята (процесс упал), её снимет таймаут. Ждём её не дольше
+# LOCK_ATTEMPTS * LOCK_RETRY_DELAY секунд.
+LOCK_TIMEOUT = 1
+LOCK_ATTEMPTS = 25
+LOCK_RETRY_DELAY = 0.002
+
+logger = logging.getLogger('api.throttling')
+
+
+def get_cache():
+    return caches[settings.THROTTLE_CACHE_ALIAS]
+
+
+def count_rejected(scope):
+    cache = get_cache()
+    key = REJECTED_KEY.format(scope)
+
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def get_rejected():
+    """Число отклонённых запросов по областям DEFAULT_THROTTLE_RATES."""
+    cache = get_cache()
+    scopes = settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']
+    keys = {scope: REJECTED_KEY.format(scope) for scope in scopes}
+    values = cache.get_many(keys.values())
+
+    return {scope: values.get(key, 0) for scope, key in keys.items()}
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """Ведро на `num_requests` запросов, которое равномерно наполняется
+    за `duration` секунд (ставка `<запросов>/<период>` области `scope`).
+
+    Ведро -- пара (токенов, время) в кэше THROTTLE_CACHE_ALIAS, общем
+    для всех процессов; проверка -- несколько операций с кэшем без
+    запросов к БД. Чтение и запись ведра идут под блокировкой через
+    атомарный cache.add. Если блокировку не удалось взять (её держит
+    упавший процесс), запрос пропускается без списания токена: занятость
+    ведра -- не превышение ставки. По умолчанию ограничиваются запросы с
+    одного IP; `methods` -- какие методы ограничивать (None -- все).
+    """
+
+    methods = None
+
+    def __init__(self):
+        super().__init__()
+        self.cache = get_cache()
+        self.wait_seconds = None
+
+    def get_cache_key(self, request, view):
+        return BUCKET_KEY.format(scope=self.scope,
+                                 ident=self.get_ident(request))
+
+    def allow_request(self, request, view):
+        if self.methods is not None and request.method not in self.methods:
+            return True
+
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+
+        self.wait_seconds = self.take(key, self.get_cost(request))
+        if self.wait_seconds is None:
+            return True
+
+        count_rejected(self.scope)
+        return False
+
+    def get_cost(self, request):
+        """Сколько токенов стоит запрос."""
+        return 1
+
+    def take(self, key, cost=1):
+        """Берёт `cost` токенов из ведра; None или через сколько секунд
+        повторить."""
+        lock = LOCK_KEY.format(key)
+
+        for _ in range(LOCK_ATTEMPTS):
+            if self.cache.add(lock, 1, timeout=LOCK_TIMEOUT):
+                break
+            time.sleep(LOCK_RETRY_DELAY)
+        else:
+            logger.warning('Throttle bucket %s is locked, request allowed',
+                           key)
+            return None
+
+        try:
+            now = self.timer()
+            rate = self.num_requests / self.duration
+            tokens, updated = self.cache.get(key, (self.num_requests, now))
+            tokens = min(self.num_requests,
+                         tokens + max(0, now - updated) * rate)
+
+            # Запрос дороже целого ведра ждал бы вечно.
+            cost = min(cost, self.num_requests)
+            wait = None
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / rate
+            # Через `duration` ведро снова полное, хранить его дольше
+            # незачем.
+            self.cache.set(key, (tokens, now), timeout=self.duration)
+        finally:
+            self.cache.delete(lock)
+
+        return wait
+
+    def wait(self):
+        if self.wait_seconds is None:
+            return None
+
+        return math.ceil(self.wait_seconds)
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """Ведро на пользователя; анонимов ограничивает по IP."""
+
+    def get_cache_key(self, request, view):
+        if not request.user.is_authenticated:
+            return super().get_cache_key(request, view)
+
+        return BUCKET_KEY.format(scope=self.scope,
+                                 ident=f'user-{request.user.pk}')
+
+
+class SignUpThrottle(TokenBucketThrottle):
+    scope = 'signup'
+
+
+class TokenThrottle(TokenBucketThrottle):
+    scope = 'token'
+
+
+class ReviewThrottle(UserTokenBucketThrottle):
+    scope = 'review'
+    methods = ('POST',)
+
+
+class CommentThrottle(UserTokenBucketThrottle):
+    scope = 'comment'
+    methods = ('POST',)
+
+
+class BatchThrottle(UserTokenBucketThrottle):
+    """Пакет стоит по токену на операцию, как отдельные запросы."""
+
+    scope = 'batch'
+
+    def get_cost(self, request):
+        operations = (request.data.get('operations')
+                      if isinstance(request.data, dict) else None)
+
+        return max(1, len(operations) if isinstance(operations, list)
+                   else 1)
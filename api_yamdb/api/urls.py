@@ -1,8 +1,9 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import (APISignUp, APIToken, CategoryViewSet, CommentsViewSet,
-                    GenreViewSet, ReviewsViewSet, TitleViewSet, UserViewSet)
+from .views import (APISignUp, APIToken, BatchView, CategoryViewSet,
+                    CommentsViewSet, ExportView, GenreViewSet, LeaderboardView,
+                    ReviewsViewSet, TitleViewSet, UserViewSet)
 
 router_v1 = DefaultRouter()
 router_v1.register(r'genres', GenreViewSet, basename='genres')
@@ -24,5 +25,9 @@ router_v1.register('users', UserViewSet, basename='users')
 urlpatterns = [
     path('v1/auth/signup/', APISignUp.as_view(), name='signup'),
     path('v1/auth/token/', APIToken.as_view(), name='token'),
+    path('v1/batch/', BatchView.as_view(), name='batch'),
+    path('v1/export/', ExportView.as_view(), name='export'),
+    path('v1/leaderboards/<str:board>/', LeaderboardView.as_view(),
+         name='leaderboards'),
     path('v1/', include(router_v1.urls)),
 ]
@@ -1,10 +1,13 @@
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db import IntegrityError, transaction
+from django.http import StreamingHttpResponse
+from django.middleware.gzip import re_accepts_gzip
 from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_vary_headers
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, status, viewsets
+from rest_framework import filters, serializers, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.mixins import (CreateModelMixin, DestroyModelMixin,
                                    ListModelMixin)
 from rest_framework.permissions import AllowAny, IsAuthenticated
@@ -12,31 +15,49 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 from rest_framework_simplejwt.tokens import AccessToken
-from reviews.models import Category, Genre, Review, Title
-from users.models import User
-
+from reviews.helpers import violates_constraint
+from reviews.leaderboards import category_scope, genre_scope
+from reviews.models import (Category, Genre, Ranking, RankingRefresh, Review,
+                            Title)
+from users.models import OutboxEmail, User
+
+from api_yamdb.settings import MESSAGE_FOR_DUPLICATE_REVIEW
+
+from .authentication import get_user_instance
+from .batch import run_batch
+from .cache import CachedListMixin
+from .conditional import ConditionalGetMixin
+from .export import catalogue, ndjson
+from .fastread import (AuthorValuesSerializer, FastListMixin,
+                       TitleValuesSerializer, prefetch_genres)
+from .fieldsets import SparseFieldsMixin
 from .filters import TitleFilter
 from .permissions import (IsAdmin, IsAdminOrReadOnly,
                           IsAuthorOrAdministratorOrReadOnly)
-from .serializers import (CategorySerializer, CommentSerializer,
+from .serializers import (BatchSerializer, CategorySerializer,
+                          CommentSerializer, ExportSerializer,
                           ForAdminSerializer, ForUserSerializer,
-                          GenreSerializer, ReviewSerializer,
-                          TitleCreateSerializer, TitleSerializer,
-                          TokenSerializer)
+                          GenreSerializer, LeaderboardSerializer,
+                          RankingSerializer, ReviewBulkSerializer,
+                          ReviewSerializer, TitleCreateSerializer,
+                          TitleSerializer, TokenSerializer)
+from .throttling import (BatchThrottle, CommentThrottle, ReviewThrottle,
+                         SignUpThrottle, TokenThrottle)
 
 
 class APISignUp(APIView):
     """User auth."""
 
     permission_classes = (AllowAny, )
+    throttle_classes = (SignUpThrottle, )
 
     def post(self, request):
         serializer = ForUserSerializer(data=request.data)
 
         if serializer.is_valid(raise_exception=True):
-            serializer.save()
-            self.create_confirmation_code_and_send_email(
-                serializer.data['username'])
+            with transaction.atomic():
+                user = serializer.save()
+                self.queue_confirmation_email(user)
 
             return Response(
                 {'email': serializer.data['email'],
@@ -44,20 +65,20 @@ class APISignUp(APIView):
                 status=status.HTTP_200_OK)
 
     @staticmethod
-    def create_confirmation_code_and_send_email(username):
-        user = get_object_or_404(User, username=username)
+    def queue_confirmation_email(user):
+        """Ставит письмо в очередь, отправляет его команда sendoutbox."""
         confirmation_code = default_token_generator.make_token(user)
-        send_mail(
+        OutboxEmail.objects.create(
             subject=f'{user.username} Confirmation code',
             message=f'Your confirmation code {confirmation_code}',
-            from_email=None,
-            recipient_list=[user.email, ])
+            recipient=user.email)
 
 
 class APIToken(APIView):
     """Get token."""
 
     permission_classes = (AllowAny, )
+    throttle_classes = (TokenThrottle, )
 
     def post(self, request):
         serializer = TokenSerializer(data=request.data)
@@ -78,13 +99,64 @@ class APIToken(APIView):
                 status=status.HTTP_400_BAD_REQUEST)
 
 
-class UserViewSet(ModelViewSet):
+class BatchView(APIView):
+    """Несколько операций API в одном запросе.
+
+    Операции выполняются внутри процесса с пользователем пакета,
+    результаты возвращаются в порядке операций. Ограничение частоты
+    списывает по токену на операцию (BatchThrottle).
+    """
+
+    permission_classes = (AllowAny, )
+    throttle_classes = (BatchThrottle, )
+
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        return Response(run_batch(
+            request,
+            serializer.validated_data['operations'],
+            parallel=serializer.validated_data['parallel'],
+        ))
+
+
+class ExportView(APIView):
+    """Выгрузка всего каталога с отзывами в NDJSON.
+
+    Ответ передаётся потоком, по строке на произведение в порядке id.
+    Прерванную выгрузку можно продолжить с `?after=<id последнего
+    полученного произведения>`. При `Accept-Encoding: gzip` ответ сжат.
+    """
+
+    permission_classes = (IsAdmin, )
+
+    def get(self, request):
+        serializer = ExportSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        compress = bool(re_accepts_gzip.search(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')))
+        response = StreamingHttpResponse(
+            ndjson(catalogue(serializer.validated_data['after']),
+                   compress=compress),
+            content_type='application/x-ndjson',
+        )
+
+        if compress:
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        return response
+
+
+class UserViewSet(SparseFieldsMixin, ModelViewSet):
     """Работа с пользователями."""
 
     permission_classes = (IsAdmin, )
     queryset = User.objects.all()
     serializer_class = ForAdminSerializer
     lookup_field = 'username'
+    keyset_ordering = ('id',)
     filter_backends = (filters.SearchFilter, )
     search_fields = ('username', )
 
@@ -94,7 +166,8 @@ class UserViewSet(ModelViewSet):
         permission_classes=(IsAuthenticated,),
         url_path='me')
     def get_current_user_info(self, request):
-        serializer = ForUserSerializer(request.user)
+        serializer = ForUserSerializer(
+            request.user, context=self.get_serializer_context())
 
         if request.method == 'PATCH':
 
@@ -117,6 +190,46 @@ class UserViewSet(ModelViewSet):
         return Response(serializer.data)
 
 
+class BulkCreateMixin:
+    """POST со списком объектов создаёт их все одной пакетной вставкой.
+
+    Связанные объекты для всех элементов загружаются заранее
+    (get_bulk_context), ошибки валидации возвращаются по элементам.
+    """
+
+    def is_bulk(self):
+        return (self.action == 'create'
+                and isinstance(self.request.data, list))
+
+    def get_serializer(self, *args, **kwargs):
+        if self.is_bulk() and 'data' in kwargs:
+            kwargs['many'] = True
+            kwargs['context'] = {
+                **self.get_serializer_context(),
+                **self.get_bulk_context(kwargs['data']),
+            }
+
+        return super().get_serializer(*args, **kwargs)
+
+    def get_bulk_context(self, data):
+        return {}
+
+    @staticmethod
+    def collect(data, field, many=False):
+        """Значения поля из всех элементов списка для одного запроса IN."""
+        values = set()
+
+        for item in data:
+            value = item.get(field) if isinstance(item, dict) else None
+
+            if many and isinstance(value, list):
+                values.update(map(str, value))
+            elif value is not None and not many:
+                values.add(str(value))
+
+        return values
+
+
 class CustomMixin(ListModelMixin,
                   CreateModelMixin,
                   DestroyModelMixin,
@@ -126,7 +239,7 @@ class CustomMixin(ListModelMixin,
     pass
 
 
-class CategoryViewSet(CustomMixin):
+class CategoryViewSet(CachedListMixin, CustomMixin):
     """API для работы с моделью категорий."""
 
     permission_classes = (IsAdminOrReadOnly,)
@@ -136,9 +249,10 @@ class CategoryViewSet(CustomMixin):
     filterset_fields = ('name', )
     search_fields = ('name',)
     lookup_field = 'slug'
+    cache_resources = ('category',)
 
 
-class GenreViewSet(CustomMixin):
+class GenreViewSet(CachedListMixin, CustomMixin):
     """API для работы с моделью жанров."""
 
     permission_classes = (IsAdminOrReadOnly,)
@@ -148,16 +262,23 @@ class GenreViewSet(CustomMixin):
     filterset_fields = ('name', )
     search_fields = ('name',)
     lookup_field = 'slug'
+    cache_resources = ('genre',)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(ConditionalGetMixin, CachedListMixin, BulkCreateMixin,
+                   SparseFieldsMixin, FastListMixin, viewsets.ModelViewSet):
     """API для работы с моделью произведений."""
 
     permission_classes = (IsAdminOrReadOnly,)
     serializer_class = TitleSerializer
-    queryset = Title.objects.all().annotate(
-        rating=Avg('reviews__score')
-    )
+    fast_serializer_class = TitleValuesSerializer
+    queryset = Title.objects.select_related(
+        'category'
+    ).prefetch_related(prefetch_genres())
+    keyset_ordering = ('id',)
+    cache_resources = ('title', 'category', 'genre', 'genretitle', 'review')
+    resource = 'title'
+    related_resources = ('category', 'genre', 'genretitle')
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
     filterset_fields = ('genre__slug',)
@@ -170,84 +291,172 @@ class TitleViewSet(viewsets.ModelViewSet):
 
         return TitleSerializer
 
+    @action(detail=False, url_path='facets')
+    def facets(self, request):
+        """Число произведений текущей выборки по жанрам, категориям и
+        годам."""
+        return self.cached(
+            request, self.get_facets,
+            resources=('title', 'category', 'genre', 'genretitle'))
 
-class ReviewsViewSet(viewsets.ModelViewSet):
+    def get_facets(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+
+        return Response(queryset.facets())
+
+    def get_bulk_context(self, data):
+        return {
+            'categories': Category.objects.in_bulk(
+                self.collect(data, 'category'), field_name='slug'),
+            'genres': Genre.objects.in_bulk(
+                self.collect(data, 'genre', many=True), field_name='slug'),
+        }
+
+
+class LeaderboardView(CachedListMixin, APIView):
+    """Таблица лидеров `top` или `trending`.
+
+    Места пересчитывает команда refreshleaderboards
+    (reviews/leaderboards.py), здесь они только читаются по индексу:
+    для всего каталога, категории (`?category=<slug>`) или жанра
+    (`?genre=<slug>`). Команда работает в отдельном контейнере и не
+    может сбросить кэш процессов сервера, поэтому ключ кэша включает
+    время последнего пересчёта из БД.
+    """
+
+    permission_classes = (AllowAny, )
+    cache_resources = ('ranking', *TitleViewSet.cache_resources)
+
+    def get(self, request, board):
+        if board not in dict(Ranking.BOARDS):
+            raise NotFound
+
+        refreshed_at = RankingRefresh.objects.values_list(
+            'refreshed_at', flat=True).first()
+
+        return self.cached(request, self.get_board, board, refreshed_at,
+                           version=refreshed_at and refreshed_at.timestamp())
+
+    def get_board(self, request, board, refreshed_at):
+        params = LeaderboardSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        rankings = Ranking.objects.filter(
+            board=board, scope=self.get_scope(params.validated_data)
+        ).select_related('title__category').prefetch_related(
+            prefetch_genres('title__genre')
+        ).order_by('position')[:params.validated_data['limit']]
+
+        return Response({
+            'board': board,
+            'refreshed_at': refreshed_at and serializers.DateTimeField(
+            ).to_representation(refreshed_at),
+            'results': RankingSerializer(
+                rankings, many=True, context={'request': request}).data,
+        })
+
+    @staticmethod
+    def get_scope(params):
+        for name, model, scope in (('category', Category, category_scope),
+                                   ('genre', Genre, genre_scope)):
+            if name in params:
+                pk = model.objects.filter(slug=params[name]).values_list(
+                    'pk', flat=True).first()
+
+                if pk is None:
+                    raise NotFound(f'{name} {params[name]} not found.')
+
+                return scope(pk)
+
+        return ''
+
+
+class ReviewsViewSet(ConditionalGetMixin, BulkCreateMixin,
+                     SparseFieldsMixin, FastListMixin, viewsets.ModelViewSet):
     """Viewset for reviews model."""
 
     serializer_class = ReviewSerializer
+    fast_serializer_class = AuthorValuesSerializer
     permission_classes = [IsAuthorOrAdministratorOrReadOnly]
+    throttle_classes = (ReviewThrottle, )
+    keyset_ordering = ('-pub_date', '-id')
+    resource = 'review'
 
     def get_queryset(self):
         title = get_object_or_404(Title, pk=self.kwargs.get('title_id'))
 
-        return title.reviews.all()
-
-    def create(self, request, *args, **kwargs):
-        serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-
-        if not Title.objects.filter(pk=self.kwargs.get('title_id')).exists():
+        return title.reviews.select_related('author')
 
-            return Response(serializer.data, status=status.HTTP_404_NOT_FOUND)
+    def get_serializer_class(self):
+        # Отзывы списком от имени разных авторов загружает администратор.
+        if self.is_bulk():
+            if not self.request.user.is_admin:
+                self.permission_denied(self.request)
 
-        if Review.objects.filter(
-            author=self.request.user,
-            title=self.kwargs.get('title_id')
-        ).exists():
+            return ReviewBulkSerializer
 
-            return Response(
-                serializer.data,
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        return ReviewSerializer
 
-        self.perform_create(serializer)
-        headers = self.get_success_headers(serializer.data)
+    def get_bulk_context(self, data):
+        authors = User.objects.in_bulk(
+            self.collect(data, 'author'), field_name='username')
 
-        return Response(
-            serializer.data,
-            status=status.HTTP_201_CREATED, headers=headers
-        )
+        return {
+            'authors': authors,
+            'reviewed': set(Review.objects.filter(
+                title_id=self.kwargs.get('title_id'),
+                author__in=authors.values(),
+            ).values_list('author_id', flat=True)),
+        }
 
     def perform_create(self, serializer):
-        title = Title.objects.get(pk=self.kwargs.get('title_id'))
-        serializer.save(author=self.request.user, title=title)
-
-
-class CommentsViewSet(viewsets.ModelViewSet):
+        """Вставка без предварительных проверок.
+
+        Повторный отзыв отклоняет ограничение unique_review, отсутствие
+        произведения видно по обновлению его рейтинга в той же транзакции.
+        Остальные ошибки целостности не выдаются за повторный отзыв.
+        """
+        author = ({} if self.is_bulk()
+                  else {'author': get_user_instance(self.request.user)})
+
+        try:
+            with transaction.atomic():
+                serializer.save(title_id=self.kwargs.get('title_id'),
+                                **author)
+        except Title.DoesNotExist:
+            raise NotFound
+        except IntegrityError as error:
+            if not violates_constraint(error, Review, 'unique_review'):
+                raise
+            raise ValidationError({'detail': MESSAGE_FOR_DUPLICATE_REVIEW})
+
+
+class CommentsViewSet(ConditionalGetMixin, SparseFieldsMixin, FastListMixin,
+                      viewsets.ModelViewSet):
     """Viewset for comments model."""
 
     serializer_class = CommentSerializer
+    fast_serializer_class = AuthorValuesSerializer
     permission_classes = [IsAuthorOrAdministratorOrReadOnly]
+    throttle_classes = (CommentThrottle, )
+    keyset_ordering = ('-pub_date', '-id')
+    resource = 'comment'
 
     def get_queryset(self):
         review = get_object_or_404(Review, pk=self.kwargs.get('review_id'))
 
-        return review.comments.all()
-
-    def create(self, request, *args, **kwargs):
-        serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-
-        if not (
-            Title.objects.filter(pk=self.kwargs.get('title_id')).exists()
-            or Review.objects.filter(pk=self.kwargs.get('review_id')).exists()
-        ):
-
-            return Response(serializer.data, status=status.HTTP_404_NOT_FOUND)
-
-        self.perform_create(serializer)
-        headers = self.get_success_headers(serializer.data)
-
-        return Response(
-            serializer.data,
-            status=status.HTTP_201_CREATED,
-            headers=headers
-        )
+        return review.comments.select_related('author')
 
     def perform_create(self, serializer):
-        review = get_object_or_404(
-            Review,
-            id=self.kwargs.get('review_id'),
-            title__id=self.kwargs.get('title_id')
-        )
-        serializer.save(author=self.request.user, review=review)
+        """Отзыв удалённый между проверкой и вставкой отклонит внешний ключ."""
+        if not Review.objects.filter(
+            pk=self.kwargs.get('review_id'),
+            title_id=self.kwargs.get('title_id')
+        ).exists():
+            raise NotFound
+
+        try:
+            with transaction.atomic():
+                serializer.save(author=get_user_instance(self.request.user),
+                                review_id=self.kwargs.get('review_id'))
+        except IntegrityError:
+            raise NotFound
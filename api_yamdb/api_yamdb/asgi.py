@@ -0,0 +1,18 @@
+"""
+ASGI config for api_yamdb project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Django 2.2 has no ASGI handler of its own, the application is built on top
+of the WSGI one in api/asgi.py. Run it with an ASGI server, for example:
+
+    gunicorn api_yamdb.asgi:application -k uvicorn.workers.UvicornWorker
+"""
+
+import os
+
+from api.asgi import AsyncReadApplication
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+
+application = AsyncReadApplication(get_wsgi_application())
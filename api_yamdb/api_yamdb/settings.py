@@ -18,6 +18,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'django_filters',
@@ -27,6 +28,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.PerformanceMiddleware',
+    'api.middleware.CompressionMiddleware',
+    'api.middleware.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -76,6 +80,68 @@ DATABASES = {
     }
 }
 
+# Реплики только для чтения (api/db_routers.py): через запятую адреса
+# серверов PostgreSQL или, для SQLite, пути к файлам баз. Остальные
+# параметры подключения -- как у основной БД.
+DB_REPLICAS = [replica for replica in os.getenv('DB_REPLICAS', default='').split(',') if replica]
+for number, replica in enumerate(DB_REPLICAS, start=1):
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'NAME' if DATABASES['default']['ENGINE'].endswith('sqlite3') else 'HOST': replica,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['api.db_routers.ReplicaRouter']
+# Сколько секунд после записи клиент читает из основной БД.
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', default=5))
+REPLICA_HEALTH_CHECK_INTERVAL = 10
+
+# Адрес memcached, общего для всех процессов и контейнеров. Если он
+# задан, снимки пользователей и вёдра ограничения частоты хранятся в нём,
+# иначе -- в памяти процесса.
+MEMCACHED_LOCATION = os.getenv('MEMCACHED_LOCATION')
+SHARED_CACHE_BACKEND = (
+    'django.core.cache.backends.memcached.MemcachedCache'
+    if MEMCACHED_LOCATION
+    else 'django.core.cache.backends.locmem.LocMemCache'
+)
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Кэш ответов каталога. Подходит любой бэкенд Django, например
+    # django.core.cache.backends.filebased.FileBasedCache c путём в LOCATION.
+    'api': {
+        'BACKEND': os.getenv('API_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('API_CACHE_LOCATION', default='api'),
+        'TIMEOUT': int(os.getenv('API_CACHE_TIMEOUT', default=300)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('API_CACHE_MAX_ENTRIES', default=1000)),
+        },
+    },
+    # Снимки пользователей для проверки JWT (api/authentication.py). В
+    # кэше в памяти процесса снимки не хранятся: другой процесс не узнал
+    # бы о смене роли или удалении пользователя.
+    'auth': {
+        'BACKEND': os.getenv('AUTH_CACHE_BACKEND', default=SHARED_CACHE_BACKEND),
+        'LOCATION': os.getenv('AUTH_CACHE_LOCATION', default=MEMCACHED_LOCATION or 'auth'),
+        'KEY_PREFIX': 'auth',
+    },
+    # Вёдра ограничения частоты запросов (api/throttling.py). Кэш должен
+    # быть общим для всех процессов сервера: в памяти процесса каждый
+    # процесс пропускает полную ставку.
+    'throttle': {
+        'BACKEND': os.getenv('THROTTLE_CACHE_BACKEND', default=SHARED_CACHE_BACKEND),
+        'LOCATION': os.getenv('THROTTLE_CACHE_LOCATION', default=MEMCACHED_LOCATION or 'throttle'),
+        'KEY_PREFIX': 'throttle',
+    },
+}
+
+API_CACHE_ALIAS = 'api'
+AUTH_CACHE_ALIAS = 'auth'
+THROTTLE_CACHE_ALIAS = 'throttle'
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -115,12 +181,95 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.YamdbPagination',
     'PAGE_SIZE': 100,
+    # Ёмкость ведра и за сколько оно наполняется (api/throttling.py):
+    # регистрация и получение токена -- с одного IP, отзывы и
+    # комментарии -- от одного пользователя.
+    'DEFAULT_THROTTLE_RATES': {
+        'signup': os.getenv('THROTTLE_SIGNUP_RATE', default='5/hour'),
+        'token': os.getenv('THROTTLE_TOKEN_RATE', default='10/min'),
+        'review': os.getenv('THROTTLE_REVIEW_RATE', default='20/min'),
+        'comment': os.getenv('THROTTLE_COMMENT_RATE', default='30/min'),
+        'batch': os.getenv('THROTTLE_BATCH_RATE', default='300/min'),
+    },
+    # IP клиента -- из X-Forwarded-For, который выставляет nginx; без
+    # прокси -- 0.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', default=1)),
 }
 
+# Сжатие ответов (api/middleware.py): ответы меньше этого размера в байтах
+# не сжимаются; качество brotli от 0 до 11 (gzip -- уровень 6).
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', default=1024))
+COMPRESSION_BROTLI_QUALITY = 5
+
+# Пакетные запросы /api/v1/batch/: операций в пакете и потоков для
+# параллельного выполнения операций чтения.
+BATCH_MAX_OPERATIONS = 20
+BATCH_MAX_WORKERS = 4
+
+# Потоки для работы с БД асинхронных view чтения (api/asgi.py) в каждом
+# процессе ASGI-сервера.
+ASGI_READ_THREADS = int(os.getenv('ASGI_READ_THREADS', default=8))
+
+# Списки произведений, отзывов и комментариев строятся из .values() без
+# ModelSerializer (api/fastread.py); ответ тот же.
+FAST_READ_SERIALIZERS = os.getenv('FAST_READ_SERIALIZERS', default='True') == 'True'
+
+# Произведений в одной порции выгрузки каталога (api/export.py).
+EXPORT_CHUNK_SIZE = 500
+
+# Таблицы лидеров (reviews/leaderboards.py): мест в каждой таблице, число
+# средних по каталогу оценок в байесовском рейтинге, за сколько часов вес
+# отзыва в активности уменьшается вдвое и за сколько дней учитываются
+# отзывы при полном пересчёте.
+LEADERBOARD_SIZE = 100
+LEADERBOARD_PRIOR_REVIEWS = 10
+TRENDING_HALF_LIFE_HOURS = 48
+TRENDING_WINDOW_DAYS = 7
+
+# Предельное число объектов в одном POST со списком (произведения, отзывы).
+BULK_MAX_ITEMS = 1000
+
+# Жёсткий предел параметра limit для offset- и курсорной пагинации.
+PAGINATION_MAX_LIMIT = 500
+
+# Замеры запросов (api/middleware.py): Server-Timing и лог api.performance.
+PERFORMANCE_INSTRUMENTATION = os.getenv('PERFORMANCE_INSTRUMENTATION', default='False') == 'True'
+PERFORMANCE_SAMPLE_RATE = float(os.getenv('PERFORMANCE_SAMPLE_RATE', default=0.1))
+PERFORMANCE_SLOW_REQUEST_MS = float(os.getenv('PERFORMANCE_SLOW_REQUEST_MS', default=500))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'api.performance': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+# Сколько секунд хранится снимок пользователя (api/authentication.py).
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv('AUTH_USER_CACHE_TIMEOUT', default=300))
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=180),
     'AUTH_HEADER_TYPES': ('Bearer',),
@@ -133,5 +282,12 @@ MESSAGE_FOR_RESERVED_NAME = 'Имя пользователя "me" использ
 
 MESSAGE_FOR_USER_NOT_FOUND = 'Пользователя с таким именем нет!'
 
+MESSAGE_FOR_DUPLICATE_REVIEW = 'Вы уже оставили отзыв на это произведение!'
+
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 DEFAULT_FROM_EMAIL = 'webmaster@localhost'
+
+# Очередь писем (users.OutboxEmail), отправляет команда sendoutbox.
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_DELAY = 60
+OUTBOX_MAX_RETRY_DELAY = 3600
@@ -1,5 +1,109 @@
+from contextlib import contextmanager
 from datetime import datetime
+from itertools import islice
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import AutoField
 
 
 def year():
     return datetime.now().year
+
+
+def chunks(iterable, size):
+    """Списки по `size` элементов, не читая всё сразу."""
+    iterator = iter(iterable)
+
+    while True:
+        chunk = list(islice(iterator, size))
+
+        if not chunk:
+            return
+        yield chunk
+
+
+@contextmanager
+def keep_auto_dates(model, attnames):
+    """Не даёт auto_now/auto_now_add затереть переданные даты.
+
+    Нужно для bulk_create, который вызывает pre_save полей.
+    """
+    fields = [field for field in model._meta.concrete_fields
+              if field.attname in attnames
+              and (getattr(field, 'auto_now', False)
+                   or getattr(field, 'auto_now_add', False))]
+    flags = [(field.auto_now, field.auto_now_add) for field in fields]
+
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, flags):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def violates_constraint(error, model, name):
+    """Нарушено ли IntegrityError ограничение уникальности `name` модели.
+
+    PostgreSQL сообщает имя ограничения, SQLite -- только его столбцы:
+    `UNIQUE constraint failed: <таблица>.<столбец>, ...`.
+    """
+    diag = getattr(error.__cause__, 'diag', None)
+
+    if diag is not None:
+        return diag.constraint_name == name
+
+    constraint, = (constraint for constraint in model._meta.constraints
+                   if constraint.name == name)
+    columns = ', '.join(
+        f'{model._meta.db_table}.{model._meta.get_field(field).column}'
+        for field in constraint.fields
+    )
+
+    return str(error) == f'UNIQUE constraint failed: {columns}'
+
+
+def reset_sequences(models):
+    """Сдвигает последовательности первичных ключей после вставки с id."""
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def bulk_insert(model, objects):
+    """bulk_create, после которого у объектов есть первичные ключи.
+
+    PostgreSQL возвращает ключи из INSERT. SQLite их не возвращает, но
+    строки одного INSERT получают подряд идущие rowid, а транзакция
+    держит блокировку записи: ключи пакета восстанавливаются по
+    last_insert_rowid(), по запросу на пакет bulk_create. Остальные
+    бэкенды вставляют строки по одной через save_base. Как и bulk_create,
+    переопределённый save() модели не вызывается.
+    """
+    if connection.features.can_return_ids_from_bulk_insert:
+        return model.objects.bulk_create(objects)
+
+    if connection.vendor != 'sqlite':
+        for obj in objects:
+            obj.save_base(force_insert=True)
+
+        return objects
+
+    fields = [field for field in model._meta.concrete_fields
+              if not isinstance(field, AutoField)]
+    size = connection.ops.bulk_batch_size(fields, objects)
+
+    with transaction.atomic():
+        for batch in chunks(objects, size):
+            model.objects.bulk_create(batch, batch_size=size)
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT last_insert_rowid()')
+                last, = cursor.fetchone()
+            for obj, pk in zip(batch, range(last - len(batch) + 1, last + 1)):
+                obj.pk = pk
+
+    return objects
@@ -0,0 +1,198 @@
+"""Таблицы лидеров: лучшие и набирающие популярность произведения.
+
+Места хранятся в модели Ranking отдельно для всего каталога, каждой
+категории и каждого жанра и пересчитываются командой
+refreshleaderboards, поэтому чтение таблицы не зависит от размера
+каталога.
+
+Лучшие упорядочены по байесовскому рейтингу: средняя оценка
+произведения, к которой добавлено LEADERBOARD_PRIOR_REVIEWS оценок,
+равных средней по каталогу, -- у произведения с парой отзывов рейтинг
+близок к среднему. Популярные сейчас -- по активности, умноженной на
+байесовский рейтинг. Активность (Title.activity) -- число новых отзывов,
+вес каждого из которых уменьшается вдвое каждые TRENDING_HALF_LIFE_HOURS
+часов.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import ExpressionWrapper, F, FloatField, Sum
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from .models import (Category, Genre, GenreTitle, Ranking, RankingRefresh,
+                     Review, Title)
+
+GLOBAL_SCOPE = ''
+# Активность меньше этого значения считается нулевой.
+MIN_ACTIVITY = 0.01
+
+
+def category_scope(category_id):
+    return f'category:{category_id}'
+
+
+def genre_scope(genre_id):
+    return f'genre:{genre_id}'
+
+
+def decay(seconds):
+    """Во сколько раз уменьшается вес отзыва за `seconds` секунд."""
+    return 0.5 ** (seconds / (settings.TRENDING_HALF_LIFE_HOURS * 3600))
+
+
+def scope_titles(scope):
+    titles = Title.objects.all()
+
+    if scope.startswith('category:'):
+        return titles.filter(category_id=scope.split(':')[1])
+    if scope.startswith('genre:'):
+        return titles.filter(genretitles__genre_id=scope.split(':')[1])
+
+    return titles
+
+
+def all_scopes():
+    return {
+        GLOBAL_SCOPE,
+        *map(category_scope, Category.objects.values_list('pk', flat=True)),
+        *map(genre_scope, Genre.objects.values_list('pk', flat=True)),
+    }
+
+
+def changed_scopes(since):
+    """Таблицы, в которых могли поменяться места после `since`.
+
+    Это таблицы категорий и жанров произведений, изменённых с тех пор
+    (новый отзыв тоже меняет updated_at), и таблицы, где эти
+    произведения стояли раньше, -- на случай смены категории или жанров.
+    """
+    changed = Title.objects.filter(updated_at__gt=since).values('pk')
+
+    return {
+        GLOBAL_SCOPE,
+        *map(category_scope, Title.objects.filter(
+            pk__in=changed, category__isnull=False
+        ).values_list('category_id', flat=True).distinct()),
+        *map(genre_scope, GenreTitle.objects.filter(
+            title__in=changed
+        ).values_list('genre_id', flat=True).distinct()),
+        *Ranking.objects.filter(title__in=changed).values_list(
+            'scope', flat=True).distinct(),
+    }
+
+
+def bayesian_rating():
+    """Байесовский рейтинг произведения как выражение SQL."""
+    totals = Title.objects.aggregate(
+        score=Sum('rating_sum'), count=Sum('rating_count'))
+    mean = totals['score'] / totals['count'] if totals['count'] else 0
+    prior = settings.LEADERBOARD_PRIOR_REVIEWS
+
+    return ExpressionWrapper(
+        (Cast('rating_sum', FloatField()) + prior * mean)
+        / (F('rating_count') + prior),
+        output_field=FloatField()
+    )
+
+
+def update_activity(since, now, last):
+    """Сдвигает активность к моменту `now` и добавляет новые отзывы."""
+    titles = Title.objects.filter(activity__gt=0)
+
+    if last is None:
+        titles.update(activity=0)
+    else:
+        titles.update(activity=F('activity') * decay(
+            (now - last).total_seconds()))
+        titles.filter(activity__lt=MIN_ACTIVITY).update(activity=0)
+
+    added = defaultdict(float)
+    reviews = Review.objects.filter(
+        pub_date__gt=since, pub_date__lte=now, title__isnull=False
+    ).values_list('title_id', 'pub_date')
+
+    for title_id, pub_date in reviews.iterator():
+        added[title_id] += decay((now - pub_date).total_seconds())
+
+    titles = Title.objects.only('activity').in_bulk(list(added))
+    for title in titles.values():
+        title.activity += added[title.pk]
+    Title.objects.bulk_update(titles.values(), ('activity',),
+                              batch_size=1000)
+
+    return len(added)
+
+
+def rank(board, scope, score):
+    titles = scope_titles(scope)
+
+    if board == Ranking.TOP:
+        titles = titles.filter(rating_count__gt=0)
+    else:
+        titles = titles.filter(activity__gt=0)
+
+    rows = titles.annotate(score=score).order_by('-score', 'pk').values_list(
+        'pk', 'score')[:settings.LEADERBOARD_SIZE]
+
+    Ranking.objects.filter(board=board, scope=scope).delete()
+    Ranking.objects.bulk_create([
+        Ranking(board=board, scope=scope, position=position,
+                title_id=title_id, score=value)
+        for position, (title_id, value) in enumerate(rows, start=1)
+    ])
+
+
+def refresh(full=False):
+    """Пересчитывает таблицы лидеров.
+
+    Без `full` места пересчитываются только в таблицах, затронутых
+    изменениями с прошлого пересчёта, и в таблицах популярных, где
+    активность произведения затухла до нуля; очки популярности в
+    остальных таблицах просто уменьшаются вместе с активностью. Средняя
+    оценка по каталогу в них обновится при следующем полном пересчёте.
+    """
+    with transaction.atomic():
+        # Блокировка строки не даёт двум пересчётам учесть одни и те же
+        # отзывы дважды.
+        now = timezone.now()
+        last = RankingRefresh.objects.select_for_update().values_list(
+            'refreshed_at', flat=True).first()
+        full = full or last is None
+        since = last
+
+        if full:
+            since = now - timedelta(days=settings.TRENDING_WINDOW_DAYS)
+            last = None
+
+        active = update_activity(since, now, last)
+        rating = bayesian_rating()
+        boards = {
+            Ranking.TOP: rating,
+            Ranking.TRENDING: ExpressionWrapper(
+                F('activity') * rating / 10, output_field=FloatField()),
+        }
+
+        if full:
+            scopes = all_scopes()
+            Ranking.objects.exclude(scope__in=scopes).delete()
+        else:
+            # Уменьшаясь, очки не доходят до нуля, поэтому произведение
+            # с затухшей активностью убирается только пересчётом.
+            scopes = changed_scopes(since) | set(Ranking.objects.filter(
+                board=Ranking.TRENDING, title__activity__lte=0
+            ).values_list('scope', flat=True).distinct())
+            Ranking.objects.filter(board=Ranking.TRENDING).exclude(
+                scope__in=scopes
+            ).update(score=F('score') * decay((now - since).total_seconds()))
+
+        for scope in scopes:
+            for board, score in boards.items():
+                rank(board, scope, score)
+
+        RankingRefresh.objects.all().delete()
+        RankingRefresh.objects.create(refreshed_at=now, full=full)
+
+    return {'full': full, 'scopes': len(scopes), 'active_titles': active}
@@ -0,0 +1,219 @@
+"""Generate a synthetic data set."""
+import random
+import time
+from datetime import timedelta
+from itertools import accumulate, islice
+from math import gcd
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from reviews.helpers import keep_auto_dates, reset_sequences
+from reviews.models import Category, Comment, Genre, GenreTitle, Review, Title
+from reviews.search import index_titles
+from users.models import User
+
+MODELS = (User, Category, Genre, Title, GenreTitle, Review, Comment)
+ROLES = ((User.ADMIN, 0.01), (User.MODER, 0.04), (User.USER, 0.95))
+DATE_RANGE = timedelta(days=365)
+COUNTS = ('users', 'categories', 'genres', 'titles', 'reviews', 'comments')
+
+
+class Command(BaseCommand):
+    """Fill the database with a seeded synthetic catalogue."""
+
+    help = (
+        'Generate users, categories, genres, titles, reviews and comments '
+        'with bulk inserts. The same --seed gives the same data set.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=30)
+        parser.add_argument('--titles', type=int, default=10000)
+        parser.add_argument('--reviews', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=100000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        self.validate(options)
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+
+        self.start = {
+            model: (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+            for model in MODELS
+        }
+        self.ids = {}
+
+        self.insert(User, self.users(options['users']))
+        self.insert(Category, self.named(
+            Category, 'Категория', 'category', options['categories']))
+        self.insert(Genre, self.named(
+            Genre, 'Жанр', 'genre', options['genres']))
+        self.insert(Title, self.titles(options['titles']))
+        self.insert(GenreTitle, self.genre_titles())
+        self.insert(Review, self.reviews(options['reviews']),
+                    dates=('pub_date', 'updated_at'))
+        self.insert(Comment, self.comments(options['comments']),
+                    dates=('pub_date', 'updated_at'))
+
+        reset_sequences(MODELS)
+        new_titles = Title.objects.filter(pk__gte=self.start[Title])
+        new_titles.rebuild_ratings()
+        index_titles(new_titles)
+        self.stdout.write(self.style.SUCCESS('Data generated'))
+
+    @staticmethod
+    def validate(options):
+        for name in COUNTS:
+            if options[name] < 0:
+                raise CommandError(f'--{name} must not be negative.')
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be positive.')
+        if options['reviews'] > options['users'] * options['titles']:
+            raise CommandError(
+                'Every user can review a title only once: '
+                '--reviews must not exceed --users * --titles.'
+            )
+        if options['comments'] and not options['reviews']:
+            raise CommandError('Comments need at least one review.')
+
+    def insert(self, model, objects, dates=()):
+        started = time.monotonic()
+        count = 0
+
+        with transaction.atomic(), keep_auto_dates(model, dates):
+            while True:
+                batch = list(islice(objects, self.batch_size))
+
+                if not batch:
+                    break
+                model.objects.bulk_create(batch)
+                count += len(batch)
+
+        self.ids[model] = range(self.start[model], self.start[model] + count)
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(
+            f'{model._meta.verbose_name_plural}: {count} rows, '
+            f'{count / elapsed:.0f} rows/s'
+        )
+
+    def date(self):
+        return self.now - DATE_RANGE * self.random.random()
+
+    def users(self, count):
+        roles, weights = zip(*ROLES)
+        password = make_password(None)
+
+        for pk in range(self.start[User], self.start[User] + count):
+            yield User(
+                pk=pk,
+                username=f'user{pk}',
+                email=f'user{pk}@yamdb.fake',
+                password=password,
+                role=self.random.choices(roles, weights)[0],
+            )
+
+    def named(self, model, name, slug, count):
+        for pk in range(self.start[model], self.start[model] + count):
+            yield model(pk=pk, name=f'{name} {pk}', slug=f'{slug}-{pk}')
+
+    def titles(self, count):
+        categories = self.ids[Category]
+
+        for pk in range(self.start[Title], self.start[Title] + count):
+            yield Title(
+                pk=pk,
+                name=f'Произведение {pk}',
+                year=self.random.randint(1900, self.now.year),
+                description=f'Описание произведения {pk}',
+                category_id=(self.random.choice(categories)
+                             if categories else None),
+            )
+
+    def genre_titles(self):
+        genres = self.ids[Genre]
+        pk = self.start[GenreTitle]
+
+        if not genres:
+            return
+
+        for title_id in self.ids[Title]:
+            for genre_id in self.random.sample(
+                    genres, min(len(genres), self.random.randint(1, 3))):
+                yield GenreTitle(pk=pk, title_id=title_id, genre_id=genre_id)
+                pk += 1
+
+    def reviews(self, count):
+        """Популярность произведений убывает по закону Ципфа.
+
+        Авторы отзывов на произведение идут по своей для него случайной
+        перестановке пользователей, а произведения, на которые ответили
+        все, выбывают из розыгрыша. Пары (автор, произведение) не
+        повторяются без повторных попыток, поэтому генерация не
+        замедляется, даже если отзывов почти --users * --titles.
+        """
+        titles, users = self.ids[Title], self.ids[User]
+        authors = {}
+        pk = self.start[Review]
+        remaining = list(range(len(titles)))
+
+        while count:
+            weights = list(accumulate(1 / (index + 1) for index in remaining))
+
+            for index in self.random.choices(
+                    remaining, cum_weights=weights, k=count):
+                step, offset, written = authors.get(index) or (
+                    self.permutation(len(users)))
+
+                if written == len(users):
+                    continue
+                authors[index] = (step, offset, written + 1)
+                pub_date = self.date()
+                yield Review(
+                    pk=pk,
+                    title_id=titles[index],
+                    author_id=users[(step * written + offset) % len(users)],
+                    text=f'Отзыв {pk}',
+                    score=min(10, max(1, round(self.random.gauss(7, 2)))),
+                    pub_date=pub_date,
+                    updated_at=pub_date,
+                )
+                pk += 1
+                count -= 1
+
+            remaining = [index for index in remaining
+                         if authors.get(index, (0, 0, 0))[2] < len(users)]
+
+    def permutation(self, size):
+        """(шаг, сдвиг, 0): `шаг * i + сдвиг` по модулю `size` обходит
+        все индексы от 0 до size - 1 без повторов."""
+        step = 1
+
+        while size > 1:
+            step = self.random.randrange(1, size)
+
+            if gcd(step, size) == 1:
+                break
+
+        return step, self.random.randrange(size), 0
+
+    def comments(self, count):
+        reviews, users = self.ids[Review], self.ids[User]
+
+        for pk in range(self.start[Comment], self.start[Comment] + count):
+            pub_date = self.date()
+            yield Comment(
+                pk=pk,
+                review_id=self.random.choice(reviews),
+                author_id=self.random.choice(users),
+                text=f'Комментарий {pk}',
+                pub_date=pub_date,
+                updated_at=pub_date,
+            )
@@ -1,10 +1,73 @@
 """Filler."""
+import os
+import time
+from collections import namedtuple
 from csv import DictReader
+from io import StringIO
+from itertools import islice
 
-from django.core.management.base import BaseCommand
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import UniqueConstraint
+from reviews.helpers import chunks, keep_auto_dates, reset_sequences
 from reviews.models import Category, Comment, Genre, GenreTitle, Review, Title
+from reviews.search import index_titles
 from users.models import User
 
+# Внешние ключи пакета проверяются запросами `pk__in` не длиннее этого.
+FK_CHECK_SIZE = 500
+
+Table = namedtuple('Table', ('filename', 'model', 'columns', 'foreign_keys'))
+
+TABLES = (
+    Table('users.csv', User, {
+        'id': 'id', 'username': 'username', 'email': 'email',
+        'role': 'role', 'bio': 'bio', 'first_name': 'first_name',
+        'last_name': 'last_name',
+    }, {}),
+    Table('category.csv', Category, {
+        'id': 'id', 'name': 'name', 'slug': 'slug',
+    }, {}),
+    Table('genre.csv', Genre, {
+        'id': 'id', 'name': 'name', 'slug': 'slug',
+    }, {}),
+    Table('titles.csv', Title, {
+        'id': 'id', 'name': 'name', 'year': 'year',
+        'category_id': 'category',
+    }, {'category_id': Category}),
+    Table('genre_title.csv', GenreTitle, {
+        'id': 'id', 'title_id': 'title_id', 'genre_id': 'genre_id',
+    }, {'title_id': Title, 'genre_id': Genre}),
+    Table('review.csv', Review, {
+        'id': 'id', 'title_id': 'title_id', 'text': 'text',
+        'author_id': 'author', 'score': 'score', 'pub_date': 'pub_date',
+    }, {'title_id': Title, 'author_id': User}),
+    Table('comments.csv', Comment, {
+        'id': 'id', 'review_id': 'review_id', 'text': 'text',
+        'author_id': 'author', 'pub_date': 'pub_date',
+    }, {'review_id': Review, 'author_id': User}),
+)
+
+
+def unique_sets(model):
+    """Наборы столбцов, значения которых не могут повторяться."""
+    opts = model._meta
+    sets = [(field.attname,) for field in opts.concrete_fields
+            if field.unique]
+    sets.extend(
+        tuple(opts.get_field(name).attname for name in constraint.fields)
+        for constraint in opts.constraints
+        if isinstance(constraint, UniqueConstraint)
+        and constraint.condition is None
+    )
+    sets.extend(
+        tuple(opts.get_field(name).attname for name in fields)
+        for fields in opts.unique_together
+    )
+
+    return sets
+
 
 class Command(BaseCommand):
     """Importing csv file in local db."""
@@ -15,102 +78,217 @@ class Command(BaseCommand):
         + ' title.csv and user.csv'
     )
 
-    def handle(self, *args, **option):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default='./static/data/',
+            help='Directory with csv files.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Rows per INSERT/COPY batch.'
+        )
+        parser.add_argument(
+            '--method',
+            choices=('auto', 'bulk', 'copy'),
+            default='auto',
+            help='bulk_create, PostgreSQL COPY, or COPY when available.'
+        )
+
+    def handle(self, *args, **options):
         """Filler."""
-        print("Loading DB data")
-
-        for row in DictReader(open('./static/data/users.csv')):
-            user = User.objects.get_or_create(
-                pk=row['id'],
-                username=row['username'],
-                email=row['email'],
-                role=row['role'],
-                bio=row['bio'],
-                first_name=row['first_name'],
-                last_name=row['last_name']
-            )
-            print(user)
+        self.batch_size = options['batch_size']
+        self.verbosity = options['verbosity']
 
-        print('Users done..')
+        if self.batch_size <= 0:
+            raise CommandError('--batch-size must be positive.')
 
-        for row in DictReader(open('./static/data/category.csv')):
-            category = Category.objects.get_or_create(
-                pk=row['id'],
-                name=row['name'],
-                slug=row['slug']
-            )
-            print(category)
+        method = options['method']
+        if method == 'auto':
+            method = 'copy' if connection.vendor == 'postgresql' else 'bulk'
+        if method == 'copy' and connection.vendor != 'postgresql':
+            raise CommandError('COPY is only available on PostgreSQL.')
+        self.write_batch = getattr(self, f'{method}_batch')
 
-        print('Categories done..')
+        self.stdout.write(f'Loading DB data ({method})')
 
-        for row in DictReader(open('./static/data/genre.csv')):
-            genre = Genre.objects.get_or_create(
-                pk=row['id'],
-                name=row['name'],
-                slug=row['slug']
-            )
-            print(genre)
-
-        print('Genres done..')
-
-        for row in DictReader(open(
-            './static/data/titles.csv',
-            encoding='utf-8'
-        )):
-            title = Title.objects.get_or_create(
-                pk=row['id'],
-                name=row['name'],
-                year=row['year'],
-                category=Category.objects.get(pk=row['category'])
-            )
-#            title = Title.objects.get(pk=row['id'])
-#            for rows in DictReader(open('./static/data/genre_title.csv')):
-#                if rows['title_id'] == row['id']:
-#                    title.genre.get_or_create(
-#                        name=Genre.objects.get(pk=rows['genre_id'])
-#                    )
-
-            print(title)
-
-        print('Tiltes done..')
-
-        for row in DictReader(open('./static/data/genre_title.csv')):
-            genre_title = GenreTitle.objects.get_or_create(
-                pk=row['id'],
-                genre=Genre.objects.get(pk=row['genre_id']),
-                title=Title.objects.get(pk=row['title_id'])
+        for table in TABLES:
+            path = os.path.join(options['path'], table.filename)
+            with open(path, encoding='utf-8', newline='') as csv_file:
+                self.import_table(table, DictReader(csv_file), path)
+
+        reset_sequences([table.model for table in TABLES])
+        Title.objects.rebuild_ratings()
+        index_titles(Title.objects.all())
+        self.stdout.write(self.style.SUCCESS('DB filled'))
+
+    def import_table(self, table, reader, path):
+        model = table.model
+        objects = self.build_objects(table, reader, path)
+        self.skipped = 0
+        total = 0
+        started = time.monotonic()
+
+        with transaction.atomic(), keep_auto_dates(model, table.columns):
+            self.begin_table(model)
+            while True:
+                batch = list(islice(objects, self.batch_size))
+
+                if not batch:
+                    break
+                batch = self.drop_duplicates(
+                    table, self.drop_orphans(table, batch))
+                if batch:
+                    self.write_batch(model, batch)
+                total += len(batch)
+                self.report(model, total, started)
+
+        self.report(model, total, started, skipped=self.skipped)
+
+    def build_objects(self, table, reader, path):
+        """Строки файла в объекты модели, без запросов к БД.
+
+        Значения приводятся полями модели; на битой строке импорт
+        останавливается с именем файла и номером строки.
+        """
+        fields = {attname: table.model._meta.get_field(attname)
+                  for attname in table.columns}
+
+        for row in reader:
+            try:
+                values = {}
+                for attname, field in fields.items():
+                    value = row[table.columns[attname]]
+                    if attname in table.foreign_keys:
+                        value = value or None
+                    values[attname] = field.to_python(value)
+            except KeyError as error:
+                raise CommandError(f'{path}: no column {error}.')
+            except ValidationError as error:
+                raise CommandError(
+                    f'{path}, line {reader.line_num}: '
+                    f'{"; ".join(error.messages)}')
+
+            yield table.model(**values)
+
+    def drop_orphans(self, table, batch):
+        """Объекты пакета, все внешние ключи которых есть в БД.
+
+        Ключи проверяются запросами по пакету, а не множеством всех
+        первичных ключей таблиц в памяти.
+        """
+        for attname, model in table.foreign_keys.items():
+            ids = {getattr(obj, attname) for obj in batch} - {None}
+            known = set()
+
+            for chunk in chunks(ids, FK_CHECK_SIZE):
+                known.update(model.objects.filter(
+                    pk__in=chunk).values_list('pk', flat=True))
+            kept = [obj for obj in batch
+                    if getattr(obj, attname) is None
+                    or getattr(obj, attname) in known]
+            self.skipped += len(batch) - len(kept)
+            batch = kept
+
+        return batch
+
+    def drop_duplicates(self, table, batch):
+        """Объекты пакета, которые не нарушат ключ или ограничение
+        уникальности ни строкой в БД, ни строкой выше в пакете.
+
+        Пакет вставляется без ignore_conflicts, поэтому каждая
+        пропущенная строка попадает в счётчик `skipped`.
+        """
+        for attnames in unique_sets(table.model):
+            existing = set()
+
+            for chunk in chunks(batch, FK_CHECK_SIZE):
+                lookups = {
+                    f'{attname}__in': {getattr(obj, attname) for obj in chunk}
+                    for attname in attnames
+                }
+                existing.update(table.model.objects.filter(
+                    **lookups).values_list(*attnames))
+            kept = []
+
+            for obj in batch:
+                key = tuple(getattr(obj, attname) for attname in attnames)
+
+                if None in key:
+                    kept.append(obj)
+                elif key not in existing:
+                    existing.add(key)
+                    kept.append(obj)
+            self.skipped += len(batch) - len(kept)
+            batch = kept
+
+        return batch
+
+    def report(self, model, total, started, skipped=None):
+        elapsed = max(time.monotonic() - started, 1e-6)
+        message = (
+            f'{model._meta.verbose_name_plural}: {total} rows, '
+            f'{total / elapsed:.0f} rows/s'
+        )
+
+        if skipped is not None:
+            self.stdout.write(
+                self.style.SUCCESS(f'{message}, skipped {skipped}'))
+        elif self.verbosity > 1:
+            self.stdout.write(message)
+
+    def begin_table(self, model):
+        if self.write_batch != self.copy_batch:
+            return
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE {self.staging(model)} '
+                f'(LIKE {model._meta.db_table} INCLUDING DEFAULTS) '
+                'ON COMMIT DROP'
             )
-            print(genre_title)
-
-        print('Genres of titles done..')
-
-        for row in DictReader(open(
-            './static/data/review.csv',
-            encoding='utf-8'
-        )):
-            review = Review.objects.get_or_create(
-                pk=row['id'],
-                title=Title.objects.get(pk=row['title_id']),
-                text=row['text'],
-                author=User.objects.get(pk=row['author']),
-                score=row['score'],
-                pub_date=row['pub_date']
+
+    def bulk_batch(self, model, batch):
+        model.objects.bulk_create(batch)
+
+    def copy_batch(self, model, batch):
+        """COPY во временную таблицу и перенос в таблицу модели."""
+        fields = model._meta.concrete_fields
+        columns = ', '.join(
+            connection.ops.quote_name(field.column) for field in fields
+        )
+        buffer = StringIO()
+
+        for obj in batch:
+            buffer.write(','.join(
+                self.copy_value(field.get_db_prep_save(
+                    field.pre_save(obj, add=True), connection))
+                for field in fields
+            ))
+            buffer.write('\n')
+        buffer.seek(0)
+        staging = self.staging(model)
+
+        with connection.cursor() as cursor:
+            cursor.cursor.copy_expert(
+                f'COPY {staging} ({columns}) FROM STDIN WITH (FORMAT csv)',
+                buffer
             )
-            print(review)
-
-        print('Reviews done..')
-
-        for row in DictReader(open(
-            './static/data/comments.csv',
-            encoding='utf-8'
-        )):
-            comment = Comment.objects.get_or_create(
-                author=User.objects.get(pk=row['author']),
-                review=Review.objects.get(pk=row['review_id']),
-                text=row['text'],
-                pub_date=row['pub_date']
+            cursor.execute(
+                f'INSERT INTO {model._meta.db_table} ({columns}) '
+                f'SELECT {columns} FROM {staging}'
             )
-            print(comment)
+            cursor.execute(f'TRUNCATE {staging}')
+
+    @staticmethod
+    def copy_value(value):
+        if value is None:
+            return ''
+
+        return '"{}"'.format(str(value).replace('"', '""'))
 
-        print('Comments done..')
-        print('DB filled')
+    @staticmethod
+    def staging(model):
+        return f'import_{model._meta.db_table}'
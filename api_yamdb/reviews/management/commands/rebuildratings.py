@@ -0,0 +1,41 @@
+"""Rebuild denormalized title ratings and score histograms."""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    """Recalculate rating and histogram fields of titles from reviews."""
+
+    help = (
+        'Check stored title ratings and score histograms against reviews '
+        'and rebuild them in one grouped pass over reviews. With --check '
+        'only report drift.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report titles with drifted ratings, exit 1 if any.'
+        )
+
+    def handle(self, *args, **options):
+        drifted = list(
+            Title.objects.with_rating_drift().values_list('pk', flat=True)
+        )
+        self.stdout.write(f'Titles with rating drift: {len(drifted)}')
+
+        if drifted:
+            self.stdout.write(', '.join(map(str, drifted)))
+
+        if options['check']:
+            if drifted:
+                raise CommandError('Stored ratings are out of date.')
+
+            return
+
+        with transaction.atomic():
+            updated = Title.objects.rebuild_ratings()
+
+        self.stdout.write(self.style.SUCCESS(f'Ratings rebuilt: {updated}'))
@@ -0,0 +1,57 @@
+# Generated by Django 2.2.16 on 2026-10-18 16:56
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+POSTGRESQL_FORWARD = (
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX title_search_vector_idx ON reviews_title '
+    'USING GIN (search_vector)',
+    'CREATE INDEX title_name_trgm_idx ON reviews_title '
+    'USING GIN (name gin_trgm_ops)',
+    "UPDATE reviews_title SET search_vector = "
+    "setweight(to_tsvector('russian', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(description, '')), 'B')",
+)
+POSTGRESQL_BACKWARD = (
+    'DROP INDEX IF EXISTS title_name_trgm_idx',
+    'DROP INDEX IF EXISTS title_search_vector_idx',
+)
+SQLITE_FORWARD = (
+    'CREATE VIRTUAL TABLE reviews_title_fts USING fts5'
+    "(name, description, tokenize = 'unicode61')",
+    'INSERT INTO reviews_title_fts (rowid, name, description) '
+    "SELECT id, name, coalesce(description, '') FROM reviews_title",
+)
+SQLITE_BACKWARD = (
+    'DROP TABLE IF EXISTS reviews_title_fts',
+)
+
+
+def run_for_vendor(statements):
+    def run(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, ()):
+            schema_editor.execute(sql)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(
+            run_for_vendor({'postgresql': POSTGRESQL_FORWARD,
+                            'sqlite': SQLITE_FORWARD}),
+            run_for_vendor({'postgresql': POSTGRESQL_BACKWARD,
+                            'sqlite': SQLITE_BACKWARD}),
+        ),
+    ]
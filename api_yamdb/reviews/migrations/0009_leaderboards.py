@@ -0,0 +1,54 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:28
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_score_histogram'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Ranking',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(choices=[('top', 'Лучшие'), ('trending', 'Популярные сейчас')], max_length=16, verbose_name='Таблица')),
+                ('scope', models.CharField(blank=True, max_length=32, verbose_name='Раздел')),
+                ('position', models.PositiveIntegerField(verbose_name='Место')),
+                ('score', models.FloatField(verbose_name='Очки')),
+            ],
+            options={
+                'verbose_name': 'Место в таблице лидеров',
+                'verbose_name_plural': 'Места в таблицах лидеров',
+            },
+        ),
+        migrations.CreateModel(
+            name='RankingRefresh',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('refreshed_at', models.DateTimeField(verbose_name='Пересчитано')),
+                ('full', models.BooleanField(default=False, verbose_name='Полный пересчёт')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='activity',
+            field=models.FloatField(default=0, editable=False, verbose_name='Активность'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['pub_date'], name='review_pub_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='ranking',
+            name='title',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='reviews.Title', verbose_name='Произведение'),
+        ),
+        migrations.AddConstraint(
+            model_name='ranking',
+            constraint=models.UniqueConstraint(fields=('board', 'scope', 'position'), name='unique_ranking_position'),
+        ),
+    ]
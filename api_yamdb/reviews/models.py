@@ -1,10 +1,21 @@
+from collections import Counter
+
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
 from users.models import User
 
-from .helpers import year
+from .helpers import chunks, year
 
 MODELS_STR_MAX_LENGTH = 10
+SCORES = range(1, 11)
+# Гистограмма оценок произведения: число отзывов с каждым баллом.
+HISTOGRAM_FIELDS = tuple(f'score_{score}' for score in SCORES)
+# Поля отзыва, учтённые в рейтинге произведения.
+RATED_FIELDS = ('title_id', 'score')
 
 
 class Category(models.Model):
@@ -49,6 +60,108 @@ class Genre(models.Model):
         return self.name[:MODELS_STR_MAX_LENGTH]
 
 
+class TitleQuerySet(models.QuerySet):
+    """Работа с денормализованным рейтингом произведений."""
+
+    def add_review_scores(self, added=(), removed=()):
+        """Учитывает добавленные и снятые оценки одним UPDATE: сумма,
+        количество, рейтинг и гистограмма."""
+        new_sum = F('rating_sum') + (sum(added) - sum(removed))
+        new_count = F('rating_count') + (len(added) - len(removed))
+        histogram = Counter(added)
+        histogram.subtract(removed)
+
+        return self.update(
+            rating_sum=new_sum,
+            rating_count=new_count,
+            rating=ExpressionWrapper(
+                Cast(new_sum, models.FloatField()) / NullIf(new_count, 0),
+                output_field=models.FloatField()
+            ),
+            updated_at=timezone.now(),
+            **{f'score_{score}': F(f'score_{score}') + delta
+               for score, delta in histogram.items() if delta}
+        )
+
+    def rebuild_ratings(self, batch_size=1000):
+        """Пересчитывает рейтинг и гистограмму по таблице отзывов с нуля.
+
+        Все счётчики считаются одним проходом по отзывам с группировкой
+        по произведению и записываются пакетами через bulk_update.
+        """
+        titles = self.order_by()
+        updated = titles.update(
+            rating_sum=0, rating_count=0, rating=None,
+            updated_at=timezone.now(), **dict.fromkeys(HISTOGRAM_FIELDS, 0)
+        )
+        rows = Review.objects.using(self.db).filter(
+            title__in=titles.values('pk')
+        ).order_by('title').values('title').annotate(
+            rating_sum=Sum('score'),
+            rating_count=Count('pk'),
+            **{f'score_{score}': Count('pk', filter=Q(score=score))
+               for score in SCORES}
+        )
+
+        for chunk in chunks(rows.iterator(chunk_size=batch_size), batch_size):
+            self.model.objects.using(self.db).bulk_update([
+                self.model(pk=row.pop('title'),
+                           rating=row['rating_sum'] / row['rating_count'],
+                           **row)
+                for row in chunk
+            ], ('rating_sum', 'rating_count', 'rating', *HISTOGRAM_FIELDS))
+
+        return updated
+
+    def facets(self):
+        """Число произведений выборки по жанрам, категориям и годам.
+
+        Три запроса с группировкой; общее число -- сумма по годам.
+        """
+        titles = self.order_by().prefetch_related(None)
+        years = list(titles.values('year').annotate(
+            count=Count('pk')).order_by('-year'))
+        genres = GenreTitle.objects.filter(
+            title__in=titles.values('pk')
+        ).values_list('genre__slug', 'genre__name').annotate(
+            count=Count('title')).order_by('genre__slug')
+        categories = titles.filter(category__isnull=False).values_list(
+            'category__slug', 'category__name'
+        ).annotate(count=Count('pk')).order_by('category__slug')
+
+        return {
+            'count': sum(year['count'] for year in years),
+            'genre': [{'slug': slug, 'name': name, 'count': count}
+                      for slug, name, count in genres],
+            'category': [{'slug': slug, 'name': name, 'count': count}
+                         for slug, name, count in categories],
+            'year': years,
+        }
+
+    def with_rating_drift(self):
+        """Произведения, у которых сохранённый рейтинг или гистограмма
+        разошлись с отзывами."""
+        return self.annotate(
+            actual_sum=Coalesce(Sum('reviews__score'), 0),
+            actual_count=Count('reviews'),
+            **{f'actual_score_{score}': Count(
+                'reviews', filter=Q(reviews__score=score))
+               for score in SCORES}
+        ).exclude(
+            rating_sum=F('actual_sum'),
+            rating_count=F('actual_count'),
+            **{field: F(f'actual_{field}') for field in HISTOGRAM_FIELDS}
+        )
+
+
+def histogram_field(score):
+    return models.PositiveIntegerField(
+        verbose_name=f'Оценок {score}',
+        default=0,
+        editable=False
+    )
+
+
 class Title(models.Model):
     """DB model for titles."""
 
@@ -83,15 +196,68 @@ class Title(models.Model):
         related_name='titles',
         null=True
     )
+    rating_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0,
+        editable=False
+    )
+    rating_count = models.PositiveIntegerField(
+        verbose_name='Количество оценок',
+        default=0,
+        editable=False
+    )
+    rating = models.FloatField(
+        verbose_name='Рейтинг',
+        null=True,
+        blank=True,
+        editable=False
+    )
+    score_1 = histogram_field(1)
+    score_2 = histogram_field(2)
+    score_3 = histogram_field(3)
+    score_4 = histogram_field(4)
+    score_5 = histogram_field(5)
+    score_6 = histogram_field(6)
+    score_7 = histogram_field(7)
+    score_8 = histogram_field(8)
+    score_9 = histogram_field(9)
+    score_10 = histogram_field(10)
+    # Новые отзывы с убывающим весом, см. reviews/leaderboards.py.
+    activity = models.FloatField(
+        verbose_name='Активность',
+        default=0,
+        editable=False
+    )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+        db_index=True
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
 
+        # Фильтры TitleFilter по году и категории с сортировкой по id.
+        indexes = (models.Index(fields=('year', 'id'),
+                                name='title_year_idx'),
+                   models.Index(fields=('category', 'id'),
+                                name='title_category_idx'))
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
 
     def __str__(self):
         return self.name[:MODELS_STR_MAX_LENGTH]
 
+    @property
+    def histogram(self):
+        """Число отзывов с каждым баллом от 1 до 10."""
+        return {score: getattr(self, f'score_{score}') for score in SCORES}
+
 
 class GenreTitle(models.Model):
     """DB model for many to many relation for Genre and Title models."""
@@ -109,6 +275,11 @@ class GenreTitle(models.Model):
 
     class Meta:
 
+        constraints = (models.UniqueConstraint(fields=('title', 'genre'),
+                                               name='unique_genre_title'),)
+        # Фильтр произведений по жанру идёт от жанра к произведениям.
+        indexes = (models.Index(fields=('genre', 'title'),
+                                name='genretitle_genre_title_idx'),)
         verbose_name = 'ganretitle'
         verbose_name_plural = 'ganretitles'
 
@@ -140,17 +311,93 @@ class Review(models.Model):
         'Creation date',
         auto_now_add=True,
     )
+    updated_at = models.DateTimeField(
+        'Modification date',
+        auto_now=True,
+    )
 
     class Meta:
 
         constraints = (models.UniqueConstraint(fields=('author', 'title'),
                                                name='unique_review'),)
+        indexes = (models.Index(fields=('title', 'pub_date', 'id'),
+                                name='review_title_pub_date_idx'),
+                   models.Index(fields=('title', 'updated_at'),
+                                name='review_title_updated_at_idx'),
+                   # Новые отзывы для активности в таблицах лидеров.
+                   models.Index(fields=('pub_date',),
+                                name='review_pub_date_idx'))
         verbose_name = "Review"
         verbose_name_plural = "Reviews"
 
     def __str__(self):
         return self.text[:MODELS_STR_MAX_LENGTH]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_rating()
+
+        return instance
+
+    def _remember_rating(self):
+        """Запоминает оценку, уже учтённую в рейтинге произведения.
+
+        Если title_id или score не загружены (.only(), .defer()), оценка
+        неизвестна (None) и будет прочитана из БД перед изменением.
+        """
+        if self.get_deferred_fields().intersection(RATED_FIELDS):
+            self._rated = None
+        else:
+            self._rated = (self.title_id, self.score)
+
+    def get_rated(self, using=None):
+        """(title_id, score), учтённые в рейтинге произведения."""
+        if getattr(self, '_rated', (None, None)) is None:
+            self._rated = Review.objects.using(
+                using or self._state.db
+            ).filter(pk=self.pk).values_list(*RATED_FIELDS).first() or (
+                None, None)
+
+        return getattr(self, '_rated', (None, None))
+
+    def save(self, *args, **kwargs):
+        """Сохраняет отзыв и рейтинг произведения в одной транзакции."""
+        update_fields = kwargs.get('update_fields')
+
+        with transaction.atomic(using=kwargs.get('using')):
+            old_title_id, old_score = self.get_rated(kwargs.get('using'))
+            super().save(*args, **kwargs)
+
+            if (update_fields is None
+                    or {'score', 'title', 'title_id'} & set(update_fields)):
+                self._update_title_rating(old_title_id, old_score)
+
+        self._remember_rating()
+
+    def _update_title_rating(self, old_title_id, old_score):
+        titles = Title.objects.using(self._state.db)
+
+        if old_title_id == self.title_id:
+            if (self.title_id is not None and old_score is not None
+                    and old_score != self.score):
+                titles.filter(pk=self.title_id).add_review_scores(
+                    added=[self.score], removed=[old_score])
+
+            return
+
+        if old_title_id is not None and old_score is not None:
+            titles.filter(pk=old_title_id).add_review_scores(
+                removed=[old_score])
+
+        if (self.title_id is not None
+                and not titles.filter(pk=self.title_id).add_review_scores(
+                    added=[self.score])):
+            # Отзыв без произведения не переживёт проверку внешнего ключа
+            # при коммите, сообщаем об этом сразу.
+            raise Title.DoesNotExist(
+                f'Title with pk={self.title_id} does not exist.')
+
 
 class Comment(models.Model):
     """DB model for comments."""
@@ -172,11 +419,78 @@ class Comment(models.Model):
         'Creation date',
         auto_now_add=True,
     )
+    updated_at = models.DateTimeField(
+        'Modification date',
+        auto_now=True,
+    )
 
     class Meta:
 
+        indexes = (models.Index(fields=('review', 'pub_date', 'id'),
+                                name='comment_review_pub_date_idx'),
+                   models.Index(fields=('review', 'updated_at'),
+                                name='comment_review_updated_at_idx'))
         verbose_name = "Comment"
         verbose_name_plural = "Comments"
 
     def __str__(self):
         return self.text[:MODELS_STR_MAX_LENGTH]
+
+
+class Ranking(models.Model):
+    """Место произведения в таблице лидеров (reviews/leaderboards.py).
+
+    `scope` -- пустая строка для всего каталога, `category:<id>` или
+    `genre:<id>`.
+    """
+
+    TOP = 'top'
+    TRENDING = 'trending'
+    BOARDS = (
+        (TOP, 'Лучшие'),
+        (TRENDING, 'Популярные сейчас'),
+    )
+
+    board = models.CharField(
+        verbose_name='Таблица',
+        max_length=16,
+        choices=BOARDS
+    )
+    scope = models.CharField(
+        verbose_name='Раздел',
+        max_length=32,
+        blank=True
+    )
+    position = models.PositiveIntegerField(
+        verbose_name='Место'
+    )
+    title = models.ForeignKey(
+        Title,
+        verbose_name='Произведение',
+        on_delete=models.CASCADE,
+        related_name='rankings'
+    )
+    score = models.FloatField(
+        verbose_name='Очки'
+    )
+
+    class Meta:
+
+        constraints = (models.UniqueConstraint(
+            fields=('board', 'scope', 'position'),
+            name='unique_ranking_position'),)
+        verbose_name = 'Место в таблице лидеров'
+        verbose_name_plural = 'Места в таблицах лидеров'
+
+
+class RankingRefresh(models.Model):
+    """Время последнего пересчёта таблиц лидеров; к нему приведена
+    активность произведений."""
+
+    refreshed_at = models.DateTimeField(
+        verbose_name='Пересчитано'
+    )
+    full = models.BooleanField(
+        verbose_name='Полный пересчёт',
+        default=False
+    )
@@ -0,0 +1,123 @@
+"""Полнотекстовый поиск по произведениям.
+
+На PostgreSQL используется колонка `Title.search_vector` (tsvector с
+GIN-индексом) и триграммный индекс по названию, на SQLite -- таблица
+FTS5 `reviews_title_fts`. Индекс обновляется при сохранении и удалении
+произведения (reviews/signals.py).
+"""
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector, TrigramSimilarity)
+from django.db import connections
+from django.db.models import F, FloatField, Func, Q
+from django.db.models.expressions import RawSQL
+
+SEARCH_CONFIG = 'russian'
+FTS_TABLE = 'reviews_title_fts'
+
+
+class FtsMatch(RawSQL):
+    """rowid строк FTS5, совпавших с запросом, -- подзапрос для `pk__in`."""
+
+    def __init__(self, query):
+        super().__init__(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            [query])
+
+    def as_sql(self, compiler, connection):
+        # Lookup `in` сам заключает подзапрос в скобки.
+        return self.sql, self.params
+
+
+class FtsRank(Func):
+    """bm25 произведения `expression` по запросу (меньше -- выше).
+
+    Совпадения ранжируются один раз в подзапросе с LIMIT -1, который
+    SQLite не встраивает во внешний запрос: иначе MATCH выполнялся бы
+    заново для каждой строки.
+    """
+
+    template = (
+        '(SELECT fts_rank FROM (SELECT rowid AS fts_rowid, '
+        f'bm25({FTS_TABLE}, 10.0, 1.0) AS fts_rank FROM {FTS_TABLE} '
+        f'WHERE {FTS_TABLE} MATCH %%s LIMIT -1) '
+        'WHERE fts_rowid = %(expressions)s)'
+    )
+    output_field = FloatField()
+
+    def __init__(self, expression, query):
+        super().__init__(expression)
+        self.query = query
+
+    def as_sql(self, compiler, connection, **extra_context):
+        sql, params = super().as_sql(compiler, connection, **extra_context)
+
+        return sql, [self.query, *params]
+
+
+def title_vector():
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('description', weight='B', config=SEARCH_CONFIG)
+    )
+
+
+def index_titles(queryset):
+    """Обновляет поисковый индекс для произведений из выборки."""
+    vendor = connections[queryset.db].vendor
+
+    if vendor == 'postgresql':
+        queryset.update(search_vector=title_vector())
+    elif vendor == 'sqlite':
+        rows = queryset.values_list('pk', 'name', 'description')
+        with connections[queryset.db].cursor() as cursor:
+            cursor.executemany(
+                f'INSERT OR REPLACE INTO {FTS_TABLE} '
+                '(rowid, name, description) VALUES (%s, %s, %s)',
+                [(pk, name, description or '')
+                 for pk, name, description in rows]
+            )
+
+
+def unindex_title(pk, using):
+    if connections[using].vendor == 'sqlite':
+        with connections[using].cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [pk])
+
+
+def fts_query(text):
+    """Экранирует ввод пользователя для MATCH, слова ищутся по префиксу."""
+    return ' '.join(
+        '"{}"*'.format(word.replace('"', '""')) for word in text.split()
+    )
+
+
+def search_titles(queryset, text):
+    """Отбирает произведения по запросу и сортирует по релевантности."""
+    text = text.strip()
+
+    if not text:
+        return queryset
+
+    vendor = connections[queryset.db].vendor
+
+    if vendor == 'postgresql':
+        query = SearchQuery(text, config=SEARCH_CONFIG)
+
+        return queryset.annotate(
+            search_rank=(SearchRank(F('search_vector'), query)
+                         + TrigramSimilarity('name', text))
+        ).filter(
+            Q(search_vector=query) | Q(name__trigram_similar=text)
+        ).order_by('-search_rank', 'id')
+
+    if vendor == 'sqlite':
+        # Отбор и ранг -- подзапросы к FTS5 в том же запросе: фильтры,
+        # COUNT и LIMIT/OFFSET считаются по всем совпадениям.
+        query = fts_query(text)
+
+        return queryset.filter(pk__in=FtsMatch(query)).order_by(
+            FtsRank('pk', query).asc(), 'id')
+
+    return queryset.filter(
+        Q(name__icontains=text) | Q(description__icontains=text)
+    )
@@ -0,0 +1,32 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import Review, Title
+from .search import index_titles, unindex_title
+
+
+@receiver(pre_delete, sender=Review)
+def load_review_rating(sender, instance, using, **kwargs):
+    """Дочитывает оценку отзыва, загруженного без неё, пока он в БД."""
+    instance.get_rated(using)
+
+
+@receiver(post_delete, sender=Review)
+def remove_review_from_rating(sender, instance, using, **kwargs):
+    """Вычитает удалённый отзыв из рейтинга, в том числе при каскаде."""
+    title_id, score = instance.get_rated(using)
+
+    if title_id is not None and score is not None:
+        Title.objects.using(using).filter(pk=title_id).add_review_scores(
+            removed=[score])
+
+
+@receiver(post_save, sender=Title)
+def update_search_index(sender, instance, using, raw, **kwargs):
+    if not raw:
+        index_titles(Title.objects.using(using).filter(pk=instance.pk))
+
+
+@receiver(post_delete, sender=Title)
+def remove_from_search_index(sender, instance, using, **kwargs):
+    unindex_title(instance.pk, using)
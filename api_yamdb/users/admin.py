@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 
-from .models import User
+from .models import OutboxEmail, User
 
 
 class MyUserAdmin(UserAdmin):
@@ -16,3 +16,11 @@ class MyUserAdmin(UserAdmin):
 
 
 admin.site.register(User, MyUserAdmin)
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ('id', 'recipient', 'subject', 'created_at',
+                    'attempts', 'sent_at')
+    list_filter = ('sent_at',)
+    search_fields = ('recipient',)
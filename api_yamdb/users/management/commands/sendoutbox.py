@@ -0,0 +1,111 @@
+"""Deliver queued emails."""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from users.models import OutboxEmail
+
+
+def retry_delay(attempts):
+    """Экспоненциальная задержка перед следующей попыткой."""
+    return timedelta(seconds=min(
+        settings.OUTBOX_RETRY_DELAY * 2 ** (attempts - 1),
+        settings.OUTBOX_MAX_RETRY_DELAY,
+    ))
+
+
+class Command(BaseCommand):
+    """Send pending outbox emails over one mail connection per batch."""
+
+    help = (
+        'Send pending emails from the outbox in batches. Failed emails are '
+        'retried with exponential backoff up to OUTBOX_MAX_ATTEMPTS times. '
+        'With --loop keep polling the outbox.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep running and poll the outbox every --interval seconds.')
+        parser.add_argument('--interval', type=float, default=5)
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = self.send_batch(options['batch_size'])
+
+            if sent or failed:
+                self.stdout.write(f'Sent: {sent}, failed: {failed}')
+
+            if sent + failed == options['batch_size']:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def send_batch(self, batch_size):
+        # Строки заблокированы до конца отправки, параллельные воркеры
+        # берут следующие (skip_locked) и не шлют одно письмо дважды.
+        with transaction.atomic():
+            emails = list(
+                OutboxEmail.objects.pending(settings.OUTBOX_MAX_ATTEMPTS)
+                .select_for_update(skip_locked=True)[:batch_size]
+            )
+
+            if not emails:
+                return 0, 0
+
+            sent = failed = 0
+            connection = get_connection()
+
+            if not self.open(connection):
+                return 0, 0
+
+            try:
+                for email in emails:
+                    try:
+                        EmailMessage(
+                            subject=email.subject,
+                            body=email.message,
+                            from_email=email.from_email or None,
+                            to=[email.recipient],
+                            connection=connection,
+                        ).send()
+                    except Exception as error:
+                        failed += 1
+                        email.attempts += 1
+                        email.last_error = repr(error)
+                        email.send_after = (
+                            timezone.now() + retry_delay(email.attempts))
+                        # Соединение могло оборваться: следующее письмо
+                        # пойдёт через новое, остальные ждут следующей
+                        # пачки, если почтовый сервер недоступен.
+                        connection.close()
+
+                        if not self.open(connection):
+                            break
+                    else:
+                        sent += 1
+                        email.attempts += 1
+                        email.sent_at = timezone.now()
+            finally:
+                connection.close()
+
+            OutboxEmail.objects.bulk_update(
+                emails, ('attempts', 'last_error', 'send_after', 'sent_at'))
+
+        return sent, failed
+
+    def open(self, connection):
+        try:
+            connection.open()
+        except Exception as error:
+            self.stderr.write(f'Mail server unavailable: {error!r}')
+
+            return False
+
+        return True
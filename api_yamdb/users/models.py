@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser, UserManager
 from django.db import models
+from django.utils import timezone
 
 from api_yamdb.settings import MESSAGE_FOR_RESERVED_NAME, RESERVED_NAME
 
@@ -62,3 +63,44 @@ class User(AbstractUser):
     @property
     def is_user(self):
         return self.role == self.USER
+
+
+class OutboxEmailQuerySet(models.QuerySet):
+
+    def pending(self, max_attempts):
+        """Неотправленные письма, для которых подошло время попытки."""
+        return self.filter(
+            sent_at=None, attempts__lt=max_attempts,
+            send_after__lte=timezone.now()
+        ).order_by('send_after', 'id')
+
+
+class OutboxEmail(models.Model):
+    """Письмо в очереди на отправку.
+
+    Создаётся в транзакции запроса, отправляется командой sendoutbox.
+    """
+
+    subject = models.CharField(max_length=255)
+    message = models.TextField()
+    from_email = models.CharField(max_length=254, blank=True)
+    recipient = models.EmailField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    send_after = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    objects = OutboxEmailQuerySet.as_manager()
+
+    class Meta:
+
+        verbose_name = 'Письмо в очереди'
+        verbose_name_plural = 'Очередь писем'
+        indexes = (
+            models.Index(
+                fields=('send_after', 'id'), name='outbox_pending_idx',
+                condition=models.Q(sent_at=None)),
+        )
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
@@ -0,0 +1,62 @@
+import pytest
+
+
+class Catalogue:
+    """Test catalogue that can be grown to check per-row query costs."""
+
+    def __init__(self, author):
+        from reviews.models import Category, Comment, Genre, Review, Title
+
+        self.author = author
+        self.category = Category.objects.create(name='Фильм', slug='movie')
+        self.genre = Genre.objects.create(name='Драма', slug='drama')
+        self.title = Title.objects.create(
+            name='Побег из Шоушенка', year=1994, category=self.category
+        )
+        self.title.genre.set([self.genre])
+        self.review = Review.objects.create(
+            title=self.title, author=author, text='Ставлю десять звёзд!',
+            score=10
+        )
+        self.comment = Comment.objects.create(
+            review=self.review, author=author, text='Согласен'
+        )
+        self.size = 1
+
+    def grow(self, count):
+        """Add `count` rows to every list served by the API."""
+        from reviews.models import Category, Comment, Genre, Review, Title
+        from users.models import User
+
+        start = self.size
+        self.size += count
+
+        for number in range(start, self.size):
+            category = Category.objects.create(
+                name=f'Категория {number}', slug=f'category-{number}'
+            )
+            genre = Genre.objects.create(
+                name=f'Жанр {number}', slug=f'genre-{number}'
+            )
+            title = Title.objects.create(
+                name=f'Произведение {number}', year=2000, category=category
+            )
+            title.genre.set([genre, self.genre])
+            author = User.objects.create_user(
+                username=f'reader{number}',
+                email=f'reader{number}@yamdb.fake',
+                password=None
+            )
+            Review.objects.create(
+                title=self.title, author=author, text=f'Отзыв {number}',
+                score=number % 10 + 1
+            )
+            Comment.objects.create(
+                review=self.review, author=author,
+                text=f'Комментарий {number}'
+            )
+
+
+@pytest.fixture
+def catalogue(admin):
+    return Catalogue(admin)
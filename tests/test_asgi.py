@@ -0,0 +1,118 @@
+import asyncio
+import json
+
+import pytest
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+def request(application, method, path, headers=(), body=b''):
+    """Один HTTP-запрос к ASGI-приложению: (status, headers, body)."""
+    from asgiref.testing import ApplicationCommunicator
+
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http', 'http_version': '1.1', 'method': method,
+        'scheme': 'http', 'path': path, 'root_path': '',
+        'query_string': query.encode('ascii'),
+        'headers': [
+            (name.encode('latin1'), value.encode('latin1'))
+            for name, value in (*headers, ('content-length', str(len(body))))
+        ],
+        'client': ('127.0.0.1', 5000), 'server': ('testserver', 80),
+    }
+
+    async def communicate():
+        communicator = ApplicationCommunicator(application, scope)
+        await communicator.send_input({'type': 'http.request',
+                                       'body': body})
+        start = await communicator.receive_output(5)
+        chunks = []
+
+        while True:
+            message = await communicator.receive_output(5)
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body'):
+                break
+
+        await communicator.wait(5)
+        return start['status'], dict(start['headers']), b''.join(chunks)
+
+    return asyncio.run(communicate())
+
+
+@pytest.fixture
+def application(monkeypatch):
+    """Приложение, запоминающее запросы, обработанные асинхронно."""
+    from api.asgi import AsyncReadApplication
+    from django.core.wsgi import get_wsgi_application
+
+    application = AsyncReadApplication(get_wsgi_application())
+    application.async_paths = []
+    get_response = application.get_response
+
+    def recording_get_response(environ):
+        application.async_paths.append(environ['PATH_INFO'])
+        return get_response(environ)
+
+    monkeypatch.setattr(application, 'get_response', recording_get_response)
+    yield application
+    application.executor.shutdown()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestAsyncReadApplication:
+
+    @pytest.mark.parametrize('name', ('titles-list', 'reviews-list',
+                                      'comments-list'))
+    def test_reads_are_served_asynchronously(self, client, application,
+                                             catalogue, name):
+        catalogue.grow(3)
+        kwargs = {'titles-list': {},
+                  'reviews-list': {'title_id': catalogue.title.pk},
+                  'comments-list': {'title_id': catalogue.title.pk,
+                                    'review_id': catalogue.review.pk}}[name]
+        url = reverse(name, kwargs=kwargs)
+        expected = client.get(url)
+
+        status, headers, body = request(application, 'GET', url)
+
+        assert application.async_paths == [url]
+        assert status == 200
+        assert headers[b'content-type'] == expected['Content-Type'].encode()
+        assert body == expected.content
+
+    def test_head_has_no_body(self, application, catalogue):
+        url = reverse('titles-detail', kwargs={'pk': catalogue.title.pk})
+
+        status, _, body = request(application, 'HEAD', url)
+
+        assert application.async_paths == [url]
+        assert status == 200
+        assert body == b''
+
+    def test_writes_fall_through(self, application, admin):
+        from reviews.models import Genre
+
+        token = AccessToken.for_user(admin)
+        status, _, body = request(
+            application, 'POST', reverse('genres-list'),
+            headers=[('authorization', f'Bearer {token}'),
+                     ('content-type', 'application/json')],
+            body=json.dumps({'name': 'Комедия', 'slug': 'comedy'}).encode(),
+        )
+
+        assert application.async_paths == []
+        assert status == 201
+        assert json.loads(body) == {'name': 'Комедия', 'slug': 'comedy'}
+        assert Genre.objects.filter(slug='comedy').exists()
+
+    @pytest.mark.parametrize('path', ('/api/v1/genres/', '/api/v1/nothing/'))
+    def test_other_paths_fall_through(self, client, application, path):
+        expected = client.get(path)
+
+        status, _, body = request(application, 'GET', path)
+
+        assert application.async_paths == []
+        assert status == expected.status_code
+        assert body == expected.content
@@ -0,0 +1,91 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+
+def user_queries(client, method, url, data=None):
+    with CaptureQueriesContext(connection) as context:
+        response = getattr(client, method)(url, data)
+
+    return response, [query['sql'] for query in context
+                      if 'FROM "users_user"' in query['sql']]
+
+
+# Снимки сбрасываются после коммита изменения пользователя.
+@pytest.mark.django_db(transaction=True)
+class TestCachedAuthentication:
+
+    def test_no_user_query(self, shared_auth_cache, user_client,
+                           catalogue):
+        reviews = reverse('reviews-list',
+                          kwargs={'title_id': catalogue.title.pk})
+        user_client.get(reverse('titles-list'))
+        response, queries = user_queries(user_client, 'get', reviews)
+
+        assert response.status_code == 200
+        assert not queries, (
+            f'Проверьте, что GET не читает пользователя из БД: {queries}'
+        )
+
+        response, queries = user_queries(user_client, 'post', reviews, {
+            'text': 'Отзыв', 'score': 5})
+        assert response.status_code == 201
+        assert response.data['author'] == 'TestUser'
+        assert not queries, (
+            f'Проверьте, что POST не читает пользователя из БД: {queries}'
+        )
+
+        response, queries = user_queries(
+            user_client, 'post', reverse('comments-list', kwargs={
+                'title_id': catalogue.title.pk,
+                'review_id': response.data['id']}), {'text': 'Коммент'})
+        assert response.status_code == 201
+        assert response.data['author'] == 'TestUser'
+        assert not queries
+
+    def test_role_change_revokes_permissions(self, shared_auth_cache,
+                                             admin_client, admin):
+        url = reverse('genres-list')
+
+        assert admin_client.post(url, {
+            'name': 'Комедия', 'slug': 'comedy'}).status_code == 201
+        admin.role = 'user'
+        admin.save()
+        assert admin_client.post(url, {
+            'name': 'Ужасы', 'slug': 'horror'}).status_code == 403
+
+    def test_deleted_user_is_rejected(self, shared_auth_cache, user_client,
+                                      user):
+        url = reverse('users-get-current-user-info')
+
+        assert user_client.get(url).status_code == 200
+        user.delete()
+        assert user_client.get(url).status_code == 401
+
+    def test_process_local_cache_is_not_used(self, user_client):
+        url = reverse('titles-list')
+
+        for _ in range(2):
+            response, queries = user_queries(user_client, 'get', url)
+            assert response.status_code == 200
+            assert len(queries) == 1, (
+                'Проверьте, что снимки не кэшируются в памяти процесса'
+            )
+
+    def test_patch_me_returns_new_values(self, shared_auth_cache,
+                                         user_client, admin_client):
+        url = reverse('users-get-current-user-info')
+        user_client.get(url)
+        response = user_client.patch(url, {'username': 'Renamed'})
+
+        assert response.status_code == 200
+        assert response.data['username'] == 'Renamed'
+        assert user_client.get(url).data['username'] == 'Renamed'
+
+        admin_client.get(url)
+        response = admin_client.patch(url, {'role': 'user'})
+        assert response.status_code == 200
+        assert response.data['role'] == 'user'
+        # Снимок сброшен: права пересчитаны уже в следующем запросе.
+        assert admin_client.get(reverse('users-list')).status_code == 403
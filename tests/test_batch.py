@@ -0,0 +1,125 @@
+import pytest
+from django.urls import reverse
+
+
+def batch(client, operations, **options):
+    return client.post(reverse('batch'), {'operations': operations,
+                                          **options}, format='json')
+
+
+@pytest.mark.django_db(transaction=True)
+class TestBatch:
+
+    @pytest.mark.parametrize('parallel', (False, True))
+    def test_results_in_operation_order(self, admin_client, catalogue,
+                                        parallel):
+        catalogue.grow(3)
+        paths = [reverse('titles-detail', kwargs={'pk': pk})
+                 for pk in (catalogue.title.pk, catalogue.title.pk + 3,
+                            catalogue.title.pk + 1, catalogue.title.pk + 2)]
+        response = batch(admin_client, [
+            {'method': 'GET', 'path': path} for path in paths
+        ], parallel=parallel)
+
+        assert response.status_code == 200
+        assert [item['status'] for item in response.data] == [200] * 4
+        assert [item['body']['id'] for item in response.data] == [
+            catalogue.title.pk, catalogue.title.pk + 3,
+            catalogue.title.pk + 1, catalogue.title.pk + 2]
+
+    def test_errors_per_operation(self, admin_client, catalogue):
+        response = batch(admin_client, [
+            {'method': 'POST', 'path': reverse('genres-list'),
+             'body': {'name': 'Комедия'}},
+            {'method': 'POST', 'path': reverse('genres-list'),
+             'body': {'name': 'Комедия', 'slug': 'comedy'}},
+            {'method': 'GET', 'path': reverse(
+                'titles-detail', kwargs={'pk': catalogue.title.pk + 100})},
+            {'method': 'GET', 'path': '/api/v1/nothing/'},
+            {'method': 'GET', 'path': reverse('genres-list')},
+        ])
+
+        assert response.status_code == 200
+        statuses = [item['status'] for item in response.data]
+        assert statuses == [400, 201, 404, 404, 200]
+        assert 'slug' in response.data[0]['body']
+        assert response.data[3]['body'] == {'detail': 'Not found.'}
+        assert response.data[4]['body']['count'] == 2
+
+    def test_read_after_write_in_parallel_batch(self, admin_client,
+                                                catalogue):
+        response = batch(admin_client, [
+            {'method': 'GET', 'path': reverse('genres-list')},
+            {'method': 'POST', 'path': reverse('genres-list'),
+             'body': {'name': 'Комедия', 'slug': 'comedy'}},
+            {'method': 'GET', 'path': reverse('genres-list')},
+        ], parallel=True)
+
+        assert [item['body'].get('count') for item in response.data] == [
+            1, None, 2]
+
+    def test_operations_use_batch_user(self, user_client):
+        from rest_framework.test import APIClient
+
+        operations = [{'method': 'POST', 'path': reverse('genres-list'),
+                       'body': {'name': 'Комедия', 'slug': 'comedy'}}]
+
+        assert batch(APIClient(), operations).data[0]['status'] == 401
+        assert batch(user_client, operations).data[0]['status'] == 403
+
+    def test_nested_batch_is_rejected(self, admin_client):
+        response = batch(admin_client, [
+            {'method': 'POST', 'path': reverse('batch'), 'body': {
+                'operations': [{'method': 'GET',
+                                'path': reverse('genres-list')}]}},
+        ])
+
+        assert response.data == [{
+            'status': 400,
+            'body': {'detail': 'Batch requests cannot be nested.'}}]
+
+    def test_operations_limit(self, admin_client):
+        from api_yamdb.settings import BATCH_MAX_OPERATIONS
+
+        operation = {'method': 'GET', 'path': reverse('genres-list')}
+
+        assert batch(admin_client, [
+            operation] * BATCH_MAX_OPERATIONS).status_code == 200
+        response = batch(admin_client, [
+            operation] * (BATCH_MAX_OPERATIONS + 1))
+        assert response.status_code == 400
+        assert 'operations' in response.data
+        assert batch(admin_client, []).status_code == 400
+
+    def test_throttle_charges_every_operation(self, user_client,
+                                              monkeypatch):
+        from api.throttling import BatchThrottle, get_rejected
+
+        monkeypatch.setattr(BatchThrottle, 'THROTTLE_RATES',
+                            {'batch': '5/min'})
+        operations = [{'method': 'GET', 'path': reverse('genres-list')}] * 3
+
+        assert batch(user_client, operations).status_code == 200
+        response = batch(user_client, operations)
+        assert response.status_code == 429
+        assert get_rejected()['batch'] == 1
+        assert batch(user_client, operations[:2]).status_code == 200
+
+
+def test_parallel_operations_keep_context(monkeypatch):
+    from api import batch as batch_module
+    from api.db_routers import read_alias
+
+    monkeypatch.setattr(batch_module, 'run_operation',
+                        lambda request, operation: read_alias.get())
+    monkeypatch.setattr(batch_module.connections, 'close_all', lambda: None)
+    token = read_alias.set('replica1')
+
+    try:
+        results = batch_module.run_batch(
+            None, [{'method': 'GET', 'path': '/api/v1/genres/'}] * 3,
+            parallel=True)
+    finally:
+        read_alias.reset(token)
+
+    assert results == ['replica1'] * 3
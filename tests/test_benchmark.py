@@ -0,0 +1,71 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+
+def generate(*args):
+    call_command('generatedata', '--seed', '1', *args, stdout=StringIO())
+
+
+def test_traffic_covers_every_endpoint():
+    from api.management.commands.benchmark import TRAFFIC
+    from api.urls import router_v1, urlpatterns
+
+    scenarios = {name for _, _, name, _ in TRAFFIC}
+    endpoints = {getattr(pattern, 'name', None) for pattern in urlpatterns}
+    endpoints.discard(None)
+
+    for prefix, viewset, basename in router_v1.registry:
+        endpoints.add(basename)
+        endpoints.update(f'{basename}-{action.url_path}'
+                         for action in viewset.get_extra_actions())
+
+    for endpoint in endpoints:
+        assert any(name.startswith(endpoint) for name in scenarios), (
+            f'Добавьте эндпоинт `{endpoint}` в TRAFFIC команды benchmark'
+        )
+
+
+@pytest.mark.django_db
+class TestGenerateData:
+
+    @pytest.mark.parametrize('args', (
+        ('--users', '0'),
+        ('--users', '5', '--titles', '5', '--reviews', '0'),
+        ('--users', '-1', '--reviews', '0', '--comments', '0'),
+        ('--batch-size', '0'),
+    ))
+    def test_invalid_counts(self, args):
+        with pytest.raises(CommandError):
+            generate(*args)
+
+    def test_every_pair_reviewed(self):
+        from reviews.models import Review, Title
+
+        generate('--users', '20', '--titles', '30', '--reviews', '600',
+                 '--comments', '10')
+
+        assert Review.objects.count() == 600
+        assert Review.objects.values(
+            'author', 'title').distinct().count() == 600
+        assert not Title.objects.with_rating_drift().exists()
+
+    def test_benchmark_runs_every_scenario(self, tmp_path):
+        from api.management.commands.benchmark import TRAFFIC
+
+        generate('--users', '200', '--categories', '3', '--genres', '5',
+                 '--titles', '30', '--reviews', '300', '--comments', '300')
+        output = tmp_path / 'results.json'
+        call_command('benchmark', '--requests', '800', '--warmup', '0',
+                     '--output', str(output), stdout=StringIO())
+
+        with open(output, encoding='utf-8') as file:
+            endpoints = json.load(file)['endpoints']
+        assert len(endpoints) == len(TRAFFIC)
+        for name, stats in endpoints.items():
+            assert all(int(status) < 500 for status in stats['status_codes']), (
+                f'Сценарий `{name}` отвечает ошибкой сервера: '
+                f'{stats["status_codes"]}'
+            )
@@ -0,0 +1,83 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+
+def titles(catalogue, count, start=0):
+    return [{'name': f'Новинка {number}', 'year': 2020,
+             'category': catalogue.category.slug,
+             'genre': [catalogue.genre.slug]}
+            for number in range(start, start + count)]
+
+
+def post(client, url, data):
+    with CaptureQueriesContext(connection) as context:
+        response = client.post(url, data, format='json')
+
+    return response, len(context)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestBulkCreate:
+
+    def test_titles_get_their_keys(self, admin_client, catalogue):
+        from reviews.models import GenreTitle, Title
+
+        data = titles(catalogue, 3)
+        data[1]['genre'] *= 2
+        response = admin_client.post(reverse('titles-list'), data,
+                                     format='json')
+
+        assert response.status_code == 201
+        assert [item['id'] for item in response.data] == [
+            Title.objects.get(name=item['name']).pk for item in data]
+        assert GenreTitle.objects.filter(
+            title_id=response.data[1]['id']).count() == 1
+
+    def test_query_count_does_not_grow(self, shared_auth_cache,
+                                       admin_client, catalogue):
+        url = reverse('titles-list')
+        admin_client.get(url)
+        small = post(admin_client, url, titles(catalogue, 2))
+        large = post(admin_client, url, titles(catalogue, 20, start=2))
+
+        assert small[0].status_code == large[0].status_code == 201
+        assert small[1] == large[1], (
+            'Проверьте, что пакетное создание не делает запросов на объект: '
+            f'{small[1]} -> {large[1]}'
+        )
+
+    def test_items_limit(self, admin_client, catalogue, monkeypatch):
+        monkeypatch.setattr('api.serializers.BULK_MAX_ITEMS', 3)
+        url = reverse('titles-list')
+
+        assert admin_client.post(url, titles(catalogue, 3),
+                                 format='json').status_code == 201
+        response = admin_client.post(url, titles(catalogue, 4, start=3),
+                                     format='json')
+        assert response.status_code == 400
+        assert 'no more than 3' in str(response.data)
+
+    def test_reviews(self, admin_client, user_client, catalogue, user):
+        from reviews.models import Review
+
+        url = reverse('reviews-list', kwargs={'title_id': catalogue.title.pk})
+        catalogue.grow(2)
+        reviews = [{'author': author, 'text': 'Отзыв', 'score': 2}
+                   for author in ('reader1', 'reader2', user.username)]
+
+        assert user_client.post(url, reviews,
+                                format='json').status_code == 403
+        response = admin_client.post(url, reviews + [reviews[2]],
+                                     format='json')
+        assert response.status_code == 400
+        assert [bool(errors) for errors in response.data] == [
+            True, True, False, True]
+
+        response = admin_client.post(url, reviews[2:], format='json')
+        assert response.status_code == 201
+        assert response.data[0]['id'] == Review.objects.get(
+            author=user).pk
+        catalogue.title.refresh_from_db()
+        assert catalogue.title.rating_count == 4
@@ -0,0 +1,93 @@
+from io import StringIO
+
+import pytest
+from django.db import transaction
+from django.urls import reverse
+
+
+def cache_status(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+
+    return response['X-Cache']
+
+
+# Версии ресурсов повышаются после коммита записи.
+@pytest.mark.django_db(transaction=True)
+class TestResponseCache:
+
+    def test_hit_after_miss(self, admin_client, catalogue):
+        from api.cache import get_stats
+
+        url = reverse('titles-list')
+
+        assert cache_status(admin_client, url) == 'MISS'
+        assert cache_status(admin_client, url) == 'HIT'
+        assert cache_status(admin_client, f'{url}?year=1994') == 'MISS'
+        assert get_stats() == {'hit': 1, 'miss': 2}
+
+    @pytest.mark.parametrize('name, change', (
+        ('genres-list', lambda client, data: client.post(
+            reverse('genres-list'), {'name': 'Комедия', 'slug': 'comedy'})),
+        ('genres-list', lambda client, data: client.delete(
+            reverse('genres-detail', kwargs={'slug': 'drama'}))),
+        ('titles-list', lambda client, data: client.post(
+            reverse('titles-list'), {'name': 'Новое', 'year': 2000,
+                                     'genre': ['drama'],
+                                     'category': 'movie'})),
+        ('titles-list', lambda client, data: client.patch(
+            reverse('titles-detail', kwargs={'pk': data.title.pk}),
+            {'name': 'Другое название'})),
+        ('titles-list', lambda client, data: client.delete(
+            reverse('titles-detail', kwargs={'pk': data.title.pk}))),
+        ('titles-list', lambda client, data: client.delete(
+            reverse('categories-detail', kwargs={'slug': 'movie'}))),
+        ('titles-list', lambda client, data: data.title.genre.clear()),
+        ('titles-list', lambda client, data: client.post(
+            reverse('reviews-list', kwargs={'title_id': data.title.pk}),
+            {'text': 'Ещё отзыв', 'score': 1})),
+    ))
+    def test_write_invalidates(self, admin_client, catalogue, name, change):
+        url = reverse(name)
+        catalogue.review.delete()
+        cache_status(admin_client, url)
+        response = change(admin_client, catalogue)
+
+        assert getattr(response, 'status_code', 200) < 400
+        assert cache_status(admin_client, url) == 'MISS', (
+            f'Проверьте, что запись сбрасывает кэш `{url}`'
+        )
+
+    def test_version_is_bumped_after_commit(self, catalogue):
+        from api.cache import get_versions
+        from reviews.models import Genre
+
+        before = get_versions(('genre',))
+
+        with transaction.atomic():
+            Genre.objects.create(name='Комедия', slug='comedy')
+            assert get_versions(('genre',)) == before, (
+                'Проверьте, что версия повышается только после коммита'
+            )
+
+        assert get_versions(('genre',)) != before
+
+    def test_leaderboard_follows_refresh_in_db(self, admin_client, catalogue,
+                                               monkeypatch):
+        from django.core.management import call_command
+        from reviews.models import Ranking
+
+        url = reverse('leaderboards', kwargs={'board': Ranking.TOP})
+        call_command('refreshleaderboards', '--full', stdout=StringIO())
+        before = admin_client.get(url).data
+        assert cache_status(admin_client, url) == 'HIT'
+
+        # Пересчёт в другом контейнере не сбрасывает кэш этого процесса.
+        monkeypatch.setattr('api.signals.bump_version',
+                            lambda *args, **kwargs: None)
+        catalogue.grow(2)
+        call_command('refreshleaderboards', '--full', stdout=StringIO())
+
+        assert cache_status(admin_client, url) == 'MISS'
+        assert admin_client.get(url).data['refreshed_at'] != (
+            before['refreshed_at'])
@@ -0,0 +1,41 @@
+import gzip
+
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+
+
+@pytest.mark.django_db
+class TestCompression:
+
+    @override_settings(COMPRESSION_MIN_SIZE=200)
+    def test_large_response_is_gzipped(self, admin_client, catalogue):
+        catalogue.grow(20)
+        url = reverse('titles-list')
+        plain = admin_client.get(url)
+        response = admin_client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+
+        assert response['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response['Vary']
+        assert gzip.decompress(response.content) == plain.content
+        assert response['ETag'] == f'W/{plain["ETag"]}'
+        assert admin_client.get(
+            url, HTTP_ACCEPT_ENCODING='gzip',
+            HTTP_IF_NONE_MATCH=response['ETag']
+        ).status_code == 304
+
+    @pytest.mark.parametrize('accept_encoding', ('', 'gzip;q=0', 'identity'))
+    @override_settings(COMPRESSION_MIN_SIZE=200)
+    def test_not_accepted_encoding(self, admin_client, catalogue,
+                                   accept_encoding):
+        catalogue.grow(20)
+        response = admin_client.get(reverse('titles-list'),
+                                    HTTP_ACCEPT_ENCODING=accept_encoding)
+
+        assert not response.has_header('Content-Encoding')
+
+    def test_small_response_is_not_compressed(self, admin_client, catalogue):
+        response = admin_client.get(reverse('genres-list'),
+                                    HTTP_ACCEPT_ENCODING='gzip')
+
+        assert not response.has_header('Content-Encoding')
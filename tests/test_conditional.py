@@ -0,0 +1,58 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+
+def get(client, url, **headers):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, **headers)
+
+    return response, len(context)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConditionalGet:
+
+    def test_cached_list_needs_no_queries(self, shared_auth_cache,
+                                          admin_client, catalogue):
+        url = reverse('titles-list')
+        first, _ = get(admin_client, url)
+        hit, queries = get(admin_client, url)
+
+        assert hit['X-Cache'] == 'HIT'
+        assert hit['ETag'] == first['ETag']
+        assert hit['Last-Modified'] == first['Last-Modified']
+        assert queries == 0, (
+            f'Проверьте, что попадание в кэш `{url}` не обращается к БД'
+        )
+
+        response, queries = get(admin_client, url,
+                                HTTP_IF_NONE_MATCH=first['ETag'])
+        assert response.status_code == 304
+        assert queries == 0
+
+    def test_write_changes_validators(self, admin_client, catalogue):
+        url = reverse('titles-list')
+        etag = get(admin_client, url)[0]['ETag']
+        admin_client.patch(
+            reverse('titles-detail', kwargs={'pk': catalogue.title.pk}),
+            {'name': 'Другое название'})
+        response, _ = get(admin_client, url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+
+    @pytest.mark.parametrize('name, kwargs', (
+        ('reviews-list', lambda data: {'title_id': data.title.pk}),
+        ('titles-detail', lambda data: {'pk': data.title.pk}),
+    ))
+    def test_not_modified(self, admin_client, catalogue, name, kwargs):
+        url = reverse(name, kwargs=kwargs(catalogue))
+        response, _ = get(admin_client, url)
+        not_modified, _ = get(admin_client, url,
+                              HTTP_IF_NONE_MATCH=response['ETag'])
+        since, _ = get(admin_client, url,
+                       HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+
+        assert not_modified.status_code == since.status_code == 304
@@ -0,0 +1,119 @@
+import gzip
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+
+def lines(content):
+    return [json.loads(line) for line in content.decode().splitlines()]
+
+
+def export(client, **params):
+    response = client.get(reverse('export'), params)
+
+    return response, b''.join(response.streaming_content)
+
+
+@pytest.fixture
+def exported(settings, catalogue):
+    """Каталог из пяти произведений; порции по два, чтобы отзывы и жанры
+    разбирались на границах порций."""
+    from reviews.models import Review, Title
+
+    settings.EXPORT_CHUNK_SIZE = 2
+    catalogue.grow(4)
+    last = Title.objects.order_by('id').last()
+    Review.objects.create(title=last, author=catalogue.author,
+                          text='Последний отзыв', score=3)
+
+    return catalogue
+
+
+@pytest.mark.django_db
+class TestExportView:
+
+    def test_line_per_title(self, admin_client, exported):
+        from reviews.models import Title
+
+        response, content = export(admin_client)
+
+        assert response.status_code == 200
+        assert response['Content-Type'] == 'application/x-ndjson'
+        assert not response.has_header('Content-Encoding')
+        assert content.endswith(b'\n')
+        titles = lines(content)
+        assert [title['id'] for title in titles] == list(
+            Title.objects.order_by('id').values_list('id', flat=True))
+
+        for title in titles:
+            reviews = title.pop('reviews')
+            assert title == admin_client.get(
+                reverse('titles-detail', kwargs={'pk': title['id']})).data
+            assert reviews == sorted(admin_client.get(
+                reverse('reviews-list', kwargs={'title_id': title['id']})
+            ).data['results'], key=lambda review: review['id'])
+
+        assert [len(title['reviews']) for title in lines(content)] == [
+            5, 0, 0, 0, 1]
+
+    def test_resume_after(self, admin_client, exported):
+        _, content = export(admin_client)
+        titles = lines(content)
+
+        _, rest = export(admin_client, after=titles[1]['id'])
+
+        assert lines(rest) == titles[2:]
+        assert export(admin_client, after=titles[-1]['id'])[1] == b''
+        assert admin_client.get(
+            reverse('export'), {'after': -1}).status_code == 400
+
+    def test_gzip(self, admin_client, exported):
+        _, plain = export(admin_client)
+        response = admin_client.get(reverse('export'),
+                                    HTTP_ACCEPT_ENCODING='gzip')
+
+        assert response['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response['Vary']
+        assert gzip.decompress(
+            b''.join(response.streaming_content)) == plain
+
+    @pytest.mark.parametrize('client_name', ('user_client',
+                                             'moderator_client'))
+    def test_admin_only(self, request, client, client_name):
+        assert client.get(reverse('export')).status_code == 401
+        assert request.getfixturevalue(client_name).get(
+            reverse('export')).status_code == 403
+
+
+@pytest.mark.django_db
+def test_command_writes_file(admin_client, exported, tmp_path):
+    _, expected = export(admin_client)
+    output = tmp_path / 'catalogue.ndjson'
+    stderr = StringIO()
+
+    call_command('exportcatalogue', output=str(output), stderr=stderr)
+
+    assert output.read_bytes() == expected
+    last_id = lines(expected)[-1]['id']
+    assert stderr.getvalue().strip() == (
+        f'Exported 5 titles to {output}, last id {last_id}.')
+
+
+@pytest.mark.django_db
+def test_command_resumes_gzip(admin_client, exported, tmp_path):
+    _, expected = export(admin_client)
+    after = lines(expected)[2]['id']
+    output = tmp_path / 'catalogue.ndjson.gz'
+
+    # Прерванная выгрузка: успели записать три произведения.
+    output.write_bytes(gzip.compress(b''.join(
+        line + b'\n' for line in expected.splitlines()[:3])))
+
+    call_command('exportcatalogue', output=str(output), gzip=True,
+                 append=True, after=after, stderr=StringIO())
+
+    # Несколько gzip-членов подряд распаковываются как один поток.
+    assert gzip.decompress(output.read_bytes()) == expected
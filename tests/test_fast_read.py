@@ -0,0 +1,67 @@
+import pytest
+from django.core.cache import caches
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .test_query_counts import ENDPOINTS
+
+LISTS = ('titles-list', 'reviews-list', 'comments-list')
+QUERIES = ('', '?include=histogram', '?fields=id,genre', '?omit=author',
+           '?pagination=cursor&limit=3')
+
+
+def get(client, url, fast):
+    caches['api'].clear()
+    with override_settings(FAST_READ_SERIALIZERS=fast):
+        return client.get(url)
+
+
+@pytest.mark.django_db
+class TestFastRead:
+
+    @pytest.mark.parametrize('query', QUERIES)
+    @pytest.mark.parametrize('name, kwargs', [
+        endpoint for endpoint in ENDPOINTS if endpoint[0] in LISTS])
+    def test_fast_read_matches_serializers(self, admin_client, catalogue,
+                                           name, kwargs, query):
+        catalogue.grow(5)
+        url = reverse(name, kwargs=kwargs(catalogue)) + query
+        slow = get(admin_client, url, fast=False)
+        fast = get(admin_client, url, fast=True)
+
+        assert slow.status_code == fast.status_code == 200
+        assert slow.content == fast.content, (
+            f'Проверьте, что быстрое чтение `{url}` отдаёт тот же JSON'
+        )
+
+    @pytest.mark.parametrize('fast', (False, True))
+    def test_genres_in_id_order(self, admin_client, catalogue, fast):
+        from reviews.models import Genre, GenreTitle
+
+        genres = [catalogue.genre, *(
+            Genre.objects.create(name=f'Жанр {number}', slug=f'g-{number}')
+            for number in range(3))]
+        GenreTitle.objects.all().delete()
+        # Связи созданы в обратном порядке жанров.
+        for genre in reversed(genres):
+            GenreTitle.objects.create(title=catalogue.title, genre=genre)
+        expected = [genre.slug for genre in genres]
+
+        for url in (reverse('titles-list'), reverse(
+                'titles-detail', kwargs={'pk': catalogue.title.pk})):
+            with CaptureQueriesContext(connection) as context:
+                data = get(admin_client, url, fast).json()
+            title = data['results'][0] if 'results' in data else data
+            # SQLite и без ORDER BY отдаёт жанры по индексу связей,
+            # PostgreSQL -- в любом порядке.
+            genre_queries = [query['sql'] for query in context
+                             if 'FROM "reviews_genre"' in query['sql']]
+
+            assert [genre['slug'] for genre in title['genre']] == expected, (
+                f'Проверьте, что жанры в `{url}` идут в порядке id'
+            )
+            assert genre_queries and all(
+                'ORDER BY "reviews_genre"."id"' in sql
+                for sql in genre_queries), genre_queries
@@ -0,0 +1,69 @@
+import shutil
+from io import StringIO
+from os.path import join
+
+import pytest
+from django.conf import settings
+from django.core.management import CommandError, call_command
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    source = join(settings.BASE_DIR, 'static', 'data')
+    target = tmp_path / 'data'
+    shutil.copytree(source, target)
+
+    return target
+
+
+def append(path, line):
+    with open(path, 'a', encoding='utf-8') as csv_file:
+        csv_file.write(f'\n{line}')
+
+
+@pytest.mark.django_db
+class TestImportCsv:
+
+    def test_orphans_are_skipped(self, data_dir):
+        from reviews.models import Review, Title
+
+        append(data_dir / 'review.csv',
+               '9001,100500,Нет такого произведения,100,5,'
+               '2019-09-24T21:08:21.567Z')
+        stdout = StringIO()
+        call_command('importcsv', path=str(data_dir), batch_size=10,
+                     stdout=stdout)
+
+        assert not Review.objects.filter(pk=9001).exists()
+        assert 'Reviews: 72 rows' in stdout.getvalue()
+        assert 'skipped 1' in stdout.getvalue()
+        assert not Title.objects.with_rating_drift().exists()
+
+    def test_malformed_row(self, data_dir):
+        append(data_dir / 'titles.csv', '9001,Без года,не год,1')
+
+        with pytest.raises(CommandError, match=r'titles\.csv, line \d+'):
+            call_command('importcsv', path=str(data_dir), stdout=StringIO())
+
+    def test_duplicates_are_skipped(self, data_dir):
+        from reviews.models import Review
+
+        # Повтор пары (произведение, автор) первого отзыва с новым id.
+        append(data_dir / 'review.csv',
+               '9001,1,Второй отзыв,100,5,2019-09-24T21:08:21.567Z')
+        first, second = StringIO(), StringIO()
+        call_command('importcsv', path=str(data_dir), batch_size=10,
+                     stdout=first)
+        call_command('importcsv', path=str(data_dir), batch_size=10,
+                     stdout=second)
+
+        assert not Review.objects.filter(pk=9001).exists()
+        assert 'Reviews: 72 rows' in first.getvalue()
+        assert 'skipped 1' in first.getvalue()
+        # Повторный импорт ничего не вставляет и честно считает пропуски.
+        output = second.getvalue()
+        assert 'Reviews: 0 rows' in output and 'skipped 73' in output
+        assert output.count('Reviews:') == 1, (
+            'Проверьте, что итог по таблице выводится один раз'
+        )
+
@@ -0,0 +1,45 @@
+from datetime import timedelta
+
+import pytest
+
+
+def board(board, scope):
+    from reviews.models import Ranking
+
+    return list(Ranking.objects.filter(board=board, scope=scope).order_by(
+        'position').values_list('title_id', flat=True))
+
+
+@pytest.mark.django_db
+class TestRefresh:
+
+    def test_decayed_title_leaves_unchanged_board(self, catalogue,
+                                                  settings, monkeypatch):
+        from django.utils import timezone
+        from reviews.leaderboards import (GLOBAL_SCOPE, category_scope,
+                                          genre_scope, refresh)
+        from reviews.models import Category, Ranking, Review, Title
+
+        refresh(full=True)
+        movie = category_scope(catalogue.category.pk)
+        drama = genre_scope(catalogue.genre.pk)
+        assert board(Ranking.TRENDING, movie) == [catalogue.title.pk]
+        assert board(Ranking.TRENDING, drama) == [catalogue.title.pk]
+
+        # Через 20 периодов полураспада отзыв пишут только другому
+        # произведению, таблицы категории и жанра первого не меняются.
+        later = timezone.now() + timedelta(
+            hours=20 * settings.TRENDING_HALF_LIFE_HOURS)
+        monkeypatch.setattr(timezone, 'now', lambda: later)
+        other = Title.objects.create(
+            name='Сталкер', year=1979,
+            category=Category.objects.create(name='Кино', slug='cinema'))
+        Review.objects.create(title=other, author=catalogue.author,
+                              text='Смотреть', score=9)
+
+        refresh()
+
+        assert board(Ranking.TRENDING, GLOBAL_SCOPE) == [other.pk]
+        assert board(Ranking.TRENDING, movie) == []
+        assert board(Ranking.TRENDING, drama) == []
+        assert board(Ranking.TOP, movie) == [catalogue.title.pk]
@@ -0,0 +1,147 @@
+import threading
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+
+class FailingBackend(EmailBackend):
+    """Не доставляет письма на адреса с `fail`."""
+
+    def send_messages(self, messages):
+        for message in messages:
+            if any('fail' in recipient for recipient in message.to):
+                raise ConnectionError('Recipient refused')
+
+        return super().send_messages(messages)
+
+
+def send_outbox():
+    call_command('sendoutbox', stdout=StringIO())
+
+
+def queue(recipient, **fields):
+    from users.models import OutboxEmail
+
+    return OutboxEmail.objects.create(
+        subject='Тема', message='Текст', recipient=recipient, **fields)
+
+
+@pytest.mark.django_db
+class TestOutbox:
+
+    def test_signup_queues_email(self, client):
+        from users.models import OutboxEmail
+
+        response = client.post(reverse('signup'), {
+            'username': 'newuser', 'email': 'newuser@yamdb.fake'})
+
+        assert response.status_code == 200
+        assert mail.outbox == [], (
+            'Проверьте, что регистрация не отправляет письмо сама'
+        )
+        email = OutboxEmail.objects.get()
+        assert email.recipient == 'newuser@yamdb.fake'
+
+        send_outbox()
+        email.refresh_from_db()
+        assert [message.to for message in mail.outbox] == [
+            ['newuser@yamdb.fake']]
+        assert email.sent_at is not None
+        assert email.attempts == 1
+
+        send_outbox()
+        assert len(mail.outbox) == 1
+
+    @override_settings(EMAIL_BACKEND='tests.test_outbox.FailingBackend')
+    def test_failed_email_is_retried_with_backoff(self):
+        failing = queue('fail@yamdb.fake')
+        delivered = queue('ok@yamdb.fake')
+
+        send_outbox()
+        failing.refresh_from_db()
+        delivered.refresh_from_db()
+        assert delivered.sent_at is not None
+        assert failing.sent_at is None
+        assert failing.attempts == 1
+        assert 'Recipient refused' in failing.last_error
+        first_delay = failing.send_after - timezone.now()
+        assert first_delay > timedelta(
+            seconds=settings.OUTBOX_RETRY_DELAY - 5)
+
+        send_outbox()
+        failing.refresh_from_db()
+        assert failing.attempts == 1, (
+            'Проверьте, что письмо не отправляется раньше send_after'
+        )
+
+        failing.send_after = timezone.now()
+        failing.save()
+        send_outbox()
+        failing.refresh_from_db()
+        assert failing.attempts == 2
+        assert failing.send_after - timezone.now() > first_delay
+
+    @override_settings(EMAIL_BACKEND='tests.test_outbox.FailingBackend')
+    def test_max_attempts(self):
+        email = queue('fail@yamdb.fake',
+                      attempts=settings.OUTBOX_MAX_ATTEMPTS - 1)
+
+        send_outbox()
+        email.refresh_from_db()
+        assert email.attempts == settings.OUTBOX_MAX_ATTEMPTS
+
+        email.send_after = timezone.now()
+        email.save()
+        send_outbox()
+        email.refresh_from_db()
+        assert email.attempts == settings.OUTBOX_MAX_ATTEMPTS, (
+            'Проверьте, что после OUTBOX_MAX_ATTEMPTS попыток письмо '
+            'больше не отправляется'
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_locked_emails_are_skipped():
+    from users.models import OutboxEmail
+
+    if not connection.features.has_select_for_update_skip_locked:
+        pytest.skip(f'{connection.vendor} не поддерживает SKIP LOCKED')
+
+    locked = queue('locked@yamdb.fake')
+    free = queue('free@yamdb.fake')
+    is_locked = threading.Event()
+    release = threading.Event()
+
+    def hold_lock():
+        # Второй воркер держит письмо `locked` в своей транзакции.
+        try:
+            with transaction.atomic():
+                list(OutboxEmail.objects.select_for_update().filter(
+                    pk=locked.pk))
+                is_locked.set()
+                release.wait(10)
+        finally:
+            connections.close_all()
+
+    worker = threading.Thread(target=hold_lock)
+    worker.start()
+    try:
+        assert is_locked.wait(10)
+        send_outbox()
+    finally:
+        release.set()
+        worker.join()
+
+    assert [message.to for message in mail.outbox] == [[free.recipient]]
+    locked.refresh_from_db()
+    assert locked.sent_at is None
+    assert locked.attempts == 0
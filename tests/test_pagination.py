@@ -0,0 +1,59 @@
+import json
+from base64 import b64encode
+
+import pytest
+from django.urls import reverse
+
+
+def cursor(position, reverse=0):
+    return b64encode(json.dumps({'p': position, 'r': reverse}).encode(
+        'ascii')).decode('ascii')
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+
+    def test_pages_follow_cursor(self, admin_client, catalogue):
+        catalogue.grow(4)
+        url = reverse('titles-list')
+        response = admin_client.get(url, {'pagination': 'cursor',
+                                          'limit': 3})
+        seen = [title['id'] for title in response.data['results']]
+        response = admin_client.get(response.data['next'])
+        seen += [title['id'] for title in response.data['results']]
+
+        assert response.data['next'] is None
+        assert seen == sorted(seen) and len(set(seen)) == 5
+
+    @pytest.mark.parametrize('value', ('!!!', cursor(['a', 'b']),
+                                       b64encode(b'[1]').decode()))
+    def test_malformed_cursor(self, admin_client, value):
+        response = admin_client.get(reverse('titles-list'), {'cursor': value})
+
+        assert response.status_code == 404
+
+    @pytest.mark.parametrize('position', (
+        ['abc'], [None], [{'a': 1}], [[1]], [10 ** 30], [1.5e300],
+    ))
+    def test_malformed_title_cursor_value(self, admin_client, catalogue,
+                                          position):
+        response = admin_client.get(reverse('titles-list'),
+                                    {'cursor': cursor(position)})
+
+        assert response.status_code == 404, (
+            f'Проверьте, что курсор {position} даёт 404, а не ошибку'
+        )
+
+    @pytest.mark.parametrize('position', (
+        ['garbage', 1], [None, 1], ['2021-01-01T00:00:00+00:00', 'x'],
+        [{'a': 1}, 1], ['2021-13-45T00:00:00', 1],
+    ))
+    def test_malformed_review_cursor_value(self, admin_client, catalogue,
+                                           position):
+        response = admin_client.get(
+            reverse('reviews-list', kwargs={'title_id': catalogue.title.pk}),
+            {'cursor': cursor(position)})
+
+        assert response.status_code == 404, (
+            f'Проверьте, что курсор {position} даёт 404, а не ошибку'
+        )
@@ -0,0 +1,94 @@
+import logging
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+SERVER_TIMING = re.compile(
+    r'^db;dur=[\d.]+;desc="(\d+) queries", view;dur=[\d.]+, '
+    r'render;dur=[\d.]+, total;dur=[\d.]+$'
+)
+
+
+@pytest.fixture
+def instrumented(settings):
+    settings.PERFORMANCE_INSTRUMENTATION = True
+    settings.PERFORMANCE_SAMPLE_RATE = 1
+    settings.PERFORMANCE_SLOW_REQUEST_MS = 60000
+
+    return settings
+
+
+@pytest.fixture
+def records(caplog):
+    # Логгер api.performance не передаёт записи корневому.
+    logger = logging.getLogger('api.performance')
+    logger.addHandler(caplog.handler)
+    caplog.set_level(logging.INFO, logger='api.performance')
+
+    yield lambda: [record.performance for record in caplog.records
+                   if record.name == 'api.performance']
+
+    logger.removeHandler(caplog.handler)
+
+
+@pytest.mark.django_db
+class TestPerformanceMiddleware:
+
+    def test_server_timing(self, instrumented, records, admin_client,
+                           catalogue):
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.get(reverse('titles-list'))
+
+        match = SERVER_TIMING.match(response['Server-Timing'])
+        assert match, response['Server-Timing']
+        assert int(match.group(1)) == len(context)
+
+        record, = records()
+        assert record['view'] == 'TitleViewSet.list'
+        assert record['status'] == 200
+        assert record['queries'] == len(context)
+        assert record['slowest_sql'].startswith('SELECT')
+        assert {'total_ms', 'db_ms', 'view_ms', 'render_ms'} <= set(record)
+
+    @pytest.mark.parametrize('enabled, rate', ((False, 1), (True, 0)))
+    def test_not_sampled(self, instrumented, records, admin_client,
+                         catalogue, enabled, rate):
+        instrumented.PERFORMANCE_INSTRUMENTATION = enabled
+        instrumented.PERFORMANCE_SAMPLE_RATE = rate
+        response = admin_client.get(reverse('titles-list'))
+
+        assert response.status_code == 200
+        assert 'Server-Timing' not in response
+        assert records() == []
+
+    @pytest.mark.parametrize('rate', (0, 1))
+    def test_slow_request_is_always_logged(self, instrumented, caplog,
+                                           records, admin_client, rate):
+        instrumented.PERFORMANCE_SAMPLE_RATE = rate
+        instrumented.PERFORMANCE_SLOW_REQUEST_MS = 0
+        admin_client.get(reverse('genres-list'))
+
+        record, = records()
+        assert caplog.records[-1].levelno == logging.WARNING
+        assert record['view'] == 'GenreViewSet.list'
+        assert record['path'] == reverse('genres-list')
+        assert record['total_ms'] >= 0
+        assert ('queries' in record) == bool(rate)
+
+    @pytest.mark.parametrize('method, url, name', (
+        ('get', lambda data: reverse('titles-detail', kwargs={
+            'pk': data.title.pk}), 'TitleViewSet.retrieve'),
+        ('post', lambda data: reverse('titles-list'), 'TitleViewSet.create'),
+        ('get', lambda data: reverse('titles-facets'), 'TitleViewSet.facets'),
+        ('get', lambda data: reverse('leaderboards', kwargs={
+            'board': 'top'}), 'LeaderboardView.get'),
+        ('get', lambda data: '/api/v1/nothing/', None),
+    ))
+    def test_view_name(self, instrumented, records, admin_client, catalogue,
+                       method, url, name):
+        getattr(admin_client, method)(url(catalogue), {})
+
+        assert records()[0]['view'] == name
@@ -0,0 +1,110 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+ENDPOINTS = (
+    ('genres-list', lambda data: {}),
+    ('categories-list', lambda data: {}),
+    ('titles-list', lambda data: {}),
+    ('titles-detail', lambda data: {'pk': data.title.pk}),
+    ('titles-facets', lambda data: {}),
+    ('reviews-list', lambda data: {'title_id': data.title.pk}),
+    ('reviews-detail', lambda data: {
+        'title_id': data.title.pk, 'pk': data.review.pk}),
+    ('comments-list', lambda data: {
+        'title_id': data.title.pk, 'review_id': data.review.pk}),
+    ('comments-detail', lambda data: {
+        'title_id': data.title.pk, 'review_id': data.review.pk,
+        'pk': data.comment.pk}),
+    ('users-list', lambda data: {}),
+    ('users-detail', lambda data: {'username': data.author.username}),
+    ('users-get-current-user-info', lambda data: {}),
+)
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+
+    assert response.status_code == 200, (
+        f'Проверьте, что GET-запрос к `{url}` возвращает статус 200'
+    )
+    return len(context)
+
+
+# Кэш ответов сбрасывается после коммита записи.
+@pytest.mark.django_db(transaction=True)
+class TestQueryCounts:
+
+    def test_all_router_endpoints_covered(self):
+        from api.urls import router_v1
+
+        covered = {name for name, kwargs in ENDPOINTS}
+        for prefix, viewset, basename in router_v1.registry:
+            assert f'{basename}-list' in covered, (
+                f'Добавьте эндпоинт `{prefix}` в проверку количества запросов'
+            )
+
+    @pytest.mark.parametrize('name, kwargs', ENDPOINTS)
+    def test_query_count_does_not_grow(self, admin_client, catalogue,
+                                       name, kwargs):
+        url = reverse(name, kwargs=kwargs(catalogue))
+        # Первый запрос кэширует пользователя токена.
+        admin_client.get(url)
+        catalogue.grow(2)
+        small = count_queries(admin_client, url)
+        catalogue.grow(20)
+        large = count_queries(admin_client, url)
+
+        assert small == large, (
+            f'Количество запросов к БД для `{url}` растёт вместе с размером '
+            f'страницы: {small} -> {large}'
+        )
+
+    @pytest.mark.parametrize('name, kwargs', ENDPOINTS)
+    def test_query_count_for_page_size(self, admin_client, catalogue,
+                                       name, kwargs):
+        url = reverse(name, kwargs=kwargs(catalogue))
+        admin_client.get(url)
+        catalogue.grow(20)
+        first = count_queries(admin_client, f'{url}?limit=1')
+        full = count_queries(admin_client, f'{url}?limit=20')
+
+        assert first == full, (
+            f'Количество запросов к БД для `{url}` зависит от параметра '
+            f'limit: {first} -> {full}'
+        )
+
+    @pytest.mark.parametrize('board', ('top', 'trending'))
+    def test_leaderboard_query_count_does_not_grow(self, admin_client,
+                                                   catalogue, board):
+        from reviews.leaderboards import refresh
+
+        url = reverse('leaderboards', kwargs={'board': board})
+        admin_client.get(url)
+        catalogue.grow(2)
+        refresh(full=True)
+        small = count_queries(admin_client, f'{url}?limit=100')
+        catalogue.grow(20)
+        refresh(full=True)
+        large = count_queries(admin_client, f'{url}?limit=100')
+
+        assert small == large, (
+            f'Количество запросов к БД для `{url}` растёт вместе с размером '
+            f'каталога: {small} -> {large}'
+        )
+
+    @pytest.mark.parametrize('name, kwargs', ENDPOINTS[2:4])
+    def test_sparse_fields_skip_related_queries(self, admin_client, catalogue,
+                                                name, kwargs):
+        url = reverse(name, kwargs=kwargs(catalogue))
+        admin_client.get(url)
+        catalogue.grow(2)
+        full = count_queries(admin_client, url)
+        sparse = count_queries(admin_client, f'{url}?fields=id,name')
+
+        assert sparse < full, (
+            f'Проверьте, что `{url}?fields=id,name` не загружает жанры: '
+            f'{full} -> {sparse}'
+        )
@@ -0,0 +1,145 @@
+import re
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+LARGE_TABLES = (
+    'reviews_title', 'reviews_review', 'reviews_comment',
+    'reviews_genretitle', 'users_user',
+)
+FULL_SCAN = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (?:TABLE )?(\w+)'),
+}
+
+
+def make_view(viewset, query=None, **kwargs):
+    """Вьюсет списка, настроенный так же, как это делает as_view()."""
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    request = Request(APIRequestFactory().get('/', query or {}),
+                      authenticators=())
+    request.accepted_renderer = JSONRenderer()
+
+    return viewset(request=request, args=(), kwargs=kwargs, action='list',
+                   format_kwarg=None)
+
+
+def listed(view):
+    return view.filter_queryset(view.get_queryset())
+
+
+def keyset_page(view):
+    return list(listed(view).order_by(*view.keyset_ordering)[:20])
+
+
+def hot_queries():
+    """Запросы, которые выполняет код вьюсетов: get_queryset(), фильтры,
+    пагинация по offset и курсору, валидаторы условного GET, подготовка
+    пакетной вставки."""
+    from api.views import CommentsViewSet, ReviewsViewSet, TitleViewSet
+
+    def reviews(data, **query):
+        return make_view(ReviewsViewSet, query, title_id=data.title)
+
+    def comments(data):
+        return make_view(CommentsViewSet, title_id=data.title,
+                         review_id=data.review)
+
+    def validators(view):
+        return view.get_queryset_validators(
+            view.request, listed(view), view.related_resources)
+
+    def titles(field):
+        def run(data):
+            view = make_view(TitleViewSet, {field: getattr(data, field)})
+            return list(listed(view)[:20])
+
+        return run
+
+    return (
+        ('reviews-list', lambda data: list(listed(reviews(data))[:20])),
+        ('reviews-keyset', lambda data: keyset_page(reviews(data))),
+        ('reviews-validators', lambda data: validators(reviews(data))),
+        ('reviews-duplicate', lambda data: reviews(data).get_bulk_context(
+            [{'author': username} for username in data.authors])),
+        ('comments-list', lambda data: list(listed(comments(data))[:20])),
+        ('comments-keyset', lambda data: keyset_page(comments(data))),
+        ('comments-validators', lambda data: validators(comments(data))),
+        ('titles-year', titles('year')),
+        ('titles-category', titles('category')),
+        ('titles-genre', titles('genre')),
+    )
+
+
+def explain(sql):
+    prefix = 'EXPLAIN QUERY PLAN' if connection.vendor == 'sqlite' else (
+        'EXPLAIN')
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'{prefix} {sql}')
+        return '\n'.join(' '.join(map(str, row))
+                         for row in cursor.fetchall())
+
+
+class Dataset:
+
+    def __init__(self):
+        from reviews.models import Category, Genre, Review
+
+        review = Review.objects.select_related('title').order_by('pk').first()
+        self.title = review.title_id
+        self.year = review.title.year
+        self.review = review.pk
+        self.authors = list(Review.objects.filter(
+            title_id=self.title).values_list('author__username',
+                                             flat=True)[:10])
+        self.category = Category.objects.order_by('pk').first().slug
+        self.genre = Genre.objects.order_by('pk').first().slug
+
+
+@pytest.fixture
+def dataset():
+    call_command(
+        'generatedata', '--seed', '1', '--users', '100',
+        '--categories', '5', '--genres', '10', '--titles', '300',
+        '--reviews', '3000', '--comments', '3000', stdout=StringIO()
+    )
+    return Dataset()
+
+
+@pytest.mark.django_db
+class TestQueryPlans:
+
+    @pytest.mark.parametrize('name, query', hot_queries())
+    def test_no_full_scan_of_large_tables(self, dataset, name, query):
+        pattern = FULL_SCAN.get(connection.vendor)
+
+        if pattern is None:
+            pytest.skip(f'EXPLAIN не разбирается для {connection.vendor}')
+
+        if connection.vendor == 'postgresql':
+            # На маленьких таблицах планировщик и так выбирает Seq Scan,
+            # без него он остаётся только там, где нет индекса.
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+        with CaptureQueriesContext(connection) as context:
+            query(dataset)
+        selects = [item['sql'] for item in context
+                   if item['sql'].startswith('SELECT')]
+
+        assert selects
+        for sql in selects:
+            plan = explain(sql)
+            scanned = set(pattern.findall(plan)) & set(LARGE_TABLES)
+
+            assert not scanned, (
+                f'Запрос `{name}` читает таблицы {sorted(scanned)} целиком, '
+                f'добавьте индекс. SQL:\n{sql}\nПлан:\n{plan}'
+            )
@@ -0,0 +1,92 @@
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+
+
+def rating(title):
+    title.refresh_from_db()
+
+    return title.rating_sum, title.rating_count, title.rating
+
+
+def assert_no_drift():
+    from reviews.models import Title
+
+    assert not Title.objects.with_rating_drift().exists(), (
+        'Проверьте, что рейтинг произведения совпадает с его отзывами'
+    )
+
+
+@pytest.mark.django_db
+class TestRatings:
+
+    def test_create_review(self, user_client, catalogue):
+        response = user_client.post(
+            reverse('reviews-list', kwargs={'title_id': catalogue.title.pk}),
+            {'text': 'Неплохо', 'score': 4})
+
+        assert response.status_code == 201
+        assert rating(catalogue.title) == (14, 2, 7)
+        assert catalogue.title.score_4 == catalogue.title.score_10 == 1
+        assert_no_drift()
+
+    @pytest.mark.parametrize('method, data', (
+        ('patch', {'score': 6}),
+        ('put', {'text': 'Передумал', 'score': 6}),
+    ))
+    def test_update_review(self, admin_client, catalogue, method, data):
+        url = reverse('reviews-detail', kwargs={
+            'title_id': catalogue.title.pk, 'pk': catalogue.review.pk})
+        response = getattr(admin_client, method)(url, data, format='json')
+
+        assert response.status_code == 200
+        assert rating(catalogue.title) == (6, 1, 6)
+        assert (catalogue.title.score_6, catalogue.title.score_10) == (1, 0)
+        assert_no_drift()
+
+    def test_moderator_deletes_review(self, moderator_client, catalogue):
+        catalogue.grow(2)
+        response = moderator_client.delete(reverse('reviews-detail', kwargs={
+            'title_id': catalogue.title.pk, 'pk': catalogue.review.pk}))
+
+        assert response.status_code == 204
+        assert rating(catalogue.title) == (5, 2, 2.5)
+        assert_no_drift()
+
+    def test_author_delete_cascades_to_rating(self, admin_client, catalogue):
+        catalogue.grow(3)
+        response = admin_client.delete(reverse('users-detail', kwargs={
+            'username': 'reader3'}))
+
+        assert response.status_code == 204
+        assert rating(catalogue.title) == (15, 3, 5)
+        assert_no_drift()
+
+    def test_review_loaded_without_score(self, catalogue):
+        from reviews.models import Review
+
+        catalogue.grow(2)
+        review = Review.objects.only('id', 'text').get(pk=catalogue.review.pk)
+        review.score = 1
+        review.save()
+
+        assert rating(catalogue.title) == (6, 3, 2)
+        Review.objects.only('id').filter(author__username='reader1').delete()
+        assert rating(catalogue.title) == (4, 2, 2)
+        assert_no_drift()
+
+    def test_rebuildratings_check(self, catalogue):
+        from reviews.models import Title
+
+        catalogue.grow(2)
+        call_command('rebuildratings', '--check', stdout=StringIO())
+        Title.objects.filter(pk=catalogue.title.pk).update(rating_sum=0,
+                                                           score_10=5)
+
+        with pytest.raises(CommandError):
+            call_command('rebuildratings', '--check', stdout=StringIO())
+        call_command('rebuildratings', stdout=StringIO())
+        assert rating(catalogue.title) == (15, 3, 5)
+        assert_no_drift()
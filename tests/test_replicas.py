@@ -0,0 +1,98 @@
+import pytest
+from django.db import connection, connections
+from django.urls import reverse
+
+REPLICAS = ('replica1', 'replica2')
+
+
+class Replicas:
+    """Две SQLite-реплики основной БД в файлах; `sync` копирует в них
+    основную БД, без неё в репликах нет таблиц."""
+
+    def __init__(self, tmp_path):
+        self.paths = {alias: str(tmp_path / f'{alias}.sqlite3')
+                      for alias in REPLICAS}
+
+    def sync(self):
+        for path in self.paths.values():
+            with connection.cursor() as cursor:
+                cursor.execute('VACUUM INTO %s', [path])
+
+
+@pytest.fixture
+def replicas(settings, tmp_path):
+    from api import db_routers
+
+    if connection.vendor != 'sqlite':
+        pytest.skip('Реплики в тестах -- файлы SQLite')
+
+    replicas = Replicas(tmp_path)
+    databases = {alias: {**connections.databases['default'], 'NAME': path}
+                 for alias, path in replicas.paths.items()}
+    connections.databases.update(databases)
+    settings.DATABASES = {**settings.DATABASES, **databases}
+    db_routers._health.clear()
+
+    yield replicas
+
+    db_routers._health.clear()
+    for alias in REPLICAS:
+        connections[alias].close()
+        del connections.databases[alias]
+        delattr(connections._connections, alias)
+
+
+def review_text(client, catalogue, **headers):
+    response = client.get(reverse('reviews-list', kwargs={
+        'title_id': catalogue.title.pk}), **headers)
+
+    assert response.status_code == 200
+    return response.data['results'][0]['text']
+
+
+def rewrite_review(catalogue, text):
+    catalogue.review.text = text
+    catalogue.review.save(update_fields=('text',))
+
+
+@pytest.mark.django_db(transaction=True)
+class TestReplicas:
+
+    def test_reads_go_to_replica(self, replicas, user_client, catalogue):
+        replicas.sync()
+        rewrite_review(catalogue, 'Новый текст')
+
+        assert review_text(user_client, catalogue) == 'Ставлю десять звёзд!'
+
+    def test_write_pins_client_to_default(self, replicas, user_client,
+                                          admin_client, catalogue):
+        replicas.sync()
+        url = reverse('reviews-detail', kwargs={
+            'title_id': catalogue.title.pk, 'pk': catalogue.review.pk})
+        response = admin_client.patch(url, {'text': 'Новый текст'})
+
+        assert response.status_code == 200
+        assert 'db_pin' in response.cookies
+        # Cookie клиента закрепляет его за основной БД.
+        assert review_text(admin_client, catalogue) == 'Новый текст'
+        # Клиент без cookie возвращает заголовок X-DB-Pin.
+        assert review_text(user_client, catalogue) == 'Ставлю десять звёзд!'
+        assert review_text(
+            user_client, catalogue,
+            HTTP_X_DB_PIN=response['X-DB-Pin']) == 'Новый текст'
+
+    def test_failed_replica_falls_back_to_default(self, replicas,
+                                                  user_client, catalogue):
+        from api import db_routers
+
+        # В репликах нет таблиц: чтение с них падает с OperationalError.
+        rewrite_review(catalogue, 'Новый текст')
+
+        for number in range(1, len(REPLICAS) + 1):
+            assert review_text(user_client, catalogue) == 'Новый текст'
+            down = [alias for alias, (available, _)
+                    in db_routers._health.items() if not available]
+            assert len(down) == number
+
+        assert db_routers.choose_replica() is None
+        assert review_text(user_client, catalogue) == 'Новый текст'
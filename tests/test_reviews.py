@@ -0,0 +1,73 @@
+import pytest
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+TRANSACTION_CONTROL = {'BEGIN', 'SAVEPOINT', 'RELEASE', 'COMMIT'}
+
+
+def post_review(client, title_id):
+    url = reverse('reviews-list', kwargs={'title_id': title_id})
+
+    with CaptureQueriesContext(connection) as context:
+        response = client.post(url, {'text': 'Отзыв', 'score': 7})
+
+    return response, [query['sql'] for query in context]
+
+
+@pytest.mark.django_db(transaction=True)
+class TestCreateReview:
+
+    def test_duplicate_review(self, admin_client, catalogue):
+        from api_yamdb.settings import MESSAGE_FOR_DUPLICATE_REVIEW
+
+        response, _ = post_review(admin_client, catalogue.title.pk)
+
+        assert response.status_code == 400
+        assert response.data['detail'] == MESSAGE_FOR_DUPLICATE_REVIEW
+
+    def test_missing_title(self, user_client, catalogue):
+        response, _ = post_review(user_client, catalogue.title.pk + 100)
+
+        assert response.status_code == 404
+
+    def test_query_count(self, shared_auth_cache, user_client, catalogue):
+        from reviews.models import Title
+
+        catalogue.grow(1)
+        first, second = Title.objects.values_list('pk', flat=True)[:2]
+        user_client.get(reverse('titles-list'))
+        response, small = post_review(user_client, first)
+        assert response.status_code == 201
+        catalogue.grow(20)
+        response, large = post_review(user_client, second)
+        assert response.status_code == 201
+
+        assert len(small) == len(large), (
+            'Количество запросов создания отзыва растёт вместе с каталогом'
+        )
+        statements = [sql.split()[0] for sql in large
+                      if sql.split()[0] not in TRANSACTION_CONTROL]
+        assert statements == ['INSERT', 'UPDATE'], (
+            'Проверьте, что создание отзыва -- вставка и обновление '
+            f'рейтинга, без предварительных проверок: {large}'
+        )
+
+
+@pytest.mark.django_db
+class TestViolatesConstraint:
+
+    def test_only_named_constraint(self, catalogue):
+        from reviews.helpers import violates_constraint
+        from reviews.models import GenreTitle, Review
+
+        with pytest.raises(IntegrityError) as review, transaction.atomic():
+            Review.objects.create(title=catalogue.title,
+                                  author=catalogue.author,
+                                  text='Ещё раз', score=1)
+        with pytest.raises(IntegrityError) as genre, transaction.atomic():
+            GenreTitle.objects.create(title=catalogue.title,
+                                      genre=catalogue.genre)
+
+        assert violates_constraint(review.value, Review, 'unique_review')
+        assert not violates_constraint(genre.value, Review, 'unique_review')
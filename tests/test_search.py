@@ -0,0 +1,60 @@
+import pytest
+from django.urls import reverse
+
+
+@pytest.fixture
+def titles(catalogue):
+    from reviews.models import Title
+    from reviews.search import index_titles
+
+    Title.objects.bulk_create([
+        Title(name=f'Остров {number}', year=2000) for number in range(30)
+    ])
+    described = Title.objects.create(
+        name='Без совпадения в названии', year=2000,
+        description='Фильм снят на острове')
+    # bulk_create не отправляет сигналы, индексируем вручную.
+    index_titles(Title.objects.all())
+
+    return described
+
+
+@pytest.mark.django_db
+class TestSearch:
+
+    def test_count_and_pages_cover_all_matches(self, admin_client, titles):
+        url = reverse('titles-list')
+        first = admin_client.get(url, {'search': 'остров', 'limit': 20})
+        last = admin_client.get(url, {'search': 'остров', 'limit': 20,
+                                      'offset': 20})
+
+        assert first.status_code == last.status_code == 200
+        assert first.data['count'] == 31
+        assert len(first.data['results']) == 20
+        assert len(last.data['results']) == 11
+        names = [title['name']
+                 for title in first.data['results'] + last.data['results']]
+        assert len(set(names)) == 31
+        assert names[-1] == titles.name, (
+            'Проверьте, что совпадение в названии ранжируется выше, '
+            'чем в описании'
+        )
+
+    def test_search_with_filters(self, admin_client, titles):
+        response = admin_client.get(reverse('titles-list'), {
+            'search': 'шоушенк', 'genre': 'drama'})
+        facets = admin_client.get(reverse('titles-facets'), {
+            'search': 'остров'})
+
+        assert response.status_code == 200
+        assert [title['name'] for title in response.data['results']] == [
+            'Побег из Шоушенка']
+        assert facets.status_code == 200
+        assert facets.data['count'] == 31
+
+    def test_search_rejects_cursor(self, admin_client, titles):
+        response = admin_client.get(reverse('titles-list'), {
+            'search': 'остров', 'pagination': 'cursor'})
+
+        assert response.status_code == 400
+        assert 'search' in response.data
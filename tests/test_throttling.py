@@ -0,0 +1,90 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+
+def rate(scope):
+    from rest_framework.settings import api_settings
+
+    return int(api_settings.DEFAULT_THROTTLE_RATES[scope].split('/')[0])
+
+
+@pytest.mark.django_db
+class TestThrottling:
+
+    def test_signup_is_throttled_per_ip(self, client):
+        url = reverse('signup')
+
+        for number in range(rate('signup')):
+            response = client.post(url, {
+                'username': f'user{number}',
+                'email': f'user{number}@yamdb.fake'})
+            assert response.status_code == 200
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(url, {
+                'username': 'extra', 'email': 'extra@yamdb.fake'})
+
+        assert response.status_code == 429
+        assert int(response['Retry-After']) > 0
+        assert len(context) == 0, (
+            'Проверьте, что отклонённый запрос не обращается к БД'
+        )
+        assert client.post(url, {
+            'username': 'extra', 'email': 'extra@yamdb.fake'},
+            REMOTE_ADDR='10.0.0.2').status_code == 200
+
+    def test_reviews_are_throttled_per_user(self, user_client, admin_client,
+                                            catalogue):
+        from api.throttling import get_rejected
+        from reviews.models import Title
+
+        catalogue.grow(rate('review') + 1)
+        title_ids = Title.objects.exclude(pk=catalogue.title.pk).values_list(
+            'pk', flat=True)
+        statuses = [
+            user_client.post(reverse('reviews-list', kwargs={
+                'title_id': title_id}), {'text': 'text', 'score': 5}
+            ).status_code
+            for title_id in title_ids
+        ]
+
+        assert statuses[:-1] == [201] * rate('review')
+        assert statuses[-1] == 429
+        assert get_rejected()['review'] == 1
+        assert user_client.get(reverse('reviews-list', kwargs={
+            'title_id': catalogue.title.pk})).status_code == 200
+        assert admin_client.post(reverse('reviews-list', kwargs={
+            'title_id': title_ids[0]}), {'text': 'text', 'score': 5}
+        ).status_code == 201
+
+    def test_locked_bucket_does_not_reject(self, client, monkeypatch):
+        from api import throttling
+
+        monkeypatch.setattr(throttling, 'LOCK_ATTEMPTS', 2)
+        # Блокировку держит упавший процесс.
+        key = throttling.BUCKET_KEY.format(scope='signup', ident='127.0.0.1')
+        throttling.get_cache().add(throttling.LOCK_KEY.format(key), 1)
+
+        assert client.post(reverse('signup'), {
+            'username': 'locked', 'email': 'locked@yamdb.fake'}
+        ).status_code == 200
+        assert throttling.get_rejected()['signup'] == 0
+
+
+def test_shared_cache_by_default(monkeypatch):
+    import importlib
+
+    from api_yamdb import settings
+
+    monkeypatch.setenv('MEMCACHED_LOCATION', 'memcached:11211')
+    try:
+        caches = importlib.reload(settings).CACHES
+    finally:
+        monkeypatch.undo()
+        importlib.reload(settings)
+
+    for alias in ('auth', 'throttle'):
+        assert caches[alias]['BACKEND'].endswith('MemcachedCache')
+        assert caches[alias]['LOCATION'] == 'memcached:11211'